@@ -0,0 +1,3 @@
+"""
+End-to-end load-test harness for opty_api.
+"""
@@ -0,0 +1,129 @@
+"""
+Load-test command line.
+
+Usage:
+  python -m loadtest run [--rps 50] [--duration 60] [--mix login=1,me=6,search=2] [--save NAME] [--compare NAME]
+  python -m loadtest startup [--runs 10] [--save NAME] [--compare NAME]
+  python -m loadtest compare <baseline> <report>
+  python -m loadtest stubs --port 9000 [--latency ...] [--errors ...]
+"""
+
+# --- IMPORTS ---
+from loadtest import runner
+from loadtest import startup
+
+import argparse
+import asyncio
+import json
+import sys
+
+
+# --- CONSTANTS ---
+DEFAULT_LATENCY = 'supabase=20:5,openai=400:150,mercadolivre=600:300'
+DEFAULT_ERRORS = 'supabase=0,openai=0,mercadolivre=0'
+
+
+# --- CODE ---
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line parser.
+    """
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description='opty_api load-test harness')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    # run command
+    run = commands.add_parser('run', help='start stubs and API, drive traffic and report latencies')
+    run.add_argument('--rps', type=float, default=50.0, help='target requests per second')
+    run.add_argument('--duration', type=float, default=60.0, help='measured window in seconds')
+    run.add_argument('--mix', default='login=1,me=6,search=2', help='relative weight of each operation')
+    run.add_argument('--users', type=int, default=50, help='number of load-test users')
+    run.add_argument('--max-in-flight', type=int, default=500, help='concurrency cap of the generator')
+    run.add_argument('--latency', default=DEFAULT_LATENCY, help='stub latency, upstream=mean_ms:jitter_ms')
+    run.add_argument('--errors', default=DEFAULT_ERRORS, help='stub error rate, upstream=fraction')
+    run.add_argument('--mongodb-url', default='mongodb://localhost:27017', help='local MongoDB used by the API')
+    run.add_argument('--db-name', default='opty_loadtest', help='database name used by the API')
+    run.add_argument('--api-port', type=int, default=0, help='API port (random if omitted)')
+    run.add_argument('--stub-port', type=int, default=0, help='stub server port (random if omitted)')
+    run.add_argument('--output', help='write the JSON report to this file')
+    run.add_argument('--save', metavar='NAME', help='save the report as baseline NAME')
+    run.add_argument('--compare', metavar='NAME', help='compare the report with baseline NAME')
+    run.add_argument('--max-regression', type=float, default=0.10, help='tolerated p95/p99/CPU increase')
+
+    # startup command
+    boot = commands.add_parser('startup', help='measure import time and time to serve / to be ready')
+    boot.add_argument('--runs', type=int, default=10, help='number of fresh processes measured')
+    boot.add_argument('--timeout', type=float, default=30.0, help='maximum wait for each endpoint, in seconds')
+    boot.add_argument('--mongodb-url', default='mongodb://localhost:27017', help='local MongoDB used by the API')
+    boot.add_argument('--db-name', default='opty_loadtest', help='database name used by the API')
+    boot.add_argument('--save', metavar='NAME', help='save the report as baseline NAME')
+    boot.add_argument('--compare', metavar='NAME', help='compare the report with baseline NAME')
+    boot.add_argument('--max-regression', type=float, default=0.20, help='tolerated median increase')
+
+    # compare command
+    cmp = commands.add_parser('compare', help='compare two saved reports')
+    cmp.add_argument('baseline', help='baseline name or report path')
+    cmp.add_argument('report', help='baseline name or report path')
+    cmp.add_argument('--max-regression', type=float, default=0.10, help='tolerated p95/p99/CPU increase')
+
+    # stubs command
+    stubs = commands.add_parser('stubs', help='serve the Supabase, OpenAI and Mercado Livre stand-ins')
+    stubs.add_argument('--host', default='127.0.0.1')
+    stubs.add_argument('--port', type=int, default=9000)
+    stubs.add_argument('--latency', default=DEFAULT_LATENCY, help='upstream=mean_ms:jitter_ms')
+    stubs.add_argument('--errors', default=DEFAULT_ERRORS, help='upstream=fraction')
+
+    return parser
+
+
+def main() -> int:
+    """
+    Command line entry point.
+
+    :returns: Exit code
+    """
+    options = build_parser().parse_args()
+
+    # serve stubs
+    if options.command == 'stubs':
+        import uvicorn  # pylint: disable=C0415
+        from loadtest.stubs import create_app  # pylint: disable=C0415
+        errors = {name: float(rate) for name, rate in runner.parse_pairs(options.errors).items()}
+        app = create_app(runner.parse_latency(options.latency), errors)
+        uvicorn.run(app, host=options.host, port=options.port, log_level='warning', access_log=False)
+        return 0
+
+    # compare saved reports
+    if options.command == 'compare':
+        baseline, report = runner.load_baseline(options.baseline), runner.load_baseline(options.report)
+        module = startup if report.get('kind') == 'startup' else runner
+        return 0 if module.compare(baseline, report, options.max_regression) else 1
+
+    # measure startup
+    if options.command == 'startup':
+        report = asyncio.run(startup.run_startup(options))
+        startup.print_report(report)
+        if options.save:
+            print(f'\nBaseline saved to {runner.save_baseline(report, options.save)}')
+        if options.compare:
+            return 0 if startup.compare(runner.load_baseline(options.compare), report, options.max_regression) else 1
+        return 0
+
+    # run load test
+    report = asyncio.run(runner.run_test(options))
+    runner.print_report(report)
+
+    # persist report
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+    if options.save:
+        print(f'\nBaseline saved to {runner.save_baseline(report, options.save)}')
+
+    # compare with baseline
+    if options.compare:
+        return 0 if runner.compare(runner.load_baseline(options.compare), report, options.max_regression) else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
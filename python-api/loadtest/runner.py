@@ -0,0 +1,477 @@
+"""
+Load generator, process orchestration and reporting.
+"""
+
+# --- IMPORTS ---
+from datetime import datetime
+from datetime import timezone
+from loadtest.stubs import JWT_SECRET
+from loadtest.stubs import supabase_id
+from pathlib import Path
+
+import asyncio
+import httpx
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+
+# --- CONSTANTS ---
+ROOT = Path(__file__).resolve().parent.parent
+BASELINES = Path(__file__).resolve().parent / 'baselines'
+PASSWORD = 'loadtest-password'
+QUERIES = [
+    'fone bluetooth bom e barato',
+    'tênis confortável pra correr',
+    'airfryer grande philips walita',
+    'notebook pra programar e jogar',
+    'mouse sem fio para notebook',
+    'cafeteira expresso',
+    'carregador rápido samsung',
+    'smartwatch apple',
+]
+PERCENTILES = (50, 95, 99)
+
+
+# --- CODE ---
+def free_port() -> int:
+    """
+    Get a free local TCP port.
+
+    :returns: Port number
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def cpu_seconds(pid: int) -> Optional[float]:
+    """
+    Get the CPU time (user + system) consumed by a process.
+
+    :param pid: Process ID
+    :returns: CPU seconds, or None where /proc is not available
+    """
+    try:
+        with open(f'/proc/{pid}/stat', encoding='ascii') as stat:
+            fields = stat.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    Nearest-rank percentile.
+
+    :param values: Sorted values
+    :param pct: Percentile (0 - 100)
+    :returns: Percentile value, or None for an empty list
+    """
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return round(values[rank], 2)
+
+
+def summarize(latencies: List[float], errors: int) -> Dict[str, Any]:
+    """
+    Summarize the latencies of a group of requests.
+
+    :param latencies: Request latencies in ms
+    :param errors: Number of failed requests
+    :returns: Summary
+    """
+    values = sorted(latencies)
+    summary: Dict[str, Any] = {
+        'count': len(values),
+        'errors': errors,
+        'error_rate': round(errors / len(values), 4) if values else 0.0,
+        'mean': round(sum(values) / len(values), 2) if values else None,
+        'max': round(values[-1], 2) if values else None,
+    }
+    for pct in PERCENTILES:
+        summary[f'p{pct}'] = percentile(values, pct)
+    return summary
+
+
+def seed_users(mongodb_url: str, db_name: str, count: int) -> List[str]:
+    """
+    Create the load-test user profiles in MongoDB.
+
+    :param mongodb_url: MongoDB connection URL
+    :param db_name: Database name
+    :param count: Number of users
+    :returns: User e-mails
+    """
+    from pymongo import MongoClient  # pylint: disable=C0415
+    from pymongo import UpdateOne  # pylint: disable=C0415
+
+    now = datetime.now(timezone.utc)
+    emails = [f'loadtest-{i}@loadtest.local' for i in range(count)]
+
+    # upsert profiles
+    client = MongoClient(mongodb_url)
+    try:
+        client[db_name]['users'].bulk_write([
+            UpdateOne(
+                {'email': email},
+                {'$set': {
+                    'supabase_id': supabase_id(email),
+                    'email': email,
+                    'name': f'Load Test {i}',
+                    'phone': None,
+                    'birthday': None,
+                    'avatar_url': None,
+                    'is_active': True,
+                    'role': 'user',
+                    'updated_at': now,
+                }, '$setOnInsert': {'created_at': now}},
+                upsert=True,
+            )
+            for i, email in enumerate(emails)
+        ])
+    finally:
+        client.close()
+
+    return emails
+
+
+def spawn(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    """
+    Start a Python subprocess from the project root.
+
+    :param args: Arguments after the interpreter
+    :param env: Extra environment variables
+    :returns: Process handle
+    """
+    return subprocess.Popen([sys.executable, *args], cwd=ROOT, env={**os.environ, **env})  # pylint: disable=R1732
+
+
+def api_env(stub_url: str, mongodb_url: str, db_name: str) -> Dict[str, str]:
+    """
+    Environment pointing the API at the stubs and a local MongoDB.
+
+    :param stub_url: Stub server base URL
+    :param mongodb_url: MongoDB connection string
+    :param db_name: Database name
+    :returns: Environment variables
+    """
+    return {
+        'SUPABASE_URL': f'{stub_url}/supabase',
+        'SUPABASE_KEY': 'loadtest-anon-key',
+        'SUPABASE_JWT_SECRET': JWT_SECRET,
+        'OPENAI_API_KEY': 'loadtest-openai-key',
+        'OPENAI_BASE_URL': f'{stub_url}/openai/v1',
+        'MERCADOLIVRE_URL': f'{stub_url}/mercadolivre/',
+        'MONGODB_URL': mongodb_url,
+        'MONGODB_DB_NAME': db_name,
+        'LOG_LEVEL': 'WARNING',
+    }
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    """
+    Wait until an HTTP endpoint answers with success.
+
+    :param url: URL to poll
+    :param timeout: Maximum time to wait, in seconds
+    :raises RuntimeError: If the endpoint does not become ready in time
+    """
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).is_success:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'{url} did not become ready within {timeout}s')
+
+
+class LoadGenerator:
+    """
+    Open-loop traffic generator.
+
+    Requests are issued on a fixed schedule regardless of how fast earlier requests
+    complete, and latency is measured from the scheduled start, so a slow server
+    cannot hide its queueing delay (coordinated omission).
+    """
+
+    def __init__(self, base_url: str, mix: Dict[str, float], emails: List[str], max_in_flight: int) -> None:
+        """
+        Initialize the generator.
+
+        :param base_url: API base URL
+        :param mix: Relative weight of each operation (login, me, search)
+        :param emails: Load-test user e-mails
+        :param max_in_flight: Maximum concurrent requests (excess requests are counted as skipped)
+        """
+        self.base_url = base_url
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.emails = emails
+        self.max_in_flight = max_in_flight
+        self.tokens: Dict[str, str] = {}
+        self.latencies: Dict[str, List[float]] = {name: [] for name in self.operations}
+        self.errors: Dict[str, int] = {name: 0 for name in self.operations}
+        self.skipped = 0
+        self.in_flight = 0
+
+
+    async def login(self, client: httpx.AsyncClient, email: str) -> httpx.Response:
+        """
+        Log a user in and remember its access token.
+        """
+        response = await client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+        if response.is_success:
+            self.tokens[email] = response.json()['token']['access_token']
+        return response
+
+
+    async def request(self, client: httpx.AsyncClient, operation: str) -> httpx.Response:
+        """
+        Issue a single operation.
+        """
+        email = random.choice(self.emails)
+        token = self.tokens.get(email)
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+
+        if operation == 'login':
+            return await self.login(client, email)
+        if operation == 'me':
+            return await client.get('/api/auth/me', headers=headers)
+        if operation == 'search':
+            params = {'query': random.choice(QUERIES)}
+            return await client.get('/api/search/mercadolivre', params=params, headers=headers)
+        raise ValueError(f'Unknown operation: {operation}')
+
+
+    async def warm_up(self, client: httpx.AsyncClient) -> None:
+        """
+        Log every user in before measuring.
+        """
+        await asyncio.gather(*(self.login(client, email) for email in self.emails))
+
+
+    async def run(self, rps: float, duration: float) -> float:
+        """
+        Drive traffic at a target rate.
+
+        :param rps: Target requests per second
+        :param duration: Test duration in seconds
+        :returns: Elapsed wall time in seconds
+        """
+        loop = asyncio.get_running_loop()
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=60.0) as client:
+            await self.warm_up(client)
+
+            async def issue(operation: str, scheduled: float) -> None:
+                self.in_flight += 1
+                try:
+                    response = await self.request(client, operation)
+                    if not response.is_success:
+                        self.errors[operation] += 1
+                except httpx.HTTPError:
+                    self.errors[operation] += 1
+                finally:
+                    self.in_flight -= 1
+                    self.latencies[operation].append((loop.time() - scheduled) * 1000)
+
+            # schedule requests at a fixed interval
+            tasks = []
+            start = loop.time()
+            total = int(rps * duration)
+            for i in range(total):
+                scheduled = start + i / rps
+                delay = scheduled - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.in_flight >= self.max_in_flight:
+                    self.skipped += 1
+                    continue
+                operation = random.choices(self.operations, self.weights)[0]
+                tasks.append(asyncio.create_task(issue(operation, scheduled)))
+
+            # wait for outstanding requests
+            await asyncio.gather(*tasks)
+            return loop.time() - start
+
+
+def parse_pairs(value: str) -> Dict[str, str]:
+    """
+    Parse a `key=value,key=value` option.
+
+    :param value: Option value
+    :returns: Parsed pairs
+    """
+    return dict(pair.split('=', 1) for pair in value.split(',') if pair)
+
+
+def parse_latency(value: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse a `upstream=mean:jitter` latency option (milliseconds).
+
+    :param value: Option value
+    :returns: Mean and jitter per upstream
+    """
+    result = {}
+    for name, spec in parse_pairs(value).items():
+        mean, _, jitter = spec.partition(':')
+        result[name] = (float(mean), float(jitter or 0))
+    return result
+
+
+async def run_test(options: Any) -> Dict[str, Any]:
+    """
+    Start stubs and API, drive traffic and build the report.
+
+    :param options: Parsed command line options
+    :returns: Report
+    """
+    mix = {name: float(weight) for name, weight in parse_pairs(options.mix).items()}
+    stub_port = options.stub_port or free_port()
+    api_port = options.api_port or free_port()
+    stub_url = f'http://127.0.0.1:{stub_port}'
+
+    # seed user profiles
+    emails = seed_users(options.mongodb_url, options.db_name, options.users)
+
+    # start stubs and API
+    stubs = spawn(['-m', 'loadtest', 'stubs', '--port', str(stub_port),
+                   '--latency', options.latency, '--errors', options.errors], {})
+    api = spawn(['-m', 'uvicorn', 'opty_api.main:app', '--host', '127.0.0.1', '--port', str(api_port),
+                 '--log-level', 'warning', '--no-access-log'],
+                api_env(stub_url, options.mongodb_url, options.db_name))
+
+    try:
+        await wait_ready(f'{stub_url}/docs')
+        await wait_ready(f'http://127.0.0.1:{api_port}/api/health')
+
+        # drive traffic and measure API CPU over the measured window
+        generator = LoadGenerator(f'http://127.0.0.1:{api_port}', mix, emails, options.max_in_flight)
+        cpu_start = cpu_seconds(api.pid)
+        elapsed = await generator.run(options.rps, options.duration)
+        cpu_end = cpu_seconds(api.pid)
+
+    finally:
+        for process in (api, stubs):
+            process.terminate()
+            process.wait(timeout=10)
+
+    # build report
+    all_latencies = [value for values in generator.latencies.values() for value in values]
+    completed = len(all_latencies)
+    cpu = cpu_end - cpu_start if cpu_start is not None and cpu_end is not None else None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'config': {
+            'rps': options.rps,
+            'duration': options.duration,
+            'mix': mix,
+            'users': options.users,
+            'latency': options.latency,
+            'errors': options.errors,
+        },
+        'throughput_rps': round(completed / elapsed, 2) if elapsed else 0.0,
+        'skipped': generator.skipped,
+        'cpu_ms_per_request': round(cpu * 1000 / completed, 3) if cpu is not None and completed else None,
+        'overall': summarize(all_latencies, sum(generator.errors.values())),
+        'operations': {
+            name: summarize(generator.latencies[name], generator.errors[name]) for name in generator.operations
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """
+    Print a report as a table.
+
+    :param report: Report
+    """
+    print(f'\nThroughput: {report["throughput_rps"]} req/s   skipped: {report["skipped"]}   '
+          f'CPU/request: {report["cpu_ms_per_request"]} ms')
+    print(f'{"operation":<10} {"count":>7} {"errors":>7} {"p50":>9} {"p95":>9} {"p99":>9} {"max":>9}')
+    rows = [*report['operations'].items(), ('overall', report['overall'])]
+    for name, stats in rows:
+        print(f'{name:<10} {stats["count"]:>7} {stats["errors"]:>7} {stats["p50"] or "-":>9} '
+              f'{stats["p95"] or "-":>9} {stats["p99"] or "-":>9} {stats["max"] or "-":>9}')
+
+
+def save_baseline(report: Dict[str, Any], name: str) -> Path:
+    """
+    Save a report as a named baseline.
+
+    :param report: Report
+    :param name: Baseline name (e.g. the release version)
+    :returns: Baseline file path
+    """
+    BASELINES.mkdir(exist_ok=True)
+    path = BASELINES / f'{name}.json'
+    path.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+    return path
+
+
+def load_baseline(name: str) -> Dict[str, Any]:
+    """
+    Load a named baseline (or a report file path).
+
+    :param name: Baseline name or path
+    :returns: Report
+    """
+    path = Path(name) if name.endswith('.json') else BASELINES / f'{name}.json'
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float) -> bool:
+    """
+    Print the latency and error deltas between two reports.
+
+    :param baseline: Reference report
+    :param current: Report being evaluated
+    :param max_regression: Maximum tolerated p95/p99 increase (fraction, e.g. 0.1)
+    :returns: True if no metric regressed beyond the tolerance
+    """
+    ok = True
+    print(f'\n{"operation":<10} {"metric":<10} {"baseline":>10} {"current":>10} {"delta":>8}')
+    names = [*current['operations'], 'overall']
+    for name in names:
+        before = baseline['overall'] if name == 'overall' else baseline['operations'].get(name)
+        after = current['overall'] if name == 'overall' else current['operations'][name]
+        if not before:
+            continue
+        for metric in ('p50', 'p95', 'p99', 'error_rate'):
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            delta = (new - old) / old if old else (0.0 if new == old else float('inf'))
+            regressed = metric != 'p50' and new > old and delta > max_regression
+            ok = ok and not regressed
+            flag = '  <-- regression' if regressed else ''
+            print(f'{name:<10} {metric:<10} {old:>10} {new:>10} {delta:>+8.1%}{flag}')
+
+    # compare CPU per request
+    old_cpu, new_cpu = baseline.get('cpu_ms_per_request'), current.get('cpu_ms_per_request')
+    if old_cpu and new_cpu:
+        delta = (new_cpu - old_cpu) / old_cpu
+        regressed = delta > max_regression
+        ok = ok and not regressed
+        print(f'{"overall":<10} {"cpu_ms":<10} {old_cpu:>10} {new_cpu:>10} {delta:>+8.1%}'
+              f'{"  <-- regression" if regressed else ""}')
+
+    return ok
@@ -0,0 +1,183 @@
+"""
+Import-time and startup-time benchmark.
+"""
+
+# --- IMPORTS ---
+from datetime import datetime
+from datetime import timezone
+from loadtest.runner import ROOT
+from loadtest.runner import api_env
+from loadtest.runner import free_port
+from loadtest.runner import spawn
+from loadtest.runner import wait_ready
+
+import asyncio
+import httpx
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+
+# --- CONSTANTS ---
+IMPORT_SNIPPET = ('import time; start = time.perf_counter(); import opty_api.main; '
+                  'print((time.perf_counter() - start) * 1000)')
+METRICS = ('import_ms', 'serving_ms', 'ready_ms')
+POLL_INTERVAL = 0.02
+STUB_LATENCY = 'supabase=0:0,openai=0:0,mercadolivre=0:0'
+STUB_ERRORS = 'supabase=0,openai=0,mercadolivre=0'
+
+
+# --- CODE ---
+def measure_import(env: Dict[str, str]) -> float:
+    """
+    Time `import opty_api.main` in a fresh interpreter.
+
+    :param env: Extra environment variables
+    :returns: Import time in ms
+    """
+    result = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], cwd=ROOT, env={**os.environ, **env},
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+async def poll(client: httpx.AsyncClient, url: str, start: float, timeout: float) -> Optional[float]:
+    """
+    Poll an endpoint until it answers with success.
+
+    :param client: HTTP client
+    :param url: URL to poll
+    :param start: Reference time (time.monotonic)
+    :param timeout: Maximum time to wait, in seconds
+    :returns: Time from start to the first success in ms, or None on timeout
+    """
+    while time.monotonic() - start < timeout:
+        try:
+            if (await client.get(url)).is_success:
+                return round((time.monotonic() - start) * 1000, 2)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(POLL_INTERVAL)
+    return None
+
+
+async def measure_boot(env: Dict[str, str], timeout: float) -> Dict[str, Optional[float]]:
+    """
+    Start the API and time how long it takes to serve and to be ready.
+
+    :param env: Extra environment variables
+    :param timeout: Maximum time to wait for each endpoint, in seconds
+    :returns: Time to the first /api/health and /api/ready success in ms (None on timeout)
+    """
+    port = free_port()
+    start = time.monotonic()
+    api = spawn(['-m', 'uvicorn', 'opty_api.main:app', '--host', '127.0.0.1', '--port', str(port),
+                 '--log-level', 'warning', '--no-access-log'], env)
+    try:
+        async with httpx.AsyncClient(timeout=1.0) as client:
+            serving_ms = await poll(client, f'http://127.0.0.1:{port}/api/health', start, timeout)
+            ready_ms = await poll(client, f'http://127.0.0.1:{port}/api/ready', start, timeout)
+    finally:
+        api.terminate()
+        api.wait(timeout=10)
+    return {'serving_ms': serving_ms, 'ready_ms': ready_ms}
+
+
+def summarize(values: List[Optional[float]]) -> Dict[str, Any]:
+    """
+    Summarize repeated timings.
+
+    :param values: Timings in ms (None for timeouts)
+    :returns: Median, min, max and number of timeouts
+    """
+    measured = [value for value in values if value is not None]
+    return {
+        'median': round(statistics.median(measured), 2) if measured else None,
+        'min': round(min(measured), 2) if measured else None,
+        'max': round(max(measured), 2) if measured else None,
+        'timeouts': len(values) - len(measured),
+    }
+
+
+async def run_startup(options: Any) -> Dict[str, Any]:
+    """
+    Measure import and startup times over several fresh processes.
+
+    :param options: Parsed command line options
+    :returns: Report
+    """
+    stub_port = free_port()
+    stub_url = f'http://127.0.0.1:{stub_port}'
+    env = api_env(stub_url, options.mongodb_url, options.db_name)
+
+    # start stubs (no latency: only the API startup is measured)
+    stubs = spawn(['-m', 'loadtest', 'stubs', '--port', str(stub_port),
+                   '--latency', STUB_LATENCY, '--errors', STUB_ERRORS], {})
+
+    try:
+        await wait_ready(f'{stub_url}/docs')
+
+        # warm-up run (bytecode compilation, OS file cache), not measured
+        measure_import(env)
+
+        # measure fresh processes
+        timings: Dict[str, List[Optional[float]]] = {metric: [] for metric in METRICS}
+        for _ in range(options.runs):
+            timings['import_ms'].append(measure_import(env))
+            for metric, value in (await measure_boot(env, options.timeout)).items():
+                timings[metric].append(value)
+
+    finally:
+        stubs.terminate()
+        stubs.wait(timeout=10)
+
+    # build report
+    return {
+        'kind': 'startup',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'config': {'runs': options.runs, 'python': sys.version.split()[0]},
+        **{metric: summarize(values) for metric, values in timings.items()},
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """
+    Print a startup report as a table.
+
+    :param report: Report
+    """
+    print(f'\n{"metric":<12} {"median":>9} {"min":>9} {"max":>9} {"timeouts":>9}')
+    for metric in METRICS:
+        stats = report[metric]
+        print(f'{metric:<12} {stats["median"] or "-":>9} {stats["min"] or "-":>9} '
+              f'{stats["max"] or "-":>9} {stats["timeouts"]:>9}')
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float) -> bool:
+    """
+    Print the median deltas between two startup reports.
+
+    :param baseline: Reference report
+    :param current: Report being evaluated
+    :param max_regression: Maximum tolerated median increase (fraction, e.g. 0.2)
+    :returns: True if no metric regressed beyond the tolerance
+    """
+    ok = True
+    print(f'\n{"metric":<12} {"baseline":>10} {"current":>10} {"delta":>8}')
+    for metric in METRICS:
+        old, new = baseline[metric]['median'], current[metric]['median']
+        if old is None or new is None:
+            continue
+        delta = (new - old) / old if old else 0.0
+        regressed = delta > max_regression
+        ok = ok and not regressed
+        print(f'{metric:<12} {old:>10} {new:>10} {delta:>+8.1%}{"  <-- regression" if regressed else ""}')
+    return ok
@@ -0,0 +1,236 @@
+"""
+Local stand-ins for Supabase Auth, OpenAI and Mercado Livre.
+
+A single FastAPI app serves the three upstreams under different prefixes:
+
+- /supabase/auth/v1/...         -> SUPABASE_URL=http://host:port/supabase
+- /openai/v1/chat/completions   -> OPENAI_BASE_URL=http://host:port/openai/v1
+- /mercadolivre/{query}         -> MERCADOLIVRE_URL=http://host:port/mercadolivre/
+
+Every upstream has its own configurable latency (mean and jitter) and error rate.
+"""
+
+# --- IMPORTS ---
+from datetime import datetime
+from datetime import timezone
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi.responses import HTMLResponse
+from fastapi.responses import JSONResponse
+from functools import lru_cache
+from html import escape
+from jose import jwt
+from uuid import NAMESPACE_URL
+from uuid import uuid5
+
+import asyncio
+import json
+import random
+import re
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+
+# --- CONSTANTS ---
+JWT_SECRET = 'loadtest-jwt-secret'
+JWT_AUDIENCE = 'authenticated'
+TOKEN_TTL = 3600
+ITEMS_PER_PAGE = 48
+QUERY_PATTERN = re.compile(r"'(.*)'", re.DOTALL)
+
+
+# --- CODE ---
+def supabase_id(email: str) -> str:
+    """
+    Deterministic Supabase user ID for an e-mail.
+
+    :param email: User e-mail
+    :returns: User ID
+    """
+    return str(uuid5(NAMESPACE_URL, f'loadtest:{email}'))
+
+
+def issue_token(email: str) -> str:
+    """
+    Issue a Supabase-like access token.
+
+    :param email: User e-mail
+    :returns: Signed JWT
+    """
+    now = int(time.time())
+    claims = {
+        'sub': supabase_id(email),
+        'email': email,
+        'aud': JWT_AUDIENCE,
+        'role': 'authenticated',
+        'iat': now,
+        'exp': now + TOKEN_TTL,
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm='HS256')
+
+
+def user_payload(email: str) -> Dict[str, Any]:
+    """
+    Supabase user object.
+
+    :param email: User e-mail
+    :returns: User as returned by the Auth API
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        'id': supabase_id(email),
+        'aud': JWT_AUDIENCE,
+        'role': 'authenticated',
+        'email': email,
+        'app_metadata': {'provider': 'email'},
+        'user_metadata': {},
+        'created_at': now,
+        'updated_at': now,
+        'email_confirmed_at': now,
+    }
+
+
+@lru_cache(maxsize=1024)
+def results_page(query: str) -> bytes:
+    """
+    Render a Mercado Livre-like results page.
+
+    :param query: Search query
+    :returns: HTML page
+    """
+    rng = random.Random(query)
+    items = []
+    results = []
+    for i in range(ITEMS_PER_PAGE):
+        amount = rng.randint(20, 5000)
+        fraction = f'{amount:,}'.replace(',', '.')
+        cents = rng.choice(['', f'{rng.randint(1, 99):02d}'])
+        cents_html = f'<span class="andes-money-amount__cents">{cents}</span>' if cents else ''
+        items.append(
+            '<li class="ui-search-layout__item"><div class="poly-card">'
+            '<img class="ui-search-result-image__element" '
+            f'data-src="https://http2.mlstatic.com/D_NQ_NP_{i}-MLB-O.webp">'
+            f'<h3 class="ui-search-item__title shops__item-title">{escape(query)} modelo {i}</h3>'
+            f'<a href="https://produto.mercadolivre.com.br/MLB-{i}">ver</a>'
+            f'<span class="andes-money-amount__fraction">{fraction}</span>{cents_html}'
+            '</div></li>'
+        )
+
+        # same item in the embedded listing state
+        results.append({'id': f'MLB{i}', 'polycard': {
+            'metadata': {'id': f'MLB{i}', 'url': f'produto.mercadolivre.com.br/MLB-{i}'},
+            'pictures': {'pictures': [{'id': f'{i}-MLB'}]},
+            'components': [
+                {'type': 'title', 'title': {'text': f'{query} modelo {i}'}},
+                {'type': 'price', 'price': {'current_price': {'value': float(f'{amount}.{cents or 0}')}}},
+            ],
+        }})
+
+    state = json.dumps({'pageState': {'initialState': {'results': results}}}).replace('</', '<\\/')
+    return (f'<html><body><ol class="ui-search-layout">{"".join(items)}</ol>'
+            f'<script id="__PRELOADED_STATE__" type="application/json">{state}</script></body></html>').encode()
+
+
+def create_app(latency: Dict[str, Tuple[float, float]], errors: Dict[str, float]) -> FastAPI:
+    """
+    Create the stub server app.
+
+    :param latency: Mean and jitter (ms) per upstream (supabase, openai, mercadolivre)
+    :param errors: Error rate (0.0 - 1.0) per upstream
+    :returns: FastAPI app
+    """
+    app = FastAPI(title='Opty load-test stubs')
+
+    async def simulate(upstream: str) -> bool:
+        """
+        Sleep for the configured latency and decide whether to fail.
+
+        :param upstream: Upstream name
+        :returns: True if the call should fail
+        """
+        mean, jitter = latency.get(upstream, (0.0, 0.0))
+        delay = max(0.0, random.gauss(mean, jitter)) if jitter else mean
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        return random.random() < errors.get(upstream, 0.0)
+
+    # --- Supabase Auth ---
+    @app.post('/supabase/auth/v1/token')
+    async def supabase_token(request: Request) -> JSONResponse:
+        if await simulate('supabase'):
+            return JSONResponse({'code': 500, 'msg': 'stub failure'}, status_code=500)
+        payload = await request.json()
+        email = payload.get('email', 'anonymous@loadtest.local')
+        return JSONResponse({
+            'access_token': issue_token(email),
+            'token_type': 'bearer',
+            'expires_in': TOKEN_TTL,
+            'expires_at': int(time.time()) + TOKEN_TTL,
+            'refresh_token': 'loadtest-refresh-token',
+            'user': user_payload(email),
+        })
+
+    @app.post('/supabase/auth/v1/signup')
+    async def supabase_signup(request: Request) -> JSONResponse:
+        if await simulate('supabase'):
+            return JSONResponse({'code': 500, 'msg': 'stub failure'}, status_code=500)
+        payload = await request.json()
+        return JSONResponse(user_payload(payload['email']))
+
+    @app.get('/supabase/auth/v1/user')
+    async def supabase_user(request: Request) -> JSONResponse:
+        if await simulate('supabase'):
+            return JSONResponse({'code': 500, 'msg': 'stub failure'}, status_code=500)
+        token = request.headers.get('authorization', '').removeprefix('Bearer ')
+        try:
+            claims = jwt.decode(token, JWT_SECRET, algorithms=['HS256'], audience=JWT_AUDIENCE)
+        except Exception:  # pylint: disable=W0718
+            return JSONResponse({'code': 401, 'msg': 'invalid JWT'}, status_code=401)
+        return JSONResponse(user_payload(claims['email']))
+
+    @app.get('/supabase/auth/v1/health')
+    async def supabase_health() -> JSONResponse:
+        return JSONResponse({'version': 'stub', 'name': 'GoTrue', 'description': 'load-test stub'})
+
+    @app.get('/supabase/auth/v1/.well-known/jwks.json')
+    async def supabase_jwks() -> JSONResponse:
+        return JSONResponse({'keys': []})
+
+    # --- OpenAI ---
+    @app.post('/openai/v1/chat/completions')
+    async def openai_chat(request: Request) -> JSONResponse:
+        if await simulate('openai'):
+            return JSONResponse({'error': {'message': 'stub failure', 'type': 'server_error'}}, status_code=500)
+        payload = await request.json()
+        match = QUERY_PATTERN.search(payload['messages'][-1]['content'])
+        content = (match.group(1) if match else 'produto').strip().title()
+        return JSONResponse({
+            'id': 'chatcmpl-loadtest',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        })
+
+    @app.get('/openai/v1/models')
+    async def openai_models() -> JSONResponse:
+        return JSONResponse({'object': 'list', 'data': [{'id': 'stub', 'object': 'model', 'owned_by': 'stub'}]})
+
+    # --- Mercado Livre ---
+    @app.get('/mercadolivre/{query:path}')
+    async def mercadolivre_results(query: str) -> HTMLResponse:
+        if await simulate('mercadolivre'):
+            return HTMLResponse('unavailable', status_code=503)
+        return HTMLResponse(results_page(query.split('_Desde_')[0].replace('+', ' ')))
+
+    return app
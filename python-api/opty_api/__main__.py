@@ -0,0 +1,69 @@
+"""
+Service command line.
+
+Usage:
+  python -m opty_api serve [--host 0.0.0.0] [--port 8000] [--workers N] [--graceful-timeout 30]
+
+Defaults are read from BIND, PORT and WEB_CONCURRENCY (one worker per CPU core if unset).
+Send SIGHUP to the supervisor to replace the workers without dropping connections.
+"""
+
+# --- IMPORTS ---
+from opty_api.server import Supervisor
+
+import argparse
+import os
+import sys
+
+
+# --- CODE ---
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line parser.
+    """
+    parser = argparse.ArgumentParser(prog='python -m opty_api', description='Opty-Api service')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    # serve command
+    serve = commands.add_parser('serve', help='serve the API with pre-forked workers')
+    serve.add_argument('--app', default='opty_api.main:app', help='app import string')
+    serve.add_argument('--host', default=os.getenv('BIND', '0.0.0.0'), help='bind address')
+    serve.add_argument('--port', type=int, default=int(os.getenv('PORT', '8000')), help='bind port')
+    serve.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', '0')),
+                       help='number of workers (one per CPU core if omitted)')
+    serve.add_argument('--backlog', type=int, default=2048, help='listen backlog')
+    serve.add_argument('--graceful-timeout', type=float, default=30.0,
+                       help='time workers get to finish in-flight requests, in seconds')
+    serve.add_argument('--loop', default='auto', help='event loop: auto (uvloop if installed), uvloop, asyncio')
+    serve.add_argument('--http', default='auto', help='HTTP parser: auto (httptools if installed), httptools, h11')
+    serve.add_argument('--log-level', default='info', help='uvicorn log level')
+    serve.add_argument('--no-access-log', dest='access_log', action='store_false', help='disable access log')
+
+    return parser
+
+
+def main() -> int:
+    """
+    Command line entry point.
+
+    :returns: Exit code
+    """
+    options = build_parser().parse_args()
+
+    # serve the API
+    supervisor = Supervisor(app=options.app,
+                            host=options.host,
+                            port=options.port,
+                            workers=options.workers or None,
+                            backlog=options.backlog,
+                            graceful_timeout=options.graceful_timeout,
+                            loop=options.loop,
+                            http=options.http,
+                            log_level=options.log_level,
+                            access_log=options.access_log)
+    supervisor.run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
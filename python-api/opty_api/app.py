@@ -5,10 +5,14 @@ Global service objects.
 # --- IMPORTS ---
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from opty_api.middlewares.request_context import RequestContextMiddleware
+from opty_api.middlewares.tracing import TracingMiddleware
 from opty_api.models import Config
 from opty_api.models import Health
 from opty_api.models import Info
 from opty_api.schemas.container import Container
+from opty_api.utils.logger import logger
+from opty_api.utils.tracing import tracer
 
 
 # --- CODE ---
@@ -28,9 +32,29 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
+# Request tracing (runs inside the request context)
+app.add_middleware(TracingMiddleware)
+
+# Request ID propagation
+app.add_middleware(RequestContextMiddleware)
+
 # Configuration
 config = Config()
 
+# Logging
+logger.configure(
+    level = config.LOG_LEVEL,
+    queue_size = config.LOG_QUEUE_SIZE,
+    debug_sample_rate = config.LOG_DEBUG_SAMPLE_RATE,
+)
+
+# Tracing
+tracer.configure(
+    sample_rate = config.TRACE_SAMPLE_RATE,
+    buffer_size = config.TRACE_BUFFER_SIZE,
+    file_path = config.TRACE_FILE,
+)
+
 # Info
 info = Info(
     name = app.title,
@@ -6,9 +6,26 @@ Already exists Error.
 from opty_api.err.opty_api_error import OptyApiError
 
 
+# --- TYPES ---
+from typing import Any
+from typing import Optional
+
+
 # --- CODE ---
 class AlreadyExistsError(OptyApiError):
     """
     Already exists Error.
     """
     message = 'Already Exists Error'
+
+    def __init__(self, *args: Any, key: Optional[str] = None) -> None:
+        """
+        Initialize an Already exists error.
+
+        :param *args: Optional additional context or details for the error.
+        :param key: Name of the duplicated unique key, if known.
+
+        :returns: None.
+        """
+        super().__init__(*args)
+        self.key = key
@@ -0,0 +1,14 @@
+"""
+Client disconnected Error.
+"""
+
+# --- IMPORTS ---
+from opty_api.err.opty_api_error import OptyApiError
+
+
+# --- CODE ---
+class ClientDisconnectedError(OptyApiError):
+    """
+    Client disconnected Error.
+    """
+    message = 'Client Disconnected Error'
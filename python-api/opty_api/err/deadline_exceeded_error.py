@@ -0,0 +1,14 @@
+"""
+Deadline exceeded Error.
+"""
+
+# --- IMPORTS ---
+from opty_api.err.opty_api_error import OptyApiError
+
+
+# --- CODE ---
+class DeadlineExceededError(OptyApiError):
+    """
+    Deadline exceeded Error.
+    """
+    message = 'Deadline Exceeded Error'
@@ -0,0 +1,14 @@
+"""
+Invalid Cursor Error.
+"""
+
+# --- IMPORTS ---
+from opty_api.err.opty_api_error import OptyApiError
+
+
+# --- CODE ---
+class InvalidCursorError(OptyApiError):
+    """
+    Invalid Cursor Error.
+    """
+    message = 'Invalid Cursor Error'
@@ -0,0 +1,14 @@
+"""
+Invalid token Error.
+"""
+
+# --- IMPORTS ---
+from opty_api.err.opty_api_error import OptyApiError
+
+
+# --- CODE ---
+class InvalidTokenError(OptyApiError):
+    """
+    Invalid token Error.
+    """
+    message = 'Invalid Token Error'
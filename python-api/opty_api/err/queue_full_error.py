@@ -0,0 +1,14 @@
+"""
+Queue full Error.
+"""
+
+# --- IMPORTS ---
+from opty_api.err.opty_api_error import OptyApiError
+
+
+# --- CODE ---
+class QueueFullError(OptyApiError):
+    """
+    Queue full Error.
+    """
+    message = 'Queue Full Error'
@@ -0,0 +1,14 @@
+"""
+Queue timeout Error.
+"""
+
+# --- IMPORTS ---
+from opty_api.err.opty_api_error import OptyApiError
+
+
+# --- CODE ---
+class QueueTimeoutError(OptyApiError):
+    """
+    Queue timeout Error.
+    """
+    message = 'Queue Timeout Error'
@@ -7,10 +7,40 @@ from fastapi import FastAPI
 from opty_api import routers
 from opty_api.app import container
 from opty_api.app import health
+from opty_api.mongo.repositories.jobs import JobRepository
 from opty_api.mongo.repositories.users import UserRepository
 from opty_api.mongo.setup.connection import MongoDBSetup
-from openai import AsyncOpenAI
-from supabase import acreate_client
+from opty_api.mongo.setup.indexes import IndexManager
+from opty_api.mongo.setup.pool_monitor import PoolMonitor
+from opty_api.utils.cache import TaskCache
+from opty_api.utils.cache import TTLCache
+from opty_api.services import probes
+from opty_api.services.search import run_search_job
+from opty_api.utils.archive import HtmlArchive
+from opty_api.utils.deferred import Deferred
+from opty_api.utils.hedging import Hedger
+from opty_api.utils.jobs import JobQueue
+from opty_api.utils.logger import logger
+from opty_api.utils.prefetch import Prefetcher
+from opty_api.utils.readiness import ReadinessMonitor
+from opty_api.utils.scheduler import FairScheduler
+from opty_api.utils.speculation import Speculator
+from opty_api.utils.tokens import TokenVerifier
+
+import asyncio
+import importlib
+
+
+# --- TYPES ---
+from typing import Optional
+from typing import Tuple
+from typing import TYPE_CHECKING
+
+
+# heavy client libraries are imported lazily, off the event loop
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from supabase import AsyncClient
 
 
 # --- CODE ---
@@ -18,37 +48,222 @@ async def on_startup(app: FastAPI) -> None:
     """
     Initialize the service on startup.
     """
+
+    # Start log writer
+    logger.start()
     # Mount routers
     routers.mount(app)
 
-    # Initialize MongoDB
-    mongodb = MongoDBSetup(db_name=container['config'].MONGODB_DB_NAME,
-                           mongodb_url=container['config'].MONGODB_URL,)
+    # Initialize Supabase, MongoDB and the HTML archive concurrently
+    supabase_client, (mongodb, pool_monitor), html_archive = await asyncio.gather(init_supabase(),
+                                                                                  init_mongodb(),
+                                                                                  init_html_archive())
+
+    # Initialize repositories (user profile cache is disabled with USER_CACHE_TTL=0)
+    user_cache = None
+    if container['config'].USER_CACHE_TTL > 0:
+        user_cache = TTLCache(maxsize=container['config'].USER_CACHE_SIZE, ttl=container['config'].USER_CACHE_TTL)
+    user_repository = UserRepository(mongodb, cache=user_cache)
+    job_repository = JobRepository(mongodb)
+
+    # Initialize index manager
+    index_manager = IndexManager(mongodb, mode=container['config'].MONGODB_INDEX_MODE)
+
+    # Initialize local access token verifier
+    supabase_auth_url = f'{container["config"].SUPABASE_URL.rstrip("/")}/auth/v1'
+    token_verifier = TokenVerifier(jwks_url=f'{supabase_auth_url}/.well-known/jwks.json',
+                                   audience=container['config'].SUPABASE_JWT_AUDIENCE,
+                                   secret=container['config'].SUPABASE_JWT_SECRET or None,
+                                   jwks_ttl=container['config'].SUPABASE_JWKS_TTL)
+
+    # Initialize OpenAI client (only search needs it: it warms up while the service already serves)
+    openai_client = Deferred('openai', create_openai_client)
+
+    # Initialize outbound scrape scheduler (fair share of Mercado Livre requests between users)
+    scrape_scheduler = FairScheduler(concurrency=container['config'].SCRAPE_CONCURRENCY,
+                                     max_queue_time=container['config'].SCRAPE_MAX_QUEUE_TIME)
+
+    # Initialize hedging of slow Mercado Livre requests
+    scrape_hedger = Hedger(budget=container['config'].SCRAPE_HEDGE_BUDGET,
+                           percentile=container['config'].SCRAPE_HEDGE_PERCENTILE,
+                           min_delay_ms=container['config'].SCRAPE_HEDGE_MIN_DELAY_MS)
+
+    # Initialize normalized query cache
+    search_queries = TaskCache(maxsize=container['config'].SEARCH_CACHE_SIZE,
+                               ttl=container['config'].SEARCH_CACHE_TTL)
 
-    # Initialize repositories
-    user_repository = UserRepository(mongodb)
+    # Initialize search results cache (shared by identical searches in flight) and raw query speculation
+    search_results = TaskCache(maxsize=container['config'].SEARCH_CACHE_SIZE,
+                               ttl=container['config'].SEARCH_CACHE_TTL)
+    # Initialize cache of values derived from result sets (price stats, ranking index)
+    search_derived = TTLCache(maxsize=container['config'].SEARCH_CACHE_SIZE,
+                              ttl=container['config'].SEARCH_CACHE_TTL)
 
-    # Initialize supabase client
-    supabase_client = await acreate_client(supabase_url=container['config'].SUPABASE_URL,
-                                           supabase_key=container['config'].SUPABASE_KEY)
+    search_speculator = Speculator(search_results, keep_misses=container['config'].SEARCH_SPECULATION_KEEP_MISSES)
 
-    # Initialize OpenAI client
-    openai_client = AsyncOpenAI(api_key=container['config'].OPENAI_API_KEY)
+    # Initialize next page prefetching (only while scrape slots are free)
+    search_prefetcher = Prefetcher(search_results,
+                                   spare=scrape_scheduler.spare,
+                                   min_spare=container['config'].SEARCH_PREFETCH_MIN_SPARE)
+
+    # Initialize search job queue (bounded pool of search workers, job state shared through MongoDB)
+    search_jobs = JobQueue(run_search_job,
+                           job_repository,
+                           workers=container['config'].SEARCH_WORKERS,
+                           max_queued=container['config'].SEARCH_QUEUE_SIZE,
+                           ttl=container['config'].SEARCH_JOB_TTL,
+                           lease=container['config'].SEARCH_JOB_LEASE,
+                           poll_interval=container['config'].SEARCH_JOB_POLL_INTERVAL)
+
+    # Initialize dependency probes (OpenAI and Mercado Livre only degrade search)
+    readiness = ReadinessMonitor(interval=container['config'].READINESS_INTERVAL,
+                                 timeout=container['config'].READINESS_TIMEOUT,
+                                 latency_warning_ms=container['config'].READINESS_LATENCY_WARNING_MS,
+                                 failure_threshold=container['config'].READINESS_FAILURE_THRESHOLD)
+    readiness.register('mongodb', probes.ping_mongodb)
+    readiness.register('supabase', probes.check_supabase)
+    readiness.register('openai', probes.check_openai, critical=False)
+    readiness.register('mercadolivre', probes.check_mercadolivre, critical=False)
 
     # Update container
     container.update({
         'mongodb': mongodb,
+        'mongodb_pool_monitor': pool_monitor,
+        'index_manager': index_manager,
         'user_repository': user_repository,
+        'job_repository': job_repository,
         'supabase_client': supabase_client,
+        'token_verifier': token_verifier,
         'openai_client': openai_client,
+        'readiness': readiness,
+        'search_jobs': search_jobs,
+        'search_queries': search_queries,
+        'search_results': search_results,
+        'search_derived': search_derived,
+        'search_speculator': search_speculator,
+        'search_prefetcher': search_prefetcher,
+        'scrape_scheduler': scrape_scheduler,
+        'scrape_hedger': scrape_hedger,
+        'html_archive': html_archive,
     })
 
     # Set app health as OK
     health.status = 'OK'
 
+    # Warm up optional clients in the background
+    openai_client.start()
+
+    # Start search workers
+    search_jobs.start()
+
+    # Probe dependencies in the background
+    readiness.start()
+
+    # Reconcile declared indexes in the background (does not block serving)
+    index_manager.start([user_repository, job_repository])
+    index_manager.task.add_done_callback(report_indexes)
+
+
+async def init_supabase() -> 'AsyncClient':
+    """
+    Create the Supabase client, importing the library off the event loop.
+
+    :returns: Supabase client
+    """
+    supabase = await asyncio.to_thread(importlib.import_module, 'supabase')
+    return await supabase.acreate_client(supabase_url=container['config'].SUPABASE_URL,
+                                         supabase_key=container['config'].SUPABASE_KEY)
+
+
+async def init_mongodb() -> Tuple[MongoDBSetup, PoolMonitor]:
+    """
+    Create the MongoDB connection manager (the client connects lazily).
+
+    :returns: MongoDB connection manager and its pool monitor
+    """
+    pool_monitor = PoolMonitor()
+    mongodb = MongoDBSetup(db_name=container['config'].MONGODB_DB_NAME,
+                           mongodb_url=container['config'].MONGODB_URL,
+                           maxPoolSize=container['config'].MONGODB_MAX_POOL_SIZE,
+                           minPoolSize=container['config'].MONGODB_MIN_POOL_SIZE,
+                           maxIdleTimeMS=container['config'].MONGODB_MAX_IDLE_TIME_MS,
+                           waitQueueTimeoutMS=container['config'].MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+                           serverSelectionTimeoutMS=container['config'].MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                           compressors=container['config'].MONGODB_COMPRESSORS or None,
+                           event_listeners=[pool_monitor])
+    return mongodb, pool_monitor
+
+
+async def init_html_archive() -> Optional[HtmlArchive]:
+    """
+    Open the raw HTML archive, if enabled.
+
+    :returns: HTML archive, or None if disabled (or zstandard is missing)
+    """
+
+    # archive disabled
+    if not container['config'].HTML_ARCHIVE_DIR:
+        return None
+
+    # optional dependency missing: serve without archive
+    try:
+        html_archive = HtmlArchive(root=container['config'].HTML_ARCHIVE_DIR,
+                                   max_bytes=container['config'].HTML_ARCHIVE_MAX_MB * 2**20,
+                                   level=container['config'].HTML_ARCHIVE_LEVEL)
+    except ImportError:
+        logger.warning('HTML archive disabled: zstandard is not installed (pip install zstandard)')
+        return None
+
+    await html_archive.open()
+    return html_archive
+
+
+def create_openai_client() -> 'AsyncOpenAI':
+    """
+    Create the OpenAI client (runs in a worker thread: importing openai is slow).
+
+    :returns: OpenAI client
+    """
+    from openai import AsyncOpenAI  # pylint: disable=C0415,W0621
+    return AsyncOpenAI(api_key=container['config'].OPENAI_API_KEY,
+                       base_url=container['config'].OPENAI_BASE_URL or None)
+
+
+def report_indexes(task: asyncio.Task) -> None:
+    """
+    Report index reconciliation results to health.
+
+    :param task: Finished reconciliation task
+    """
+
+    # Reconciliation cancelled: nothing to report
+    if task.cancelled():
+        return
 
-def on_shutdown(app: FastAPI) -> None:  #pylint: disable=W0613
+    # Add index report to health
+    health.checks['indexes'] = container['index_manager'].report
+
+    # Indexes differ from their declaration: degrade health
+    if container['index_manager'].drift and health.status == 'OK':
+        health.status = 'WARNING'
+
+
+async def on_shutdown(app: FastAPI) -> None:  #pylint: disable=W0613
     """
     Run on service shutdown.
     """
-    pass
+
+    # Stop dependency probes
+    if 'readiness' in container:
+        container['readiness'].stop()
+
+    # Stop search workers
+    if 'search_jobs' in container:
+        await container['search_jobs'].stop()
+
+    # Stop index reconciliation
+    if 'index_manager' in container:
+        container['index_manager'].stop()
+
+    # Flush pending log records
+    logger.stop()
@@ -26,7 +26,7 @@ async def lifespan(application: FastAPI):
 
     # Shutdown tasks
     finally:
-        on_shutdown(application)
+        await on_shutdown(application)
 
 # Attach lifespan to the app
 app.router.lifespan_context = lifespan
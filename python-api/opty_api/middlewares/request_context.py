@@ -0,0 +1,73 @@
+"""
+Request context middleware.
+"""
+
+# --- IMPORTS ---
+from opty_api.utils.logger import request_id_var
+from uuid import uuid4
+
+
+# --- TYPES ---
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+
+# --- CONSTANTS ---
+HEADER = b'x-request-id'
+MAX_LENGTH = 128
+
+
+# --- CODE ---
+class RequestContextMiddleware:
+    """
+    Assign a request ID to every HTTP request.
+
+    The ID is taken from the incoming X-Request-ID header (or generated), stored in a
+    context var so every log record of the request carries it, and echoed back in the
+    response headers.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initialize middleware.
+
+        :param app: Wrapped ASGI application
+        """
+        self.app = app
+
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handle an ASGI call.
+        """
+
+        # not an HTTP request: pass through
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        # get request ID from headers or generate a new one
+        request_id = None
+        for name, value in scope['headers']:
+            if name == HEADER:
+                request_id = value.decode('latin-1')[:MAX_LENGTH]
+                break
+        request_id = request_id or uuid4().hex
+
+        # echo request ID in the response
+        async def send_with_request_id(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((HEADER, request_id.encode('latin-1')))
+                message['headers'] = headers
+            await send(message)
+
+        # run request within its context
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,63 @@
+"""
+Request tracing middleware.
+"""
+
+# --- IMPORTS ---
+from opty_api.utils.logger import request_id_var
+from opty_api.utils.tracing import tracer
+
+
+# --- TYPES ---
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+
+# --- CONSTANTS ---
+FORCE_HEADER = b'x-trace'
+FORCE_VALUES = (b'1', b'true')
+
+
+# --- CODE ---
+class TracingMiddleware:
+    """
+    Open the root span of every HTTP request.
+
+    Sending `X-Trace: 1` records the request regardless of the sampling rate.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initialize middleware.
+
+        :param app: Wrapped ASGI application
+        """
+        self.app = app
+
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handle an ASGI call.
+        """
+
+        # not an HTTP request: pass through
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        # check whether the client asked for the request to be traced
+        force_sample = any(name == FORCE_HEADER and value.lower() in FORCE_VALUES for name, value in scope['headers'])
+
+        # run request within its root span
+        name = f'{scope["method"]} {scope["path"]}'
+        with tracer.span(name, force_sample=force_sample, request_id=request_id_var.get()) as span:
+
+            # record response status
+            async def send_with_status(message: Message) -> None:
+                if message['type'] == 'http.response.start':
+                    span.set_attribute('status_code', message['status'])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
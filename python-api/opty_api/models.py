@@ -11,6 +11,7 @@ from pydantic_settings import BaseSettings
 from typing import Any
 from typing import Dict
 from typing import Literal
+from typing import Optional
 
 
 # --- CODE ---
@@ -22,13 +23,86 @@ class Config(BaseSettings):
     # Supabase settings
     SUPABASE_URL: str
     SUPABASE_KEY: str
+    SUPABASE_JWT_SECRET: Optional[str] = None
+    SUPABASE_JWT_AUDIENCE: str = 'authenticated'
+    SUPABASE_JWKS_TTL: int = 600
+
+    # Auth settings
+    AUTH_REVOCATION_CHECK: Literal['off', 'async', 'sync'] = 'off'
+    AUTH_REVOCATION_TTL: int = 60
 
     # MongoDB settings
     MONGODB_URL: str
     MONGODB_DB_NAME: str
+    MONGODB_INDEX_MODE: Literal['off', 'create', 'sync'] = 'create'
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGODB_COMPRESSORS: str = ''
+
+    # User profile cache settings
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 5
 
     # OpenAI settings
     OPENAI_API_KEY: str
+    OPENAI_BASE_URL: Optional[str] = None
+
+    # Mercado Livre settings
+    MERCADOLIVRE_URL: str = 'https://lista.mercadolivre.com.br/'
+
+    # Outbound scrape scheduling settings (per worker process)
+    SCRAPE_CONCURRENCY: int = 8
+    SCRAPE_TIMEOUT: float = 20.0
+    SCRAPE_MAX_QUEUE_TIME: float = 10.0
+    SCRAPE_USER_WEIGHT: float = 1.0
+    SCRAPE_SUPERVISOR_WEIGHT: float = 4.0
+    SCRAPE_ANONYMOUS_WEIGHT: float = 1.0
+    SCRAPE_HEDGE_BUDGET: float = 0.05
+    SCRAPE_HEDGE_PERCENTILE: float = 0.95
+    SCRAPE_HEDGE_MIN_DELAY_MS: float = 200.0
+
+    # Raw HTML archive settings (disabled if no directory, needs zstandard)
+    HTML_ARCHIVE_DIR: str = ''
+    HTML_ARCHIVE_MAX_MB: int = 512
+    HTML_ARCHIVE_LEVEL: int = 10
+
+    # Search job settings
+    SEARCH_WORKERS: int = 4
+    SEARCH_QUEUE_SIZE: int = 1000
+    SEARCH_JOB_TTL: int = 300
+    SEARCH_JOB_LEASE: int = 600
+    SEARCH_JOB_POLL_INTERVAL: float = 0.5
+    SEARCH_DEADLINE: float = 25.0
+    SEARCH_JOB_DEADLINE: float = 60.0
+    SEARCH_NORMALIZE_TIMEOUT: float = 5.0
+    SEARCH_CACHE_SIZE: int = 1000
+    SEARCH_CACHE_TTL: int = 300
+    SEARCH_SPECULATION: bool = True
+    SEARCH_SPECULATION_KEEP_MISSES: bool = False
+    SEARCH_PREFETCH: bool = True
+    SEARCH_PREFETCH_MAX_PAGE: int = 3
+    SEARCH_PREFETCH_MIN_RESULTS: int = 24
+    SEARCH_PREFETCH_MIN_SPARE: int = 2
+    SEARCH_PREFETCH_WEIGHT: float = 0.25
+
+    # Readiness probe settings
+    READINESS_INTERVAL: float = 10.0
+    READINESS_TIMEOUT: float = 2.0
+    READINESS_LATENCY_WARNING_MS: float = 500.0
+    READINESS_FAILURE_THRESHOLD: int = 3
+
+    # Logging settings
+    LOG_LEVEL: Literal['DEBUG', 'INFO', 'WARNING', 'ERROR'] = 'INFO'
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0
+
+    # Tracing settings
+    TRACE_SAMPLE_RATE: float = 0.1
+    TRACE_BUFFER_SIZE: int = 200
+    TRACE_FILE: Optional[str] = None
 
     class Config:
         """
@@ -43,6 +117,7 @@ class Health(BaseModel):
     System health status.
     """
     status: Literal['OK', 'WARNING', 'FAILURE', 'UNKNOWN'] = 'UNKNOWN'
+    checks: Dict[str, Any] = {}
 
 
 # Info model
@@ -0,0 +1,219 @@
+"""
+Job repository for MongoDB operations.
+"""
+
+# --- IMPORTS ---
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from opty_api.err.mongodb_unavailable_error import MongoUnavailableError
+from opty_api.utils.tracing import traced
+from pymongo import ASCENDING
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+
+# --- CODE ---
+def expiration(ttl: float) -> datetime:
+    """
+    Get the expiration time of a document kept for `ttl` seconds from now.
+
+    :param ttl: Time to keep the document, in seconds
+
+    :returns: Expiration time (UTC)
+    """
+    return datetime.now(timezone.utc) + timedelta(seconds=ttl)
+
+
+class JobRepository:
+    """
+    Repository for background job state, shared by every worker process.
+
+    A job document holds its status, timestamps, result and error, plus the
+    deduplication key while the job can still be shared. Documents are removed by
+    the TTL index on `expires_at`.
+    """
+
+    COLLECTION = 'jobs'
+
+    # One shareable job per key (released keys are unset); expired jobs are deleted
+    INDEXES = [
+        IndexModel([('key', ASCENDING)], name='key_1', unique=True, partialFilterExpression={'key': {'$exists': True}}),
+        IndexModel([('expires_at', ASCENDING)], name='expires_at_1', expireAfterSeconds=0),
+    ]
+
+    def __init__(self, client) -> None:
+        """
+        Initialize JobRepository with MongoDB client.
+
+        :param client: MongoDB client instance
+        """
+        self.client = client
+
+
+    @property
+    def __collection(self):
+        """
+        Get jobs collection from MongoDB.
+        """
+        return self.client.get_collection(self.COLLECTION)
+
+
+    @traced('mongo.jobs.add_job')
+    async def add_job(self, job: Dict[str, Any], ttl: float) -> bool:
+        """
+        Add a new job, unless another job holds its key.
+
+        :param job: Job document (with _id and key)
+        :param ttl: Time the job is kept for, in seconds
+
+        :returns: True if added, False if another job holds the key
+
+        :raises MongoUnavailableError: If insert fails
+        """
+        try:
+
+            # insert job with its expiration
+            await self.__collection.insert_one({**job, 'expires_at': expiration(ttl)})
+            return True
+
+        # key held by another job
+        except DuplicateKeyError:
+            return False
+
+        # error in create job: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to create job: {str(e)}') from e
+
+
+    @traced('mongo.jobs.get_by_key')
+    async def get_by_key(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the shareable job of a key: queued, running or done, and not expired.
+
+        :param key: Deduplication key
+
+        :returns: Job if found, None otherwise
+
+        :raises MongoUnavailableError: If query fails
+        """
+        try:
+            return await self.__collection.find_one({
+                'key': key,
+                'status': {'$ne': 'failed'},
+                'expires_at': {'$gt': datetime.now(timezone.utc)},
+            })
+
+        # error in find job: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to find job by key: {str(e)}') from e
+
+
+    @traced('mongo.jobs.release_key')
+    async def release_key(self, key: str) -> None:
+        """
+        Release a key held by failed or expired jobs, so a new job can take it.
+
+        :param key: Deduplication key
+
+        :raises MongoUnavailableError: If update fails
+        """
+        try:
+            await self.__collection.update_many({
+                'key': key,
+                '$or': [{'status': 'failed'}, {'expires_at': {'$lte': datetime.now(timezone.utc)}}],
+            }, {'$unset': {'key': ''}})
+
+        # error in release key: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to release job key: {str(e)}') from e
+
+
+    @traced('mongo.jobs.get_by_id')
+    async def get_by_id(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Find job by ID.
+
+        :param job_id: Job ID
+
+        :returns: Job if found (and not expired), None otherwise
+
+        :raises MongoUnavailableError: If query fails
+        """
+        try:
+            return await self.__collection.find_one({'_id': job_id, 'expires_at': {'$gt': datetime.now(timezone.utc)}})
+
+        # error in find job: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to find job: {str(e)}') from e
+
+
+    @traced('mongo.jobs.update_job')
+    async def update_job(self, job_id: str, update_data: Dict[str, Any], ttl: float) -> None:
+        """
+        Update job and push its expiration back.
+
+        :param job_id: Job ID
+        :param update_data: Fields to set
+        :param ttl: Time the job is kept for from now, in seconds
+
+        :raises MongoUnavailableError: If update fails
+        """
+        try:
+            await self.__collection.update_one({'_id': job_id},
+                                               {'$set': {**update_data, 'expires_at': expiration(ttl)}})
+
+        # error in update job: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to update job: {str(e)}') from e
+
+
+    @traced('mongo.jobs.fail_jobs')
+    async def fail_jobs(self, job_ids: List[str], error: str, ttl: float) -> None:
+        """
+        Mark unfinished jobs as failed (releasing their key) and push their expiration back.
+
+        :param job_ids: Job IDs
+        :param error: Error kept for the clients
+        :param ttl: Time the jobs are kept for from now, in seconds
+
+        :raises MongoUnavailableError: If update fails
+        """
+        try:
+            await self.__collection.update_many({
+                '_id': {'$in': job_ids},
+                'status': {'$nin': ['done', 'failed']},
+            }, {'$set': {
+                'status': 'failed',
+                'error': error,
+                'finished_at': datetime.now(timezone.utc),
+                'expires_at': expiration(ttl),
+            }})
+
+        # error in fail jobs: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to fail jobs: {str(e)}') from e
+
+
+    @traced('mongo.jobs.delete_job')
+    async def delete_job(self, job_id: str) -> None:
+        """
+        Delete job.
+
+        :param job_id: Job ID
+
+        :raises MongoUnavailableError: If delete fails
+        """
+        try:
+            await self.__collection.delete_one({'_id': job_id})
+
+        # error in delete job: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to delete job: {str(e)}') from e
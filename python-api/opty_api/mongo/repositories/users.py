@@ -3,38 +3,129 @@ User repository for MongoDB operations.
 """
 
 # --- IMPORTS ---
+from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
+from datetime import timedelta
 from datetime import timezone
+from opty_api.err.already_exists_error import AlreadyExistsError
+from opty_api.err.invalid_cursor_error import InvalidCursorError
 from opty_api.err.mongodb_unavailable_error import MongoUnavailableError
 from opty_api.err.not_found_error import NotFoundError
+from opty_api.schemas.user import User
+from opty_api.utils.cache import TTLCache
+from opty_api.utils.tracing import traced
+from pymongo import ASCENDING
+from pymongo import DESCENDING
+from pymongo import IndexModel
+from pymongo import ReturnDocument
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from uuid import uuid4
+
+import base64
+import binascii
 
 
 # --- TYPES ---
-from opty_api.schemas.user import User
 from typing import Any
+from typing import AsyncIterator
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 
 # --- CONSTANTS ---
 PROJECTION = {'_id': 0}
+PENDING_PREFIX = 'pending:'
+PENDING_USER_TTL = 600
+PAGE_SORT = [('created_at', -1), ('_id', -1)]
+STREAM_BATCH_SIZE = 1000
 
 
 # --- CODE ---
+def duplicate_user_error(error: DuplicateKeyError) -> AlreadyExistsError:
+    """
+    Build the error raised when a write violates a unique user index.
+
+    :param error: Duplicate key error raised by MongoDB
+
+    :returns: AlreadyExistsError reporting the duplicated key
+    """
+    details = error.details or {}
+    key = next(iter(details.get('keyPattern') or details.get('keyValue') or {}), None)
+    return AlreadyExistsError(f'User with this {key or "key"} already exists', key=key)
+
+
+def encode_cursor(created_at: datetime, last_id: ObjectId) -> str:
+    """
+    Build an opaque page cursor.
+
+    :param created_at: Creation date of the last user of the page
+    :param last_id: MongoDB ID of the last user of the page
+
+    :returns: URL-safe cursor
+    """
+    raw = f'{created_at.isoformat()}|{last_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Read an opaque page cursor.
+
+    :param cursor: Cursor built by encode_cursor
+
+    :returns: Creation date and MongoDB ID of the last user of the previous page
+
+    :raises InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, last_id = raw.split('|')
+        return datetime.fromisoformat(created_at), ObjectId(last_id)
+
+    # malformed cursor: raise custom error
+    except (binascii.Error, UnicodeDecodeError, ValueError, InvalidId) as e:
+        raise InvalidCursorError(f'Malformed page cursor: {cursor}') from e
+
+
 class UserRepository:
     """
     Repository for user-related MongoDB operations.
     Handles all database interactions for the users collection.
     """
 
-    def __init__(self, client) -> None:
+    COLLECTION = 'users'
+
+    # Unique indexes cover every profile (inactive and pending ones included);
+    # listing indexes only cover active users, which every listing query filters on
+    INDEXES = [
+        IndexModel([('email', ASCENDING)], name='email_1', unique=True),
+        IndexModel([('supabase_id', ASCENDING)], name='supabase_id_1', unique=True),
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)],
+                   name='active_created_at',
+                   partialFilterExpression={'is_active': True}),
+        IndexModel([('role', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                   name='active_role_created_at',
+                   partialFilterExpression={'is_active': True}),
+        IndexModel([('pending_expires_at', ASCENDING)], name='pending_expires_at_1', expireAfterSeconds=0),
+    ]
+
+    def __init__(self, client, cache: Optional[TTLCache[User]] = None) -> None:
         """
         Initialize UserRepository with MongoDB client.
 
         :param client: MongoDB client instance
+        :param cache: Optional cache of active user profiles, by Supabase ID
         """
         self.client = client
+        self.cache = cache
+
+        # cache writes per Supabase ID, tracked while reads of it are in flight
+        self.__readers: Dict[str, int] = {}
+        self.__generations: Dict[str, int] = {}
 
 
     @property
@@ -42,17 +133,22 @@ class UserRepository:
         """
         Get users collection from MongoDB.
         """
-        return self.client.get_collection('users')
+        return self.client.get_collection(self.COLLECTION)
 
 
+    @traced('mongo.users.add_user')
     async def add_user(self, user: User) -> User:
         """
         Add a new user in MongoDB.
 
+        Uniqueness is enforced by the unique indexes on email and supabase_id, so no
+        lookup is made before inserting.
+
         :param user: User model instance
 
         :returns User: The created user
 
+        :raises AlreadyExistsError: If a user with the same email or Supabase ID exists
         :raises MongoUnavailableError: If insert fails
         """
         try:
@@ -64,17 +160,122 @@ class UserRepository:
             user['created_at'] = now
             user['updated_at'] = now
 
-            # insert user into MongoDB
-            await self.__collection.insert_one(user)
+            # insert a copy so the returned user does not carry the MongoDB _id
+            await self.__collection.insert_one(dict(user))
 
             # return the created user
             return user
 
+        # duplicate email or supabase_id: raise custom error
+        except DuplicateKeyError as e:
+            raise duplicate_user_error(e) from e
+
         # error in create user: raise custom error
         except Exception as e:
             raise MongoUnavailableError(f'Failed to create user: {str(e)}') from e
 
 
+    @traced('mongo.users.reserve_user')
+    async def reserve_user(self, user: User, ttl: float = PENDING_USER_TTL) -> str:
+        """
+        Reserve the email of a user that is not registered in Supabase yet.
+
+        The reservation is an inactive profile with a temporary Supabase ID. It is
+        confirmed once the Supabase account exists, released if the sign-up fails, and
+        removed by the TTL index on `pending_expires_at` if neither happens.
+
+        :param user: User model instance (supabase_id is ignored)
+        :param ttl: Time the reservation is kept for, in seconds
+
+        :returns: Temporary Supabase ID of the reservation
+
+        :raises AlreadyExistsError: If a user with the same email exists
+        :raises MongoUnavailableError: If insert fails
+        """
+
+        # build pending profile
+        pending_id = f'{PENDING_PREFIX}{uuid4()}'
+        pending_user = {
+            **user,
+            'supabase_id': pending_id,
+            'is_active': False,
+            'pending_expires_at': datetime.now(timezone.utc) + timedelta(seconds=ttl),
+        }
+
+        # insert pending profile
+        await self.add_user(pending_user)
+
+        # return reservation
+        return pending_id
+
+
+    @traced('mongo.users.confirm_reservation')
+    async def confirm_reservation(self, pending_id: str, supabase_id: str) -> User:
+        """
+        Turn a reservation into an active user profile.
+
+        :param pending_id: Temporary Supabase ID returned by reserve_user
+        :param supabase_id: Supabase user ID
+
+        :returns: Activated User
+
+        :raises NotFoundError: If the reservation expired
+        :raises AlreadyExistsError: If a user with the same Supabase ID exists
+        :raises MongoUnavailableError: If update fails
+        """
+        try:
+
+            # activate pending profile and get it in a single round-trip
+            user = await self.__collection.find_one_and_update(
+                {'supabase_id': pending_id, 'is_active': False},
+                {
+                    '$set': {
+                        'supabase_id': supabase_id,
+                        'is_active': True,
+                        'updated_at': datetime.now(timezone.utc),
+                    },
+                    '$unset': {'pending_expires_at': ''},
+                },
+                projection=PROJECTION,
+                return_document=ReturnDocument.AFTER,
+            )
+
+        # duplicate supabase_id: raise custom error
+        except DuplicateKeyError as e:
+            raise duplicate_user_error(e) from e
+
+        # error in confirm reservation: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to confirm user reservation: {str(e)}') from e
+
+        # reservation not found: raise custom error
+        if not user:
+            raise NotFoundError(f'User reservation {pending_id} not found.')
+
+        # return activated user
+        return user
+
+
+    @traced('mongo.users.release_reservation')
+    async def release_reservation(self, pending_id: str) -> None:
+        """
+        Drop a reservation whose sign-up failed.
+
+        :param pending_id: Temporary Supabase ID returned by reserve_user
+
+        :raises MongoUnavailableError: If delete fails
+        """
+        try:
+
+            # delete pending profile
+            await self.__collection.delete_one({'supabase_id': pending_id, 'is_active': False})
+
+        # error in release reservation: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to release user reservation: {str(e)}') from e
+
+
+    @traced('mongo.users.get_by_email')
     async def get_by_email(self, email: str, projection: Optional[Dict[str, int]] = PROJECTION) -> Optional[User]:  # pylint: disable=W0102
         """
         Find user by email.
@@ -103,6 +304,7 @@ class UserRepository:
             raise MongoUnavailableError(f'Failed to find user by email: {str(e)}') from e
 
 
+    @traced('mongo.users.get_by_supabase_id')
     async def get_by_supabase_id(self,  # pylint: disable=W0102
                                  supabase_id: str,
                                  projection: Optional[Dict[str, int]] = PROJECTION) -> Optional[User]:
@@ -132,6 +334,74 @@ class UserRepository:
             raise MongoUnavailableError(f'Failed to find user by Supabase ID: {str(e)}') from e
 
 
+    async def get_cached_by_supabase_id(self, supabase_id: str) -> Optional[User]:
+        """
+        Find user by Supabase ID, serving repeated lookups from the profile cache.
+
+        :param supabase_id: Supabase user ID
+
+        :returns: User if found, None otherwise
+
+        :raises MongoUnavailableError: If query fails
+        """
+
+        # cache disabled: query MongoDB
+        if self.cache is None:
+            return await self.get_by_supabase_id(supabase_id)
+
+        # cached profile: return a copy
+        user = self.cache.get(supabase_id)
+        if user is not None:
+            return dict(user)
+
+        # query MongoDB for user by supabase_id, noting the cache generation it started at
+        generation = self.__generations.get(supabase_id, 0)
+        self.__readers[supabase_id] = self.__readers.get(supabase_id, 0) + 1
+        try:
+            user = await self.get_by_supabase_id(supabase_id)
+            changed = self.__generations.get(supabase_id, 0) != generation
+        finally:
+            self.__readers[supabase_id] -= 1
+            if not self.__readers[supabase_id]:
+                del self.__readers[supabase_id]
+                self.__generations.pop(supabase_id, None)
+
+        # user not found: return None
+        if not user:
+            return None
+
+        # cache profile (unless updated or deleted during the query: the read may be stale) and return a copy
+        if not changed:
+            self.cache.set(supabase_id, user)
+        return dict(user)
+
+
+    def refresh_cache(self, supabase_id: str, user: Optional[User] = None) -> None:
+        """
+        Write an updated profile through to the cache, or invalidate it.
+
+        :param supabase_id: Supabase user ID
+        :param user: Updated user, None to invalidate the cached profile
+        """
+
+        # cache disabled
+        if self.cache is None:
+            return
+
+        # reads in flight started before this write: keep them from caching their result
+        if supabase_id in self.__readers:
+            self.__generations[supabase_id] = self.__generations.get(supabase_id, 0) + 1
+
+        # updated active user: replace cached profile
+        if user and user.get('is_active', True):
+            self.cache.set(supabase_id, dict(user))
+
+        # missing or deleted user: invalidate cached profile
+        else:
+            self.cache.pop(supabase_id)
+
+
+    @traced('mongo.users.update_by_supabase_id')
     async def update_by_supabase_id(self, supabase_id: str, update_data: Dict[str, Any]) -> User:
         """
         Update user by Supabase ID.
@@ -139,40 +409,40 @@ class UserRepository:
         :param supabase_id: Supabase user ID
         :param update_data: Dictionary with fields to update
 
-        :returns: Updated User if found, None otherwise
+        :returns: Updated User
 
         :raises NotFoundError: If user not found
         :raises MongoUnavailableError: If update fails
         """
         try:
 
-            # get user by supabase_id
-            user = await self.get_by_supabase_id(supabase_id)
-
-            # user not found: raise custom error
-            if not user:
-                raise NotFoundError(f'User with supabase_id {supabase_id} not found.')
-
             # update timestamp
             update_data['updated_at'] = datetime.now(timezone.utc)
 
-            # Update in MongoDB
-            await self.__collection.update_one(
-                {'supabase_id': supabase_id},
-                {'$set': update_data}
+            # update active user and get updated document in a single round-trip
+            updated_user = await self.__collection.find_one_and_update(
+                {'supabase_id': supabase_id, 'is_active': True},
+                {'$set': update_data},
+                projection=PROJECTION,
+                return_document=ReturnDocument.AFTER,
             )
 
-            # get updated user
-            updated_user = await self.get_by_supabase_id(supabase_id)
-
-            # return updated user
-            return updated_user
-
         # error in update user: raise custom error
         except Exception as e:
-            raise MongoUnavailableError(f'Failed to update user by email: {str(e)}') from e
+            raise MongoUnavailableError(f'Failed to update user by Supabase ID: {str(e)}') from e
 
+        # user not found: raise custom error
+        if not updated_user:
+            raise NotFoundError(f'User with supabase_id {supabase_id} not found.')
 
+        # write updated user through to the cache
+        self.refresh_cache(supabase_id, updated_user)
+
+        # return updated user
+        return updated_user
+
+
+    @traced('mongo.users.update_by_email')
     async def update_by_email(self, email: str, update_data: Dict[str, Any]) -> User:
         """
         Update user by email.
@@ -180,74 +450,134 @@ class UserRepository:
         :param email: User email address
         :param update_data: Dictionary with fields to update
 
-        :returns: Updated User if found, None otherwise
+        :returns: Updated User
 
         :raises NotFoundError: If user not found
         :raises MongoUnavailableError: If update fails
         """
         try:
 
-            # get user by email
-            user = await self.get_by_email(email)
-
-            # user not found: raise custom error
-            if not user:
-                raise NotFoundError(f'User with email {email} not found.')
-
             # update timestamp
             update_data['updated_at'] = datetime.now(timezone.utc)
 
-            # Update in MongoDB
-            await self.__collection.update_one(
-                {'email': email},
-                {'$set': update_data}
+            # update active user and get updated document in a single round-trip
+            updated_user = await self.__collection.find_one_and_update(
+                {'email': email, 'is_active': True},
+                {'$set': update_data},
+                projection=PROJECTION,
+                return_document=ReturnDocument.AFTER,
             )
 
-            # get updated user
-            updated_user = await self.get_by_email(email)
-
-            # return updated user
-            return updated_user
-
         # error in update user: raise custom error
         except Exception as e:
             raise MongoUnavailableError(f'Failed to update user by email: {str(e)}') from e
 
+        # user not found: raise custom error
+        if not updated_user:
+            raise NotFoundError(f'User with email {email} not found.')
+
+        # write updated user through to the cache
+        self.refresh_cache(updated_user['supabase_id'], updated_user)
+
+        # return updated user
+        return updated_user
+
 
+    @traced('mongo.users.delete_user')
     async def delete_user(self, supabase_id: str) -> None:
         """
         Delete user.
 
         :param supabase_id: Supabase user ID
 
-        :returns: True if deleted, False otherwise
-
         :raises NotFoundError: If user not found
         :raises MongoUnavailableError: If delete fails
         """
         try:
 
-            # get user by supabase_id
-            user = await self.get_by_supabase_id(supabase_id)
-
-            # user not found: raise custom error
-            if not user:
-                raise NotFoundError(f'User with supabase_id {supabase_id} not found.')
-
-            # soft delete user by setting is_active to False
-            await self.__collection.update_one(
-                {'supabase_id': supabase_id},
+            # soft delete active user by setting is_active to False
+            deleted_user = await self.__collection.find_one_and_update(
+                {'supabase_id': supabase_id, 'is_active': True},
                 {'$set': {
                     'is_active': False,
-                    'updated_at': datetime.utcnow()
-                }}
+                    'updated_at': datetime.now(timezone.utc)
+                }},
+                projection={'_id': 1},
             )
 
         # error in delete user: raise custom error
         except Exception as e:
             raise MongoUnavailableError(f'Failed to delete user: {str(e)}') from e
 
+        # user not found: raise custom error
+        if not deleted_user:
+            raise NotFoundError(f'User with supabase_id {supabase_id} not found.')
+
+        # invalidate cached profile
+        self.refresh_cache(supabase_id)
+
+
+    @traced('mongo.users.get_page')
+    async def get_page(self,
+                       role: Optional[str] = None,
+                       limit: int = 100,
+                       cursor: Optional[str] = None) -> Tuple[List[User], Optional[str]]:
+        """
+        Get a page of active users, newest first, using keyset pagination.
+
+        Pages are delimited by the (created_at, _id) of the last user returned, so
+        each page is an index range scan regardless of how deep it is.
+
+        :param role: Only list users with this role (user or supervisor)
+        :param limit: Maximum number of users to return
+        :param cursor: Cursor returned with the previous page (first page if omitted)
 
+        :returns: List of User and the cursor of the next page (None on the last page)
+
+        :raises InvalidCursorError: If the cursor is malformed
+        :raises MongoUnavailableError: If query fails
+        """
+
+        # build filter
+        query: Dict[str, Any] = {'is_active': True}
+        if role is not None:
+            query['role'] = role
+
+        # resume after the last user of the previous page
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            query['created_at'] = {'$lte': created_at}
+            query['$or'] = [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, '_id': {'$lt': last_id}},
+            ]
+
+        try:
+            # get one extra user to know whether there is a next page
+            users = await self.__collection.find(query) \
+                                           .sort(PAGE_SORT) \
+                                           .limit(limit + 1) \
+                                           .to_list(length=limit + 1)
+
+        # error in list users: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to list users: {str(e)}') from e
+
+        # build next page cursor
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor(users[-1]['created_at'], users[-1]['_id'])
+
+        # remove MongoDB ids
+        for user in users:
+            user.pop('_id', None)
+
+        # return page
+        return users, next_cursor
+
+
+    @traced('mongo.users.get_all')
     async def get_all(self,  # pylint: disable=W0102
                       skip: int = 0,
                       limit: int = 100,
@@ -276,6 +606,7 @@ class UserRepository:
             raise MongoUnavailableError(f'Failed to list users: {str(e)}') from e
 
 
+    @traced('mongo.users.get_by_role')
     async def get_by_role(self,  # pylint: disable=W0102
                           role: str,
                           skip: int = 0,
@@ -308,6 +639,45 @@ class UserRepository:
             raise MongoUnavailableError(f'Failed to find users by role: {str(e)}') from e
 
 
+    async def stream(self,  # pylint: disable=W0102
+                     role: Optional[str] = None,
+                     is_active: Optional[bool] = None,
+                     projection: Optional[Dict[str, int]] = PROJECTION,
+                     batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[User]:
+        """
+        Iterate over users as the MongoDB cursor returns them.
+
+        Only one cursor batch is held in memory at a time. Pending profile reservations
+        (see reserve_user) are left out.
+
+        :param role: Only return users with this role (user or supervisor)
+        :param is_active: Only return active (True) or inactive (False) users
+        :param projection: Fields to include or exclude
+        :param batch_size: Number of users fetched per round-trip
+
+        :returns: Async iterator of User
+
+        :raises MongoUnavailableError: If query fails
+        """
+
+        # build filter (pending profile reservations are not users yet)
+        query: Dict[str, Any] = {'pending_expires_at': {'$exists': False}}
+        if role is not None:
+            query['role'] = role
+        if is_active is not None:
+            query['is_active'] = is_active
+
+        try:
+            # iterate over cursor batches
+            async for user in self.__collection.find(query, projection).batch_size(batch_size):
+                yield user
+
+        # error in stream users: raise custom error
+        except Exception as e:
+            raise MongoUnavailableError(f'Failed to stream users: {str(e)}') from e
+
+
+    @traced('mongo.users.update_role')
     async def update_role(self, email: str, role: str) -> User:
         """
         Update user role.
@@ -320,14 +690,49 @@ class UserRepository:
         :raises MongoUnavailableError: If update fails
         :raises NotFoundError: If user not found
         """
-        try:
 
-            # update user role by email
-            result = await self.update_by_email(email, {'role': role})
+        # update user role by email
+        return await self.update_by_email(email, {'role': role})
+
 
-            # return updated user
-            return result
+    @traced('mongo.users.set_roles')
+    async def set_roles(self, emails: List[str], role: str, dry_run: bool = False) -> Dict[str, str]:
+        """
+        Set the role of many users with a single bulk write.
+
+        :param emails: User emails
+        :param role: New role (user or supervisor)
+        :param dry_run: Only report what would change
+
+        :returns: Result by email ('updated', 'unchanged' or 'not_found')
+
+        :raises MongoUnavailableError: If query or update fails
+        """
+        try:
 
-        # error in update user role: raise custom error
+            # get current roles of the active users
+            cursor = self.__collection.find({'email': {'$in': emails}, 'is_active': True},
+                                            {'_id': 0, 'email': 1, 'role': 1})
+            roles = {user['email']: user['role'] async for user in cursor}
+
+            # classify users
+            results = {
+                email: 'not_found' if email not in roles else 'unchanged' if roles[email] == role else 'updated'
+                for email in emails
+            }
+            changes = [email for email, result in results.items() if result == 'updated']
+
+            # apply every change in one round-trip
+            if changes and not dry_run:
+                now = datetime.now(timezone.utc)
+                await self.__collection.bulk_write([
+                    UpdateOne({'email': email, 'is_active': True}, {'$set': {'role': role, 'updated_at': now}})
+                    for email in changes
+                ], ordered=False)
+
+            # return results
+            return results
+
+        # error in update user roles: raise custom error
         except Exception as e:
-            raise MongoUnavailableError(f'Failed to update user role: {str(e)}') from e
+            raise MongoUnavailableError(f'Failed to update user roles: {str(e)}') from e
@@ -4,7 +4,10 @@ MongoDB database configuration and connection.
 
 # --- IMPORTS ---
 from pymongo import AsyncMongoClient
-from pymongo import MongoClient
+
+
+# --- TYPES ---
+from typing import Any
 from typing import Optional
 
 
@@ -14,21 +17,23 @@ class MongoDBSetup:
     MongoDB connection manager.
     """
 
-    def __init__(self, db_name: str, mongodb_url: str) -> None:
+    def __init__(self, db_name: str, mongodb_url: str, **client_options: Any) -> None:
         """
         Initialize MongoDB connection manager.
 
+        Indexes are declared by the repositories and reconciled by IndexManager.
+
         :param db_name: Name of the database
         :param mongodb_url: MongoDB connection URL
+        :param client_options: AsyncMongoClient options (pool sizes, timeouts, compressors, listeners)
         """
         self.__db_name = db_name
         self.__mongodb_url = mongodb_url
+        self.__client_options = client_options
 
         self.client: Optional[AsyncMongoClient] = None
-        self.__client_sync: Optional[MongoClient] = None
 
         self.connect_db()
-        self.create_indexes()
 
 
     def connect_db(self):
@@ -39,18 +44,21 @@ class MongoDBSetup:
         # Get MongoDB URL from config
         mongodb_url = self.__mongodb_url
 
+        # Unset options keep the driver defaults
+        options = {name: value for name, value in self.__client_options.items() if value is not None}
+
         # Initialize MongoDB client
-        self.client = AsyncMongoClient(mongodb_url)
+        self.client = AsyncMongoClient(mongodb_url, **options)
 
 
-    def close_db(self):
+    async def close_db(self):
         """
         Close MongoDB connection.
         """
 
         # Close the client if it exists
         if self.client:
-            self.client.close()
+            await self.client.close()
 
 
     def get_database(self):
@@ -69,31 +77,3 @@ class MongoDBSetup:
         """
         db = self.get_database()
         return db[collection_name]
-
-
-    def create_indexes(self):
-        """
-        Create indexes.
-        """
-        try:
-            # Get MongoDB configuration
-            mongodb_url = self.__mongodb_url
-            db_name = self.__db_name
-
-            # sync client only for index creation
-            self.__client_sync = MongoClient(mongodb_url)
-
-            # Get the database and collection
-            db = self.__client_sync[db_name]
-            users_collection = db["users"]
-
-            # Create unique indices
-            users_collection.create_index("email", unique=True)
-            users_collection.create_index("supabase_id", unique=True)
-
-            # Close sync client
-            self.__client_sync.close()
-
-        # error occurs during index creation: log warning
-        except Exception as e:  # pylint: disable=W0718
-            print(f'[WARNING   ] Could not create indexes: {str(e)}')
@@ -0,0 +1,164 @@
+"""
+MongoDB index reconciliation.
+"""
+
+# --- IMPORTS ---
+from opty_api.mongo.setup.connection import MongoDBSetup
+from opty_api.utils.logger import logger
+from pymongo import IndexModel
+
+import asyncio
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Literal
+from typing import Optional
+
+
+# --- CONSTANTS ---
+COMPARED_OPTIONS = ('unique', 'sparse', 'partialFilterExpression', 'expireAfterSeconds')
+DEFAULT_INDEX = '_id_'
+
+
+# --- CODE ---
+def same_index(declared: Dict[str, Any], existing: Dict[str, Any]) -> bool:
+    """
+    Check whether an existing index matches its declaration.
+
+    :param declared: Declared index document (IndexModel.document)
+    :param existing: Index description from index_information()
+
+    :returns: True if keys and compared options are equal
+    """
+    if list(declared['key'].items()) != [tuple(key) for key in existing['key']]:
+        return False
+    return all(declared.get(option) == existing.get(option) for option in COMPARED_OPTIONS)
+
+
+class IndexManager:
+    """
+    Reconcile the indexes declared by the repositories with the database.
+
+    Modes:
+      - 'off':    only report drift
+      - 'create': create missing indexes, report conflicting and undeclared ones
+      - 'sync':   also rebuild conflicting indexes and drop undeclared ones
+    """
+
+    def __init__(self, mongodb: MongoDBSetup, mode: Literal['off', 'create', 'sync'] = 'create') -> None:
+        """
+        Initialize the index manager.
+
+        :param mongodb: MongoDB connection manager
+        :param mode: Reconciliation mode
+        """
+        self.mongodb = mongodb
+        self.mode = mode
+        self.report: Dict[str, Dict[str, Any]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+
+    def start(self, repositories: List[Any]) -> None:
+        """
+        Reconcile indexes in the background.
+
+        :param repositories: Repositories declaring COLLECTION and INDEXES
+        """
+        self.task = asyncio.create_task(self.reconcile_all(repositories))
+
+
+    def stop(self) -> None:
+        """
+        Cancel a reconciliation still in progress.
+        """
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+
+    @property
+    def drift(self) -> bool:
+        """
+        Whether any collection differs from its declaration.
+        """
+        return any(report['status'] != 'OK' for report in self.report.values())
+
+
+    async def reconcile_all(self, repositories: List[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Reconcile the indexes of every repository collection.
+
+        :param repositories: Repositories declaring COLLECTION and INDEXES
+
+        :returns: Report by collection
+        """
+        for repository in repositories:
+            self.report[repository.COLLECTION] = await self.reconcile(repository.COLLECTION, repository.INDEXES)
+        return self.report
+
+
+    async def reconcile(self, collection_name: str, indexes: List[IndexModel]) -> Dict[str, Any]:
+        """
+        Reconcile the indexes of a collection.
+
+        :param collection_name: Name of the collection
+        :param indexes: Declared indexes
+
+        :returns: Report with created, rebuilt, dropped, missing, conflicting and undeclared indexes
+        """
+        report: Dict[str, Any] = {
+            'status': 'OK',
+            'created': [],
+            'rebuilt': [],
+            'dropped': [],
+            'missing': [],
+            'conflicting': [],
+            'undeclared': [],
+        }
+        collection = self.mongodb.get_collection(collection_name)
+
+        try:
+            # compare declared and existing indexes
+            existing = await collection.index_information()
+            declared = {index.document['name']: index for index in indexes}
+            missing = [index for name, index in declared.items() if name not in existing]
+            conflicting = [index for name, index in declared.items()
+                           if name in existing and not same_index(index.document, existing[name])]
+            undeclared = [name for name in existing if name not in declared and name != DEFAULT_INDEX]
+
+            # rebuild conflicting indexes and drop undeclared ones
+            if self.mode == 'sync':
+                for name in [index.document['name'] for index in conflicting] + undeclared:
+                    await collection.drop_index(name)
+                report['dropped'] = undeclared
+                report['rebuilt'] = [index.document['name'] for index in conflicting]
+                missing, conflicting, undeclared = missing + conflicting, [], []
+
+            # create missing indexes
+            if self.mode != 'off' and missing:
+                await collection.create_indexes(missing)
+                report['created'] = [index.document['name'] for index in missing
+                                     if index.document['name'] not in report['rebuilt']]
+                missing = []
+
+            # report remaining drift
+            report['missing'] = [index.document['name'] for index in missing]
+            report['conflicting'] = [index.document['name'] for index in conflicting]
+            report['undeclared'] = undeclared
+            if missing or conflicting or undeclared:
+                report['status'] = 'DRIFT'
+                logger.warning(f'Indexes of "{collection_name}" differ from their declaration',
+                               collection=collection_name, missing=report['missing'],
+                               conflicting=report['conflicting'], undeclared=undeclared)
+
+        # error reconciling indexes: report failure
+        except Exception as e:  # pylint: disable=W0718
+            report['status'] = 'FAILED'
+            report['error'] = str(e)
+            logger.warning(f'Could not reconcile indexes of "{collection_name}": {str(e)}',
+                           collection=collection_name)
+
+        # return report
+        return report
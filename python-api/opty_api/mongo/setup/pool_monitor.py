@@ -0,0 +1,142 @@
+"""
+MongoDB connection pool telemetry.
+"""
+
+# --- IMPORTS ---
+from collections import deque
+from pymongo import monitoring
+
+import threading
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Deque
+from typing import Dict
+
+
+# --- CONSTANTS ---
+WAIT_SAMPLES = 1000
+
+
+# --- CODE ---
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Connection pool listener keeping pool gauges and checkout wait times.
+
+    Gauges:
+      - open:    connections currently open
+      - in_use:  connections currently checked out
+      - waiting: checkouts currently waiting for a connection
+    """
+
+    def __init__(self, samples: int = WAIT_SAMPLES) -> None:
+        """
+        Initialize the monitor.
+
+        :param samples: Number of recent checkout wait times kept for percentiles
+        """
+        self.__lock = threading.Lock()
+        self.__waits: Deque[float] = deque(maxlen=samples)
+
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.max_in_use = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.pool_clears = 0
+
+
+    # --- Pool events ---
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        with self.__lock:
+            self.pool_clears += 1
+
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+
+    # --- Connection events ---
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        with self.__lock:
+            self.open += 1
+
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        with self.__lock:
+            self.open = max(0, self.open - 1)
+
+
+    # --- Checkout events ---
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        with self.__lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        with self.__lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.checkouts += 1
+            self.__waits.append(event.duration * 1000)
+
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        with self.__lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+            self.__waits.append(event.duration * 1000)
+
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        with self.__lock:
+            self.in_use = max(0, self.in_use - 1)
+
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool gauges and checkout wait percentiles.
+
+        :returns: Gauges, peaks, counters and wait times (ms) of recent checkouts
+        """
+        with self.__lock:
+            waits = sorted(self.__waits)
+            gauges = {
+                'open': self.open,
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'max_in_use': self.max_in_use,
+                'max_waiting': self.max_waiting,
+                'checkouts': self.checkouts,
+                'checkout_failures': dict(self.checkout_failures),
+                'pool_clears': self.pool_clears,
+            }
+
+        # checkout wait percentiles
+        def percentile(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else 0.0
+
+        gauges['checkout_wait_ms'] = {
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': round(waits[-1], 3) if waits else 0.0,
+        }
+        return gauges
@@ -9,10 +9,15 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from opty_api.app import app
 from opty_api.err.already_exists_error import AlreadyExistsError
+from opty_api.err.client_disconnected_error import ClientDisconnectedError
+from opty_api.err.deadline_exceeded_error import DeadlineExceededError
 from opty_api.err.empty_update_error import EmptyUpdateError
+from opty_api.err.invalid_cursor_error import InvalidCursorError
 from opty_api.err.mongodb_unavailable_error import MongoUnavailableError
 from opty_api.err.not_found_error import NotFoundError
+from opty_api.err.queue_full_error import QueueFullError
 from opty_api.err.supabase_error import SupabaseError
+from opty_api.utils.logger import logger
 from supabase_auth.errors import AuthApiError
 
 
@@ -31,15 +36,66 @@ async def already_exists_error_handler(
     :returns: JSONResponse with 'error' field describing the exception.
     """
     # log error
-    print(f'[ERROR     ] {error.args[1]}')
+    logger.error(error.args[1])
+
+    # report duplicated key
+    content = {'error': error.message}
+    if error.key:
+        content['key'] = error.key
 
     # fail request
     return JSONResponse(
-        {'error': error.message},
+        content,
         status_code = 409,
     )
 
 
+@app.exception_handler(ClientDisconnectedError)
+async def client_disconnected_error_handler(
+    request: Request,  # pylint: disable=W0613
+    error: ClientDisconnectedError
+) -> JSONResponse:
+    """
+    Handle ClientDisconnectedError exceptions.
+
+    :param request: http request.
+    :param error: ClientDisconnectedError instance.
+
+    :returns: JSONResponse with 'error' field describing the exception.
+    """
+    # log cancellation (not a server error)
+    logger.info(error.args[1])
+
+    # client closed request: nobody reads the response
+    return JSONResponse(
+        {'error': error.message},
+        status_code = 499,
+    )
+
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_error_handler(
+    request: Request,  # pylint: disable=W0613
+    error: DeadlineExceededError
+) -> JSONResponse:
+    """
+    Handle DeadlineExceededError exceptions.
+
+    :param request: http request.
+    :param error: DeadlineExceededError instance.
+
+    :returns: JSONResponse with 'error' field describing the exception.
+    """
+    # log error
+    logger.error(error.args[1])
+
+    # fail request
+    return JSONResponse(
+        {'error': error.message},
+        status_code = 504,
+    )
+
+
 @app.exception_handler(EmptyUpdateError)
 async def empty_update_error_handler(
     request: Request,  # pylint: disable=W0613
@@ -54,7 +110,30 @@ async def empty_update_error_handler(
     :returns: JSONResponse with 'error' field describing the exception.
     """
     # log error
-    print(f'[ERROR     ] {error.args[1]}')
+    logger.error(error.args[1])
+
+    # fail request
+    return JSONResponse(
+        {'error': error.message},
+        status_code = 400,
+    )
+
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_error_handler(
+    request: Request,  # pylint: disable=W0613
+    error: InvalidCursorError
+) -> JSONResponse:
+    """
+    Handle InvalidCursorError exceptions.
+
+    :param request: http request.
+    :param error: InvalidCursorError instance.
+
+    :returns: JSONResponse with 'error' field describing the exception.
+    """
+    # log error
+    logger.error(error.args[1])
 
     # fail request
     return JSONResponse(
@@ -77,7 +156,7 @@ async def auth_api_error_handler(
     :returns: JSONResponse with 'error' field describing the exception.
     """
     # log error
-    print(f'[ERROR     ] {error.message}')
+    logger.error(error.message)
 
     # fail request
     return JSONResponse(
@@ -100,7 +179,7 @@ async def database_unavailable_error_handler(
     :returns: JSONResponse with 'error' field describing the exception.
     """
     # log error
-    print(f'[ERROR     ] {error.args[1]}')
+    logger.error(error.args[1])
 
     # fail request
     return JSONResponse(
@@ -123,7 +202,7 @@ async def not_found_error_handler(
     :returns: JSONResponse with 'error' field describing the exception.
     """
     # log error
-    print(f'[ERROR     ] {error.args[1]}')
+    logger.error(error.args[1])
 
     # fail request
     return JSONResponse(
@@ -132,6 +211,30 @@ async def not_found_error_handler(
     )
 
 
+@app.exception_handler(QueueFullError)
+async def queue_full_error_handler(
+    request: Request,  # pylint: disable=W0613
+    error: QueueFullError
+) -> JSONResponse:
+    """
+    Handle QueueFullError exceptions.
+
+    :param request: http request.
+    :param error: QueueFullError instance.
+
+    :returns: JSONResponse with 'error' field describing the exception.
+    """
+    # log error
+    logger.error(error.args[1])
+
+    # fail request, asking the client to retry shortly
+    return JSONResponse(
+        {'error': error.message},
+        status_code = 503,
+        headers = {'Retry-After': '1'},
+    )
+
+
 @app.exception_handler(SupabaseError)
 async def supabase_error_handler(
     request: Request,  # pylint: disable=W0613
@@ -146,7 +249,7 @@ async def supabase_error_handler(
     :returns: JSONResponse with 'error' field describing the exception.
     """
     # log error
-    print(f'[ERROR     ] {error.args[1]}')
+    logger.error(error.args[1])
 
     # fail request
     return JSONResponse(
@@ -175,7 +278,8 @@ async def http_exception_handler(
     detail = error.detail
 
     # log errors
-    print(f'[ERROR     ] Request "{method} {path}" failed with {status}: {detail}')
+    logger.error(f'Request "{method} {path}" failed with {status}: {detail}',
+                 method=method, path=path, status=status)
 
     # fail request
     return JSONResponse(
@@ -217,7 +321,8 @@ async def request_validation_error_handler(
     detail = '\n'.join(errors)
 
     # log errors
-    print(f'[ERROR     ] Validation request "{method} {path}" failed with status {status}: {detail}')
+    logger.error(f'Validation request "{method} {path}" failed with status {status}: {detail}',
+                 method=method, path=path, status=status)
 
     # Return proper error message.
     return JSONResponse({'error': '\n'.join(errors)}, status_code = 422)
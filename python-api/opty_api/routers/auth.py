@@ -5,17 +5,22 @@ Authentication endpoints.
 # --- IMPORTS ---
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Query
 from fastapi import status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 from opty_api.app import container
 from opty_api.services.auth.create_profile import create_user_profile
+from opty_api.services.auth.export_users import MEDIA_TYPES
+from opty_api.services.auth.export_users import open_export
 from opty_api.services.auth.login import login_user
 from opty_api.services.auth.login import login_with_oauth
 from opty_api.services.auth.register import register_user
 from opty_api.services.auth.update import update_user_profile
 from opty_api.utils.dependencies import get_current_active_user
 from opty_api.utils.dependencies import require_role
+from opty_api.utils.logger import logger
 from opty_api.services.auth.forgot_password import send_reset_password_email
 from opty_api.schemas.auth.forgot_password.endpoint import UserForgotPasswordPayload
 
@@ -28,8 +33,13 @@ from opty_api.schemas.auth.register.endpoint import UserRegisterPayload
 from opty_api.schemas.auth.update.endpoint import UserUpdatePayload
 from opty_api.schemas.token import Token
 from opty_api.schemas.user import User
+from opty_api.schemas.user import UserPage
 from supabase_auth.types import OAuthResponse
 from typing import Dict
+from typing import List
+from typing import Literal
+from typing import Optional
+from typing import Union
 
 
 # --- GLOBAL ---
@@ -186,27 +196,70 @@ async def delete_current_user(current_user: User = Depends(get_current_active_us
     )
 
 
-@router.get('/users', response_model=list[User])
+@router.get('/users', response_model=Union[List[User], UserPage])
 async def list_users(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = Query(None, description='Cursor of the page to return (empty for the first page)'),
+    role: Optional[Literal['user', 'supervisor']] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0),
     supervisor: User = Depends(require_role('supervisor'))  # pylint: disable=W0613
 ):
     """
     Returns a list of all users in the system.
     Only accessible by users with supervisor role.
 
-    :param skip: Number of users to skip (for pagination)
+    Without `cursor`, returns a plain list of users paged by offset (`skip`), as before.
+    With `cursor` (empty for the first page), users come newest first and pages are
+    linked by cursor: the response holds the users and the cursor of the next page
+    (`next_cursor`, null on the last page).
+
+    :param cursor: Cursor of the page to return (opts in to cursor pagination, empty for the first page)
+    :param role: Only list users with this role
     :param limit: Maximum number of users to return
+    :param skip: Number of users to skip (offset pagination, ignored with cursor)
 
-    :return: List of UserResponse objects
+    :return: List of users, or UserPage with the users and the next page cursor (with cursor)
     """
 
-    # Fetch users from the database
-    users_data = await container['user_repository'].get_all(skip=skip, limit=limit)
+    # Offset pagination
+    if cursor is None:
+        if role:
+            users_data = await container['user_repository'].get_by_role(role, skip=skip, limit=limit)
+        else:
+            users_data = await container['user_repository'].get_all(skip=skip, limit=limit)
+        return JSONResponse(content=jsonable_encoder(users_data), status_code=status.HTTP_200_OK)
+
+    # Fetch page of users from the database
+    users_data, next_cursor = await container['user_repository'].get_page(role=role, limit=limit, cursor=cursor or None)
+
+    # Return the users with the next page cursor
+    page: UserPage = {'users': users_data, 'next_cursor': next_cursor}
+    return JSONResponse(content=jsonable_encoder(page), status_code=status.HTTP_200_OK)
+
+@router.get('/users/export')
+async def export_users_list(
+    export_format: Literal['ndjson', 'csv'] = Query('ndjson', alias='format'),
+    role: Optional[Literal['user', 'supervisor']] = None,
+    active: Optional[bool] = None,
+    supervisor: User = Depends(require_role('supervisor'))  # pylint: disable=W0613
+):
+    """
+    Streams every user in the system as NDJSON or CSV.
+    Only accessible by users with supervisor role.
 
-    # Return the list of users
-    return JSONResponse(content=jsonable_encoder(users_data), status_code=status.HTTP_200_OK)
+    :param export_format: Output format (ndjson or csv)
+    :param role: Only export users with this role
+    :param active: Only export active (true) or inactive (false) users
+
+    :return: StreamingResponse with one user per line
+    """
+
+    # Stream users as they are read from the database (MongoDB errors before the first chunk answer 503)
+    return StreamingResponse(
+        await open_export(export_format, role=role, is_active=active),
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="users.{export_format}"'},
+    )
 
 @router.post(
     "/forgot-password",
@@ -224,10 +277,9 @@ async def forgot_password(payload: UserForgotPasswordPayload) -> JSONResponse:
     # Tenta disparar o e-mail via Supabase
     try:
         await send_reset_password_email(payload.email)
-    except Exception:
+    except Exception as e:  # pylint: disable=W0718
         # Mesmo se der erro interno, não expõe detalhe pro cliente.
-        # Você pode logar o erro internamente se quiser.
-        pass
+        logger.warning(f'Failed to send reset password e-mail: {str(e)}')
 
     # Resposta "genérica" de sucesso
     return JSONResponse(
@@ -3,13 +3,32 @@ Endpoints de busca.
 """
 
 # --- IMPORTS ---
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Header, Query, Request
 from fastapi.responses import JSONResponse
-from opty_api.services.mercadolivre import scrape_mercadolivre
+from opty_api.err.not_found_error import NotFoundError
+from opty_api.services.search import price_stats
+from opty_api.services.search import query_key
+from opty_api.services.search import reparse_archive
+from opty_api.services.search import search_products
+from opty_api.services.search import set_tenant
 from opty_api.schemas.mercadolivre import MercadoLivreProduct
+from opty_api.schemas.mercadolivre import PriceStats
+from opty_api.schemas.search import MAX_PAGE
+from opty_api.schemas.search import SearchJob
+from opty_api.schemas.search import SearchJobRequest
+from opty_api.schemas.user import User
 from opty_api.app import container
-from opty_api.utils.prompts import get_query_prompt
-from typing import List
+from opty_api.utils.deadline import run_with_deadline
+from opty_api.utils.deadline import set_deadline
+from opty_api.utils.dependencies import get_optional_user
+from opty_api.utils.dependencies import require_role
+from opty_api.utils.jobs import serialize
+from typing import Any, Dict, List, Optional
+
+
+# --- CONSTANTS ---
+MAX_WAIT = 30.0
+MAX_TIMEOUT = 120.0
 
 
 # --- GLOBAL ---
@@ -18,40 +37,157 @@ router = APIRouter()
 
 
 # --- CODE ---
+async def search_scope(
+    request: Request,
+    timeout: Optional[float] = Header(None, alias='X-Request-Timeout', gt=0, le=MAX_TIMEOUT,
+                                      description="Prazo da busca em segundos (padrão: SEARCH_DEADLINE)."),
+    user: Optional[User] = Depends(get_optional_user)
+) -> None:
+    """
+    Dependência das rotas de busca: define em nome de quem o Mercado Livre é consultado
+    (fila justa) e o prazo da busca.
+
+    :param request: Requisição HTTP
+    :param timeout: Prazo da busca em segundos (X-Request-Timeout)
+    :param user: Usuário autenticado, ou None
+    """
+
+    # Share outbound requests fairly between users (anonymous clients by IP)
+    set_tenant(user, request.client.host if request.client else None)
+
+    # Give the search its time budget (header overrides the route default)
+    set_deadline(timeout or container['config'].SEARCH_DEADLINE)
+
+
 @router.get(
     '/mercadolivre',
     response_model=List[MercadoLivreProduct],
     summary="Scrape de produtos do Mercado Livre",
     description="Busca produtos no Mercado Livre com base em uma query e retorna os resultados.",
+    dependencies=[Depends(search_scope)],
 )
 async def search_mercadolivre_products(
-    query: str = Query(..., min_length=3, description="Termo de busca do produto para o Mercado Livre.")
+    request: Request,
+    query: str = Query(..., min_length=3, description="Termo de busca do produto para o Mercado Livre."),
+    page: int = Query(1, ge=1, le=MAX_PAGE, description="Página de resultados."),
+    rank: bool = Query(False, description="Ordena os produtos pela relevância do título para a busca.")
 ) -> JSONResponse:
     """
     Busca no Mercado Livre por um termo de produto e retorna uma lista de resultados.
-    A URL de acesso será: /api/search/mercadolivre?query={seu-termo}
+    A URL de acesso será: /api/search/mercadolivre?query={seu-termo}&page={página}&rank={true|false}
+    Autenticação é opcional: usuários anônimos dividem a fila de scraping por IP.
+    A busca é cancelada se o prazo esgotar (504) ou se o cliente desconectar.
+    """
+
+    # Normalize the query using OpenAI and scrape Mercado Livre with it (speculating on the raw query),
+    # cancelling everything on deadline or client disconnect; scraping errors keep their status (503, 504...)
+    products = await run_with_deadline(search_products(query, page, rank), request)
+
+    # Retorna a lista de produtos (pode ser vazia)
+    return JSONResponse(content=[p.model_dump() for p in products], status_code=200)
+
+
+@router.get(
+    '/mercadolivre/stats',
+    response_model=PriceStats,
+    summary="Estatísticas de preço de uma busca no Mercado Livre",
+    description="Retorna contagem, mínimo, máximo, média, mediana, percentis, histograma e os índices dos "
+                "produtos com preço atípico, para a mesma busca de /mercadolivre.",
+    dependencies=[Depends(search_scope)],
+)
+async def search_mercadolivre_price_stats(
+    request: Request,
+    query: str = Query(..., min_length=3, description="Termo de busca do produto para o Mercado Livre."),
+    page: int = Query(1, ge=1, le=MAX_PAGE, description="Página de resultados.")
+) -> JSONResponse:
+    """
+    Estatísticas dos preços de uma busca, sem baixar a lista de produtos.
+    A URL de acesso será: /api/search/mercadolivre/stats?query={seu-termo}&page={página}
+    Os índices de `outliers` se referem à lista retornada por /mercadolivre.
+    """
+
+    # Search (usually served by the results cache); scraping errors keep their status (503, 504...)
+    products = await run_with_deadline(search_products(query, page), request)
+
+    # Price stats of the result set
+    return JSONResponse(content=price_stats(products), status_code=200)
+
+
+@router.post(
+    '/jobs',
+    status_code=202,
+    response_model=SearchJob,
+    summary="Cria um job de busca no Mercado Livre",
+    description="Enfileira a busca e retorna o ID do job imediatamente. Buscas iguais em andamento ou "
+                "concluídas recentemente retornam o mesmo job.",
+)
+async def create_search_job(
+    search: SearchJobRequest,
+    request: Request,
+    user: Optional[User] = Depends(get_optional_user)
+) -> JSONResponse:
+    """
+    Enfileira uma busca no Mercado Livre.
+    Acompanhe o resultado em /api/search/jobs/{id}.
     """
 
-    # Get OpenAI client
-    openai_client = container['openai_client']
+    # Jobs run on behalf of the user who queued them
+    set_tenant(user, request.client.host if request.client else None)
+
+    # Queue the search (or join the same search already queued / done, in any worker)
+    job, _ = await container['search_jobs'].submit(f'{search.page}:{query_key(search.query)}',
+                                                   (search.query, search.page))
 
-    # Normalize the query using OpenAI
-    final_query = await openai_client.chat.completions.create(
-        model='gpt-4.1-mini-2025-04-14',
-        temperature=0.2,
-        messages=get_query_prompt(query)
-    )
+    # Accepted: point the client to the job
+    return JSONResponse(content=serialize(job), status_code=202, headers={'Location': f'/api/search/jobs/{job["_id"]}'})
 
-    # Log the normalized query
-    print(f'[DEBUG   ] Final normalized query: {final_query.choices[0].message.content}')
 
-    # Scrape Mercado Livre with the normalized query
-    try:
-        products = await scrape_mercadolivre(final_query.choices[0].message.content)
-        
-        # Retorna a lista de produtos (pode ser vazia)
-        return JSONResponse(content=[p.model_dump() for p in products], status_code=200)
+@router.get(
+    '/jobs/{job_id}',
+    response_model=SearchJob,
+    summary="Consulta um job de busca",
+    description="Retorna o estado do job e, quando concluído, os produtos encontrados.",
+)
+async def get_search_job(
+    job_id: str,
+    wait: float = Query(0.0, ge=0.0, le=MAX_WAIT, description="Segundos a aguardar a conclusão do job (long-poll).")
+) -> JSONResponse:
+    """
+    Retorna o estado de um job de busca, aguardando até `wait` segundos pela sua conclusão.
+    """
+
+    # Get the job, waiting for it to finish (long-poll)
+    if wait:
+        job = await container['search_jobs'].wait(job_id, wait)
+    else:
+        job = await container['search_jobs'].get(job_id)
+
+    # Unknown or expired job: fail request
+    if job is None:
+        raise NotFoundError(f'Search job {job_id} not found.')
+
+    return JSONResponse(content=serialize(job), status_code=200)
+
+
+@router.post(
+    '/archive/reparse',
+    response_model=Dict[str, Any],
+    summary="Re-extrai os produtos das páginas arquivadas",
+    description="Reconstrói o cache de resultados deste worker a partir do HTML arquivado, com o parser atual, "
+                "sem novas requisições ao Mercado Livre. Apenas supervisores.",
+)
+async def reparse_archived_pages(
+    max_age: Optional[float] = Query(None, gt=0,
+                                     description="Idade máxima das páginas, em segundos (padrão: TTL do cache)."),
+    dry_run: bool = Query(False, description="Só conta os produtos extraídos, sem alterar o cache."),
+    supervisor: User = Depends(require_role('supervisor'))  # pylint: disable=W0613
+) -> JSONResponse:
+    """
+    Re-extrai os produtos das páginas arquivadas (HTML_ARCHIVE_DIR).
+    """
+
+    # Archive disabled: nothing to re-parse
+    if container.get('html_archive') is None:
+        raise NotFoundError('HTML archive is disabled (HTML_ARCHIVE_DIR).')
 
-    # Errors occurring during scraping: raise HTTP 500
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Erro interno ao tentar realizar o scraping.")
+    return JSONResponse(content=await reparse_archive(max_age, dry_run=dry_run), status_code=200)
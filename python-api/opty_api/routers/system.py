@@ -4,11 +4,24 @@ System endpoints.
 
 # --- IMPORTS ---
 from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import Query
 from fastapi.responses import JSONResponse
+from opty_api.app import container
 from opty_api.app import health
 from opty_api.app import info
 from opty_api.models import Health
 from opty_api.models import Info
+from opty_api.schemas.user import User
+from opty_api.utils.dependencies import require_role
+from opty_api.utils.logger import logger
+from opty_api.utils.tracing import tracer
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import List
 
 
 # --- GLOBAL ---
@@ -26,6 +39,18 @@ def get_health() -> JSONResponse:
     return JSONResponse(health.dict())
 
 
+# Readiness endpoint
+@router.get('/ready', response_model = Dict[str, Any])
+def get_readiness() -> JSONResponse:
+    """
+    Returns the last dependency probe results.
+    Answers 503 while a critical dependency is failing or before the first probe round.
+    """
+    snapshot = container['readiness'].snapshot()
+    ready = snapshot['status'] not in ('FAILURE', 'UNKNOWN')
+    return JSONResponse(snapshot, status_code = 200 if ready else 503)
+
+
 # Info endpoint
 @router.get('/info', response_model = Info)
 def get_info() -> JSONResponse:
@@ -33,3 +58,97 @@ def get_info() -> JSONResponse:
     Returns system information.
     """
     return JSONResponse(info.dict())
+
+
+# Metrics endpoint
+@router.get('/metrics', response_model = Dict[str, Any])
+def get_metrics() -> JSONResponse:
+    """
+    Returns internal runtime metrics.
+    """
+    metrics = {'logging': logger.stats()}
+
+    # MongoDB connection pool gauges
+    pool_monitor = container.get('mongodb_pool_monitor')
+    if pool_monitor is not None:
+        metrics['mongodb_pool'] = pool_monitor.stats()
+
+    # User profile cache counters
+    user_repository = container.get('user_repository')
+    if user_repository is not None and user_repository.cache is not None:
+        metrics['user_cache'] = user_repository.cache.stats()
+
+    # Outbound scrape scheduler gauges
+    scrape_scheduler = container.get('scrape_scheduler')
+    if scrape_scheduler is not None:
+        metrics['scrape_scheduler'] = scrape_scheduler.stats()
+
+    # Hedged scrape request counters
+    scrape_hedger = container.get('scrape_hedger')
+    if scrape_hedger is not None:
+        metrics['scrape_hedging'] = scrape_hedger.stats()
+
+    # Raw HTML archive counters
+    html_archive = container.get('html_archive')
+    if html_archive is not None:
+        metrics['html_archive'] = html_archive.stats()
+
+    # Search job queue counters
+    search_jobs = container.get('search_jobs')
+    if search_jobs is not None:
+        metrics['search_jobs'] = search_jobs.stats()
+
+    # Normalized query cache counters
+    search_queries = container.get('search_queries')
+    if search_queries is not None:
+        metrics['search_queries'] = search_queries.stats()
+
+    # Search results cache and speculation counters
+    search_speculator = container.get('search_speculator')
+    if search_speculator is not None:
+        metrics['search_results'] = search_speculator.results.stats()
+        metrics['search_speculation'] = search_speculator.stats()
+
+    # Derived values cache counters (price stats, ranking indexes)
+    search_derived = container.get('search_derived')
+    if search_derived is not None:
+        metrics['search_derived'] = search_derived.stats()
+
+    # Next page prefetch counters
+    search_prefetcher = container.get('search_prefetcher')
+    if search_prefetcher is not None:
+        metrics['search_prefetch'] = search_prefetcher.stats()
+
+    return JSONResponse(metrics)
+
+
+# Traces endpoint
+@router.get('/traces', response_model = List[Dict[str, Any]])
+def get_traces(
+    limit: int = Query(50, ge=1, le=1000),
+    min_duration_ms: float = Query(0.0, ge=0.0),
+    supervisor: User = Depends(require_role('supervisor'))  # pylint: disable=W0613
+) -> JSONResponse:
+    """
+    Returns the most recent recorded request traces.
+    Only accessible by users with supervisor role.
+
+    :param limit: Maximum number of traces to return
+    :param min_duration_ms: Only return traces at least this slow
+    """
+    return JSONResponse(tracer.recent(limit=limit, min_duration_ms=min_duration_ms))
+
+
+# Scrape queues endpoint
+@router.get('/scrape/queues', response_model = Dict[str, int])
+def get_scrape_queues(
+    limit: int = Query(10, ge=1, le=1000),
+    supervisor: User = Depends(require_role('supervisor'))  # pylint: disable=W0613
+) -> JSONResponse:
+    """
+    Returns the tenants (users and anonymous client IPs) with the most requests waiting for a scrape slot.
+    Only accessible by users with supervisor role.
+
+    :param limit: Maximum number of tenants to return
+    """
+    return JSONResponse(container['scrape_scheduler'].deepest_queues(limit=limit))
@@ -4,20 +4,58 @@ Dependency injection schemas.
 
 # --- TYPES ---
 from opty_api.models import Config
+from opty_api.mongo.repositories.jobs import JobRepository
 from opty_api.mongo.repositories.users import UserRepository
 from opty_api.mongo.setup.connection import MongoDBSetup
-from openai import AsyncOpenAI
-from supabase import AsyncClient
+from opty_api.mongo.setup.indexes import IndexManager
+from opty_api.mongo.setup.pool_monitor import PoolMonitor
+from opty_api.schemas.mercadolivre import MercadoLivreProduct
+from opty_api.utils.archive import HtmlArchive
+from opty_api.utils.cache import TaskCache
+from opty_api.utils.cache import TTLCache
+from opty_api.utils.deferred import Deferred
+from opty_api.utils.hedging import Hedger
+from opty_api.utils.jobs import JobQueue
+from opty_api.utils.prefetch import Prefetcher
+from opty_api.utils.readiness import ReadinessMonitor
+from opty_api.utils.scheduler import FairScheduler
+from opty_api.utils.speculation import Speculator
+from opty_api.utils.tokens import TokenVerifier
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TYPE_CHECKING
 from typing import TypedDict
 
 
+# heavy client libraries are only imported for type checking (they load lazily at startup)
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from supabase import AsyncClient
+
+
 # --- CODE ---
 class Container(TypedDict):
     """
     Dependency injection container schema.
     """
     config: Config
-    supabase_client: AsyncClient
+    supabase_client: 'AsyncClient'
+    token_verifier: TokenVerifier
     mongodb: MongoDBSetup
+    mongodb_pool_monitor: PoolMonitor
+    index_manager: IndexManager
     user_repository: UserRepository
-    openai_client: AsyncOpenAI
+    job_repository: JobRepository
+    openai_client: Deferred['AsyncOpenAI']
+    readiness: ReadinessMonitor
+    search_jobs: JobQueue
+    search_queries: TaskCache[str]
+    search_results: TaskCache[List[MercadoLivreProduct]]
+    search_derived: TTLCache[Tuple[List[MercadoLivreProduct], Any]]
+    search_speculator: Speculator[List[MercadoLivreProduct]]
+    search_prefetcher: Prefetcher[List[MercadoLivreProduct]]
+    scrape_scheduler: FairScheduler
+    scrape_hedger: Hedger
+    html_archive: Optional[HtmlArchive]
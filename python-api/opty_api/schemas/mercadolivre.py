@@ -3,7 +3,7 @@ Schemas relacionados ao scraping do Mercado Livre.
 """
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class MercadoLivreProduct(BaseModel):
     """
@@ -13,4 +13,26 @@ class MercadoLivreProduct(BaseModel):
     price: str
     link: str
     image: Optional[str] = None
-    source: str = "Mercado Livre"
\ No newline at end of file
+    source: str = "Mercado Livre"
+
+
+class PriceHistogram(BaseModel):
+    """
+    Histograma de preços: contagem de produtos entre cada par de limites consecutivos.
+    """
+    edges: List[float]
+    counts: List[int]
+
+
+class PriceStats(BaseModel):
+    """
+    Estatísticas dos preços de uma busca.
+    """
+    count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    percentiles: Dict[str, float]
+    histogram: PriceHistogram
+    outliers: List[int]
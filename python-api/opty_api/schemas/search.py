@@ -0,0 +1,40 @@
+"""
+Schemas dos jobs de busca.
+"""
+
+# --- IMPORTS ---
+from opty_api.schemas.mercadolivre import MercadoLivreProduct
+from pydantic import BaseModel
+from pydantic import Field
+
+
+# --- TYPES ---
+from typing import List
+from typing import Literal
+from typing import Optional
+
+
+# --- CONSTANTS ---
+MAX_PAGE = 40
+
+
+# --- CODE ---
+class SearchJobRequest(BaseModel):
+    """
+    Pedido de busca assíncrona.
+    """
+    query: str = Field(..., min_length=3, description='Termo de busca do produto para o Mercado Livre.')
+    page: int = Field(1, ge=1, le=MAX_PAGE, description='Página de resultados.')
+
+
+class SearchJob(BaseModel):
+    """
+    Estado de um job de busca.
+    """
+    id: str
+    status: Literal['queued', 'running', 'done', 'failed']
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[List[MercadoLivreProduct]] = None
+    error: Optional[str] = None
@@ -7,6 +7,7 @@ from datetime import datetime
 
 
 # --- TYPES ---
+from typing import List
 from typing import Literal
 from typing import Optional
 from typing import TypedDict
@@ -27,3 +28,11 @@ class User(TypedDict, total=False):
     updated_at: datetime
     is_active: bool
     role: Literal['user', 'supervisor']
+
+
+class UserPage(TypedDict):
+    """
+    Page of users, with the cursor of the next page (None on the last page).
+    """
+    users: List[User]
+    next_cursor: Optional[str]
@@ -0,0 +1,339 @@
+"""
+Pre-forking multi-worker server.
+"""
+
+# --- IMPORTS ---
+from opty_api.utils.logger import logger
+from uvicorn.importer import import_from_string
+
+import gc
+import os
+import select
+import signal
+import socket
+import time
+import uvicorn
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+
+
+# --- CONSTANTS ---
+RESPAWN_BACKOFF = 1.0
+TICK = 0.5
+KILL_MARGIN = 5.0
+
+
+# --- CODE ---
+def default_workers() -> int:
+    """
+    Get the default number of workers: one per usable CPU core.
+
+    :returns: Number of workers
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+class WorkerServer(uvicorn.Server):
+    """
+    Uvicorn server notifying the supervisor once it accepts connections.
+    """
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int) -> None:
+        """
+        Initialize the server.
+
+        :param config: Uvicorn configuration
+        :param ready_fd: Pipe written to once startup is complete
+        """
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        """
+        Run the app startup, start serving and notify the supervisor.
+
+        :param sockets: Listening sockets shared with the supervisor
+        """
+        await super().startup(sockets=sockets)
+        os.write(self.ready_fd, b'1')
+        os.close(self.ready_fd)
+
+
+class Supervisor:
+    """
+    Pre-fork supervisor.
+
+    The app is imported once in the supervisor and the GC is frozen before forking,
+    so workers share the imported code and objects copy-on-write. Each worker runs the
+    app lifespan itself: every client in the container is created after fork.
+
+    Signals:
+      - SIGHUP:          replace workers one at a time (a worker is stopped only once its
+                         replacement accepts connections)
+      - SIGTERM, SIGINT: stop workers gracefully and exit
+    """
+
+    def __init__(self,  # pylint: disable=R0913,R0917
+                 app: str = 'opty_api.main:app',
+                 host: str = '0.0.0.0',
+                 port: int = 8000,
+                 workers: Optional[int] = None,
+                 backlog: int = 2048,
+                 graceful_timeout: float = 30.0,
+                 **uvicorn_options: Any) -> None:
+        """
+        Initialize the supervisor.
+
+        :param app: App import string
+        :param host: Bind address
+        :param port: Bind port
+        :param workers: Number of workers (one per CPU core if omitted)
+        :param backlog: Listen backlog of the shared socket
+        :param graceful_timeout: Time workers get to finish in-flight requests, in seconds
+        :param uvicorn_options: Extra uvicorn.Config options (loop, http, log_level, access_log...)
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or default_workers()
+        self.backlog = backlog
+        self.graceful_timeout = graceful_timeout
+        self.uvicorn_options = uvicorn_options
+
+        self.sock: Optional[socket.socket] = None
+        self.generation = 0
+        self.children: Dict[int, Dict[str, Any]] = {}
+        self.retiring: Set[int] = set()
+        self.signals: List[int] = []
+        self.spawn_after = 0.0
+
+
+    def run(self) -> None:
+        """
+        Preload the app, fork the workers and supervise them until stopped.
+
+        :raises RuntimeError: If the app created clients at import time
+        """
+
+        # preload app without collecting garbage (collections would dirty shared pages)
+        gc.disable()
+        application = import_from_string(self.app)
+        self.uvicorn_options['app'] = application
+
+        # clients must be created by each worker, after fork
+        from opty_api.app import container  # pylint: disable=C0415
+        created = sorted(set(container) - {'config'})
+        if created:
+            raise RuntimeError(f'Container populated before fork: {", ".join(created)}')
+
+        # bind the socket shared by every worker
+        self.sock = socket.socket(socket.AF_INET6 if ':' in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(self.backlog)
+
+        # move preloaded objects out of the GC so workers never touch their pages
+        gc.freeze()
+
+        # handle signals
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.handle_signal)
+
+        logger.info(f'Supervisor listening on {self.host}:{self.port} with {self.workers} workers',
+                    pid=os.getpid(), workers=self.workers)
+
+        try:
+            self.supervise()
+        finally:
+            self.stop()
+            self.sock.close()
+            logger.stop()
+
+
+    def handle_signal(self, sig: int, frame: Any) -> None:  # pylint: disable=W0613
+        """
+        Queue a signal for the supervision loop.
+
+        :param sig: Signal number
+        :param frame: Current stack frame
+        """
+        self.signals.append(sig)
+
+
+    def supervise(self) -> None:
+        """
+        Keep the expected number of workers running until a stop signal.
+        """
+        while True:
+
+            # handle signals
+            while self.signals:
+                sig = self.signals.pop(0)
+                if sig in (signal.SIGTERM, signal.SIGINT):
+                    return
+                self.generation += 1
+                logger.info('Reloading workers', generation=self.generation)
+
+            self.reap()
+            self.scale()
+            self.wait_ready()
+
+
+    def scale(self) -> None:
+        """
+        Start missing workers and roll old-generation workers over to the current one.
+        """
+        current = [pid for pid, child in self.children.items()
+                   if child['generation'] == self.generation and pid not in self.retiring]
+        old = [pid for pid, child in self.children.items()
+               if child['generation'] != self.generation and pid not in self.retiring]
+        starting = any(not self.children[pid]['ready'] for pid in current)
+
+        # missing workers (startup or crash): start them
+        if len(current) + len(old) < self.workers:
+            if time.monotonic() >= self.spawn_after:
+                self.spawn()
+
+        # reload: start one replacement at a time, then stop an old worker once it serves
+        elif old and not starting:
+            if len(current) + len(old) <= self.workers:
+                self.spawn()
+            else:
+                self.retire(old[0])
+
+
+    def spawn(self) -> None:
+        """
+        Fork a worker.
+        """
+
+        # no thread may run across fork: flush the supervisor logs first
+        logger.stop()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+
+        # worker: serve until stopped (never return into the supervisor loop)
+        if pid == 0:
+            code = 1
+            try:
+                os.close(read_fd)
+                for child in self.children.values():
+                    if child['ready_fd'] is not None:
+                        os.close(child['ready_fd'])
+                code = self.serve(write_fd)
+            finally:
+                os._exit(code)  # pylint: disable=W0212,W0150
+
+        # supervisor: track the worker
+        os.close(write_fd)
+        self.children[pid] = {'generation': self.generation, 'ready': False, 'ready_fd': read_fd}
+        logger.info(f'Worker {pid} started', pid=pid, generation=self.generation)
+
+
+    def serve(self, ready_fd: int) -> int:
+        """
+        Run a worker (in the forked process).
+
+        :param ready_fd: Pipe written to once the worker accepts connections
+        :returns: Exit code
+        """
+
+        # own process group: terminal Ctrl+C only reaches the supervisor
+        os.setpgid(0, 0)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        gc.enable()
+
+        config = uvicorn.Config(lifespan='on', timeout_graceful_shutdown=self.graceful_timeout,
+                                **self.uvicorn_options)
+        server = WorkerServer(config, ready_fd)
+        server.run(sockets=[self.sock])
+        return 0 if server.started else 3
+
+
+    def wait_ready(self) -> None:
+        """
+        Wait a tick for worker startup notifications.
+        """
+        pending = {child['ready_fd']: pid for pid, child in self.children.items() if child['ready_fd'] is not None}
+        try:
+            readable, _, _ = select.select(list(pending), [], [], TICK)
+        except InterruptedError:
+            return
+
+        # a worker writes once it serves; end of file means it exited during startup
+        for fd in readable:
+            child = self.children[pending[fd]]
+            child['ready'] = os.read(fd, 1) == b'1'
+            child['ready_fd'] = None
+            os.close(fd)
+
+
+    def reap(self) -> None:
+        """
+        Collect exited workers.
+        """
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            child = self.children.pop(pid, None)
+            if child is None:
+                continue
+            if child['ready_fd'] is not None:
+                os.close(child['ready_fd'])
+
+            # stopped on purpose: nothing to do
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                logger.info(f'Worker {pid} stopped', pid=pid)
+                continue
+
+            # crashed: replace it (slow down if it did not even start)
+            if not child['ready']:
+                self.spawn_after = time.monotonic() + RESPAWN_BACKOFF
+            logger.warning(f'Worker {pid} exited unexpectedly', pid=pid, status=os.waitstatus_to_exitcode(status))
+
+
+    def retire(self, pid: int) -> None:
+        """
+        Stop a worker gracefully.
+
+        :param pid: Worker process ID
+        """
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+    def stop(self) -> None:
+        """
+        Stop every worker gracefully, killing those that outlive the graceful timeout.
+        """
+        for pid in list(self.children):
+            self.retire(pid)
+
+        # wait for in-flight requests to finish
+        deadline = time.monotonic() + self.graceful_timeout + KILL_MARGIN
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+
+        # kill the remaining workers
+        for pid in list(self.children):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.children.pop(pid)
+        logger.info('Supervisor stopped')
@@ -0,0 +1,146 @@
+"""
+User export service.
+"""
+
+# --- IMPORTS ---
+from datetime import datetime
+from opty_api.app import container
+from opty_api.err.mongodb_unavailable_error import MongoUnavailableError
+from opty_api.utils.logger import logger
+
+import csv
+import io
+import json
+
+
+# --- TYPES ---
+from typing import Any
+from typing import AsyncIterator
+from typing import Literal
+from typing import Optional
+
+
+# --- CONSTANTS ---
+EXPORT_FIELDS = (
+    'supabase_id',
+    'email',
+    'name',
+    'phone',
+    'birthday',
+    'avatar_url',
+    'role',
+    'is_active',
+    'created_at',
+    'updated_at',
+)
+EXPORT_PROJECTION = {'_id': 0, **{field: 1 for field in EXPORT_FIELDS}}
+CHUNK_SIZE = 200
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+# --- CODE ---
+def serialize_value(value: Any) -> Any:
+    """
+    Convert values that JSON and CSV cannot represent.
+
+    :param value: Field value
+
+    :return: Serializable value
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def export_users(export_format: Literal['ndjson', 'csv'],
+                       role: Optional[str] = None,
+                       is_active: Optional[bool] = None) -> AsyncIterator[str]:
+    """
+    Export users as NDJSON lines or CSV rows, as MongoDB returns them.
+
+    Output is written in chunks of CHUNK_SIZE users, so memory use does not depend
+    on the number of users exported.
+
+    :param export_format: Output format (ndjson or csv)
+    :param role: Only export users with this role
+    :param is_active: Only export active (True) or inactive (False) users
+
+    :return: Async iterator of output chunks
+    """
+
+    # CSV writer over a reusable buffer
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+
+    # CSV header
+    if export_format == 'csv':
+        writer.writeheader()
+
+    count = 0
+    try:
+        async for user in container['user_repository'].stream(role=role,
+                                                              is_active=is_active,
+                                                              projection=EXPORT_PROJECTION):
+
+            # write user
+            if export_format == 'csv':
+                writer.writerow({field: value.isoformat() if isinstance(value, datetime) else value
+                                 for field, value in user.items()})
+            else:
+                buffer.write(json.dumps(user, default=serialize_value, ensure_ascii=False))
+                buffer.write('\n')
+            count += 1
+
+            # flush chunk
+            if count % CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+    # MongoDB failed mid-stream: abort the response so the client does not get a truncated export as complete
+    except MongoUnavailableError as e:
+        logger.error(e.args[1], exported=count)
+        raise
+
+    # flush last chunk
+    if buffer.tell():
+        yield buffer.getvalue()
+
+    logger.info(f'Exported {count} users', export_format=export_format, exported=count)
+
+
+async def open_export(export_format: Literal['ndjson', 'csv'],
+                      role: Optional[str] = None,
+                      is_active: Optional[bool] = None) -> AsyncIterator[str]:
+    """
+    Start a user export, reading its first chunk before the response is sent.
+
+    Errors before any output (MongoDB unavailable) are raised here, so they are
+    answered with an error status instead of an empty export.
+
+    :param export_format: Output format (ndjson or csv)
+    :param role: Only export users with this role
+    :param is_active: Only export active (True) or inactive (False) users
+
+    :return: Async iterator of output chunks
+
+    :raises MongoUnavailableError: If the export cannot start
+    """
+    chunks = export_users(export_format, role=role, is_active=is_active)
+
+    # read first chunk (none when there is nothing to export)
+    try:
+        first = await chunks.asend(None)
+    except StopAsyncIteration:
+        first = None
+
+    async def resume() -> AsyncIterator[str]:
+        if first is not None:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return resume()
@@ -3,6 +3,7 @@ Service: forgot password (Supabase)
 """
 
 from opty_api.app import container
+from opty_api.utils.logger import logger
 
 
 async def send_reset_password_email(email: str) -> None:
@@ -28,4 +29,4 @@ async def send_reset_password_email(email: str) -> None:
     # Se quiser, pode logar algum erro:
     if response is not None and getattr(response, "error", None):
         # só loga, não joga erro pra fora
-        print("[send_reset_password_email] error:", response.error)
+        logger.warning(f"[send_reset_password_email] error: {response.error}")
@@ -4,7 +4,6 @@ User registration service.
 
 # --- IMPORTS ---
 from opty_api.app import container
-from opty_api.err.already_exists_error import AlreadyExistsError
 from opty_api.err.supabase_error import SupabaseError
 
 
@@ -18,6 +17,10 @@ async def register_user(user_data: User) -> AuthResponse:
     """
     Register a new user in Supabase and create user profile in MongoDB.
 
+    The profile is reserved before the Supabase account is created, so a duplicate
+    email is rejected by the unique index without a prior lookup and without
+    creating the Supabase account.
+
     :param user_data: User data for registration.
 
     :return: AuthResponse from Supabase.
@@ -27,10 +30,18 @@ async def register_user(user_data: User) -> AuthResponse:
     :raises MongoUnavailableError: If MongoDB operation fails.
     """
 
-    # Check if user already exists in MongoDB
-    user = await container['user_repository'].get_by_email(user_data['email'])
-    if user:
-        raise AlreadyExistsError('User with this email already exists')
+    # Create user profile document
+    user_document: User = {
+        'email': user_data['email'],
+        'name': user_data['name'],
+        'phone': user_data['phone'],
+        'birthday': user_data['birthday'],
+        'role': 'user',
+        'avatar_url': None,
+    }
+
+    # Reserve user profile in MongoDB (fails if the email is taken)
+    pending_id = await container['user_repository'].reserve_user(user_document)
 
     # Create user in Supabase Auth
     try:
@@ -39,31 +50,18 @@ async def register_user(user_data: User) -> AuthResponse:
             'password': user_data['password'],
         })
 
-    # Supabase registration failed: raise custom error
+    # Supabase registration failed: release reservation and raise custom error
     except Exception as e:
+        await container['user_repository'].release_reservation(pending_id)
         raise SupabaseError(f'[SUPABASE  ] registration failed: {str(e)}') from e
 
-    # User creation failed: raise custom error
+    # User creation failed: release reservation and raise custom error
     if not auth_response.user:
+        await container['user_repository'].release_reservation(pending_id)
         raise SupabaseError('[SUPABASE  ] Failed to create user in Supabase')
 
-    # Get the created Supabase user
-    supabase_user = auth_response.user
-
-    # Create user profile document
-    user_document: User = {
-        'supabase_id': supabase_user.id,
-        'email': user_data['email'],
-        'name': user_data['name'],
-        'phone': user_data['phone'],
-        'birthday': user_data['birthday'],
-        'is_active': True,
-        'role': 'user',
-        'avatar_url': None,
-    }
-
-    # Insert user profile into MongoDB
-    await container['user_repository'].add_user(user_document)
+    # Activate user profile with the created Supabase user
+    await container['user_repository'].confirm_reservation(pending_id, auth_response.user.id)
 
     # Return response
     return auth_response
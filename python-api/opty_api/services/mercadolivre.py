@@ -1,120 +1,294 @@
 # --- IMPORTS ---
 import httpx
-from bs4 import BeautifulSoup
-from typing import List
+import json
+from decimal import Decimal
+from typing import Any, List, Optional
 from urllib.parse import quote_plus
+from opty_api.app import container
 from opty_api.schemas.mercadolivre import MercadoLivreProduct
 from fastapi import HTTPException
+from opty_api.err.queue_timeout_error import QueueTimeoutError
+from opty_api.utils.logger import logger
+from opty_api.utils.tracing import tracer
+
+
+# --- CONSTANTS ---
+PAGE_SIZE = 48
+STATE_MARKER = b'__PRELOADED_STATE__'
+MAX_STATE_BYTES = 8 * 2**20
+IMAGE_URL = 'https://http2.mlstatic.com/D_NQ_NP_{}-O.webp'
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 Opty-Api Scraper'}
 
 
 # --- CODE ---
-async def scrape_mercadolivre(query: str) -> List[MercadoLivreProduct]:
-    base_url = "https://lista.mercadolivre.com.br/"
-    search_url = f"{base_url}{quote_plus(query)}"
-    products: List[MercadoLivreProduct] = []
+async def scrape_mercadolivre(query: str, page: int = 1) -> List[MercadoLivreProduct]:
+    """
+    Busca a página de resultados do Mercado Livre e extrai os produtos.
+
+    :param query: Termo de busca
+    :param page: Página de resultados (a partir de 1)
+    :return: Lista de produtos encontrados
+    """
+    search_url = f"{container['config'].MERCADOLIVRE_URL}{quote_plus(query)}"
+
+    # Páginas seguintes começam no item (page - 1) * PAGE_SIZE + 1
+    if page > 1:
+        search_url += f"_Desde_{(page - 1) * PAGE_SIZE + 1}"
 
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 Opty-Api Scraper'}
+    # Scraping compartilhado entre requisições: limitado só pelo próprio timeout (cada uma espera até o seu prazo)
+    timeout = container['config'].SCRAPE_TIMEOUT
 
-    async with httpx.AsyncClient(headers=headers, follow_redirects=True, timeout=20.0) as client:
+    async with httpx.AsyncClient(headers=HEADERS, follow_redirects=True, timeout=timeout) as client:
         try:
-            print(f"\n[DEBUG ML] Buscando por: {search_url}")
+            content = await fetch_mercadolivre(client, search_url)
+
+            # Arquiva o HTML bruto (permite re-extrair os produtos sem buscar de novo)
+            if container.get('html_archive') is not None:
+                container['html_archive'].store(query, page, content)
+            return parse_mercadolivre(content)
+
+        # Fila de requisições ao Mercado Livre cheia por tempo demais
+        except QueueTimeoutError as e:
+            raise HTTPException(status_code=503,
+                                detail="Muitas buscas em andamento, tente novamente em instantes.") from e
+
+        # Captura de erros HTTP e de Conexão
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(status_code=503, detail=f"Erro ao acessar Mercado Livre: {e.response.status_code}")
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=504, detail="Erro de conexão ou timeout ao acessar Mercado Livre.")
+        except Exception as e:
+            logger.error(f"Erro inesperado no scraping: {e}")
+            raise HTTPException(status_code=500, detail="Erro interno ao processar dados de scraping.")
+
+
+async def fetch_mercadolivre(client: httpx.AsyncClient, search_url: str) -> bytes:
+    """
+    Baixa a página de resultados.
+
+    :param client: Cliente HTTP
+    :param search_url: URL da página de resultados
+    :return: HTML da página
+    :raises httpx.HTTPStatusError: Se o Mercado Livre responder com erro
+    :raises QueueTimeoutError: Se a requisição esperar demais na fila
+    """
+    with tracer.span('scrape.fetch', url=search_url) as span:
+        logger.debug(f"[ML] Buscando por: {search_url}")
+
+        scheduler = container['scrape_scheduler']
+
+        async def request() -> httpx.Response:
             response = await client.get(search_url)
             response.raise_for_status()
+            return response
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+        async def hedge() -> httpx.Response:
+            # A segunda tentativa só usa uma vaga livre: não entra na fila nem conta para o usuário
+            async with scheduler.spare_slot():
+                return await request()
 
-            # Seletor principal (confirmado como funcional)
-            item_selector = 'li.ui-search-layout__item'
-            items_found = soup.select(item_selector)
-            
-            print(f"[DEBUG ML] Total de itens encontrados com o seletor '{item_selector}': {len(items_found)}")
+        # Aguarda a vez do usuário na fila justa de requisições ao Mercado Livre; depois,
+        # requisições lentas ganham uma segunda tentativa idêntica (a primeira resposta vence)
+        async with scheduler.slot():
+            response = await container['scrape_hedger'].run(request, hedge, admit=lambda: scheduler.spare() > 0)
+        span.set_attribute('status_code', response.status_code)
+        return response.content
+
+
+def parse_mercadolivre(content: bytes) -> List[MercadoLivreProduct]:
+    """
+    Extrai os produtos da página de resultados: do estado JSON embutido na página
+    (rápido, sem montar o DOM) ou, se ele não existir ou mudar de formato, do HTML.
+
+    :param content: HTML da página
+    :return: Lista de produtos encontrados
+    """
+    with tracer.span('scrape.parse', size=len(content)) as span:
+        products = parse_preloaded_state(content)
+        span.set_attribute('source', 'state' if products else 'dom')
+
+        # Estado ausente ou irreconhecível: extrai do HTML
+        if not products:
+            products = parse_mercadolivre_html(content)
+
+        span.set_attribute('products', len(products))
+        return products
+
+
+def parse_preloaded_state(content: bytes) -> Optional[List[MercadoLivreProduct]]:
+    """
+    Extrai os produtos do estado embutido na página (__PRELOADED_STATE__), sem montar o DOM.
+    O blob é localizado por uma busca de bytes e só ele é decodificado (no máximo MAX_STATE_BYTES).
+
+    :param content: HTML da página
+    :return: Lista de produtos encontrados, ou None se o estado não existir ou não for reconhecido
+    """
+
+    # Localiza o início do objeto JSON depois do marcador
+    marker = content.find(STATE_MARKER)
+    start = content.find(b'{', marker) if marker >= 0 else -1
+    if start < 0:
+        return None
+
+    # Decodifica só o blob (raw_decode para no fim do objeto); preços como Decimal (exatos)
+    try:
+        blob = content[start:start + MAX_STATE_BYTES].decode('utf-8', errors='replace')
+        state, _ = json.JSONDecoder(parse_float=Decimal).raw_decode(blob)
+        results = state['pageState']['initialState']['results']
+    except (ValueError, KeyError, TypeError) as e:
+        logger.debug(f"[ML] Estado embutido não reconhecido: {e}")
+        return None
+
+    products = [product for product in map(map_state_item, results) if product is not None]
+    logger.debug(f"[ML] {len(products)} de {len(results)} itens extraídos do estado embutido.")
+    return products
+
+
+def map_state_item(item: Any) -> Optional[MercadoLivreProduct]:
+    """
+    Converte um resultado do estado embutido em produto (formato "polycard" ou o formato antigo).
+
+    :param item: Resultado do estado embutido
+    :return: Produto, ou None se faltar título, link ou preço
+    """
+    try:
+        # Formato atual: componentes do card
+        card = item.get('polycard')
+        if isinstance(card, dict):
+            components = {component.get('type'): component for component in card.get('components', [])}
+            title = components.get('title', {}).get('title', {}).get('text')
+            price = components.get('price', {}).get('price', {}).get('current_price', {}).get('value')
+            link = card.get('metadata', {}).get('url')
+            pictures = card.get('pictures', {}).get('pictures') or [{}]
+            image = IMAGE_URL.format(pictures[0]['id']) if pictures[0].get('id') else None
+
+        # Formato antigo: campos do item
+        else:
+            title = item.get('title')
+            price = item['price'].get('amount') if isinstance(item.get('price'), dict) else item.get('price')
+            link = item.get('permalink')
+            image = item.get('thumbnail')
+
+        # Mesma validação do HTML: título, link e preço obrigatórios
+        if not title or not link or price is None or Decimal(price) <= 0:
+            return None
+        if not link.startswith(('http://', 'https://')):
+            link = f'https://{link.lstrip("/")}'
+        return MercadoLivreProduct(title=title, price=format_price(Decimal(price)), link=link, image=image)
+
+    # Item em formato inesperado: ignora
+    except (AttributeError, TypeError, KeyError, IndexError, ValueError, ArithmeticError):
+        return None
+
+
+def format_price(value: Decimal) -> str:
+    """
+    Formata um preço como no HTML da página (ex.: "R$ 1299,90", "R$ 1299").
+
+    :param value: Preço
+    :return: Preço formatado
+    """
+    fraction = int(value)
+    cents = int((value - fraction) * 100)
+    return f"R$ {fraction},{cents:02d}" if cents else f"R$ {fraction}"
+
+
+def parse_mercadolivre_html(content: bytes) -> List[MercadoLivreProduct]:
+    """
+    Extrai os produtos do HTML da página de resultados (montando o DOM).
+
+    :param content: HTML da página
+    :return: Lista de produtos encontrados
+    """
+    # bs4 é importado só na primeira busca (acelera o startup)
+    from bs4 import BeautifulSoup  # pylint: disable=C0415
+
+    with tracer.span('scrape.parse_html', size=len(content)):
+        products: List[MercadoLivreProduct] = []
+
+        soup = BeautifulSoup(content, 'html.parser')
+
+        # Seletor principal (confirmado como funcional)
+        item_selector = 'li.ui-search-layout__item'
+        items_found = soup.select(item_selector)
+        
+        logger.debug(f"[ML] Total de itens encontrados com o seletor '{item_selector}': {len(items_found)}")
+        
+        # Seletor de Título CONFIRMADO: Tag H3 com as classes
+        TITLE_SELECTOR = 'h3.ui-search-item__title.shops__item-title'
+
+        for i, item in enumerate(items_found):
+            title, link, final_price, image_url = 'N/A', 'Link não encontrado', 'Preço não encontrado', None
             
-            # Seletor de Título CONFIRMADO: Tag H3 com as classes
-            TITLE_SELECTOR = 'h3.ui-search-item__title.shops__item-title'
+            try:
+                # 1. Título (USANDO H3 E CLASSES CONFIRMADAS)
+                title_element = item.select_one(TITLE_SELECTOR)
+                if not title_element:
+                     # Fallback para qualquer H3
+                     title_element = item.select_one('h3')
 
-            for i, item in enumerate(items_found):
-                title, link, final_price, image_url = 'N/A', 'Link não encontrado', 'Preço não encontrado', None
+                title = title_element.get_text(strip=True) if title_element else 'Título não encontrado'
                 
-                try:
-                    # 1. Título (USANDO H3 E CLASSES CONFIRMADAS)
-                    title_element = item.select_one(TITLE_SELECTOR)
-                    if not title_element:
-                         # Fallback para qualquer H3
-                         title_element = item.select_one('h3')
-
-                    title = title_element.get_text(strip=True) if title_element else 'Título não encontrado'
-                    
-                    # 2. Link (BUSCA MAIS SIMPLIFICADA E ABRANGENTE: A primeira tag <a> com href dentro do item)
-                    # Isso deve encontrar o link principal, já que ele é o elemento mais proeminente com href.
-                    link_element = item.select_one('a[href]')
+                # 2. Link (BUSCA MAIS SIMPLIFICADA E ABRANGENTE: A primeira tag <a> com href dentro do item)
+                # Isso deve encontrar o link principal, já que ele é o elemento mais proeminente com href.
+                link_element = item.select_one('a[href]')
 
-                    # Extrai o href
-                    link = link_element.get('href') if link_element and link_element.get('href') else 'Link não encontrado'
+                # Extrai o href
+                link = link_element.get('href') if link_element and link_element.get('href') else 'Link não encontrado'
+                
+                # 3. Preço (Lógica que estava funcionando)
+                price_fraction_element = item.select_one('.andes-money-amount__fraction')
+                
+                if price_fraction_element:
+                    fraction = price_fraction_element.get_text(strip=True).replace('.', '')
+                    cents_element = item.select_one('.andes-money-amount__cents')
+                    cents = cents_element.get_text(strip=True) if cents_element else ''
                     
-                    # 3. Preço (Lógica que estava funcionando)
-                    price_fraction_element = item.select_one('.andes-money-amount__fraction')
+                    final_price = f"R$ {fraction},{cents}" if cents else f"R$ {fraction}"
                     
-                    if price_fraction_element:
-                        fraction = price_fraction_element.get_text(strip=True).replace('.', '')
-                        cents_element = item.select_one('.andes-money-amount__cents')
-                        cents = cents_element.get_text(strip=True) if cents_element else ''
-                        
-                        final_price = f"R$ {fraction},{cents}" if cents else f"R$ {fraction}"
-                        
-                        if fraction == '0' and not cents:
-                             final_price = 'Preço não encontrado'
-                        # 4. Imagem
-                        # Tenta pegar a imagem do produto usando seletores mais genéricos
-                        img_element = (
-                            item.select_one("img.ui-search-result-image__element")  # seletor antigo
-                            or item.select_one("img.shops__image-element")          # outro seletor comum
-                            or item.select_one("img")                               # fallback genérico
-                        )
+                    if fraction == '0' and not cents:
+                         final_price = 'Preço não encontrado'
+                    # 4. Imagem
+                    # Tenta pegar a imagem do produto usando seletores mais genéricos
+                    img_element = (
+                        item.select_one("img.ui-search-result-image__element")  # seletor antigo
+                        or item.select_one("img.shops__image-element")          # outro seletor comum
+                        or item.select_one("img")                               # fallback genérico
+                    )
 
-                        image_url = None
-                        if img_element:
-                            # Mercado Livre costuma usar lazy-loading com data-src
-                            image_url = img_element.get("data-src") or img_element.get("src")
+                    image_url = None
+                    if img_element:
+                        # Mercado Livre costuma usar lazy-loading com data-src
+                        image_url = img_element.get("data-src") or img_element.get("src")
 
-                            # Se vier uma data URI (placeholder 1x1), ignoramos
-                            if image_url and image_url.startswith("data:"):
-                                image_url = None
+                        # Se vier uma data URI (placeholder 1x1), ignoramos
+                        if image_url and image_url.startswith("data:"):
+                            image_url = None
 
-                    
+                
 
-                    # Validação final (que estava impedindo a array de encher)
-                    if 'não encontrado' not in title and 'não encontrado' not in link and 'não encontrado' not in final_price:
-                        products.append(
-                            MercadoLivreProduct(
-                                title=title,
-                                price=final_price,
-                                link=link,
-                                image=image_url
-                            )
+                # Validação final (que estava impedindo a array de encher)
+                if 'não encontrado' not in title and 'não encontrado' not in link and 'não encontrado' not in final_price:
+                    products.append(
+                        MercadoLivreProduct(
+                            title=title,
+                            price=final_price,
+                            link=link,
+                            image=image_url
                         )
-                    
-                    # Mantém o debug para o primeiro item
-                    if i == 0:
-                        print(f"[DEBUG ML - ITEM 1 RESULTADO FINAL] Título: {title}")
-                        print(f"[DEBUG ML - ITEM 1 RESULTADO FINAL] Link: {link}")
-                        print(f"[DEBUG ML - ITEM 1 RESULTADO FINAL] Preço: {final_price}")
+                    )
+                
+                # Mantém o debug para o primeiro item
+                if i == 0:
+                    logger.debug("[ML] Item 1 resultado final", title=title, link=link, price=final_price)
 
 
-                except Exception as e:
-                    if i == 0:
-                        print(f"[DEBUG ML - ITEM 1 ERRO GERAL] {e}")
-                    continue
-            
-            if products:
-                print(f"[DEBUG ML - SUCESSO COMPLETO] {len(products)} itens extraídos com sucesso.")
-            
-            return products
+            except Exception as e:
+                if i == 0:
+                    logger.debug(f"[ML] Item 1 erro geral: {e}")
+                continue
+        
+        if products:
+            logger.debug(f"[ML] {len(products)} itens extraídos com sucesso.")
 
-        # Captura de erros HTTP e de Conexão
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=503, detail=f"Erro ao acessar Mercado Livre: {e.response.status_code}")
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=504, detail="Erro de conexão ou timeout ao acessar Mercado Livre.")
-        except Exception as e:
-            print(f"Erro inesperado no scraping: {e}")
-            raise HTTPException(status_code=500, detail="Erro interno ao processar dados de scraping.")
\ No newline at end of file
+        return products
@@ -0,0 +1,58 @@
+"""
+Dependency readiness checks.
+"""
+
+# --- IMPORTS ---
+from opty_api.app import container
+from opty_api.services.mercadolivre import HEADERS
+
+import httpx
+
+
+# --- CONSTANTS ---
+PROBE_TIMEOUT = 5.0
+
+
+# --- CODE ---
+async def ping_mongodb() -> None:
+    """
+    Ping the MongoDB server.
+
+    :raises Exception: If MongoDB is unreachable
+    """
+    await container['mongodb'].client.admin.command('ping')
+
+
+async def check_supabase() -> None:
+    """
+    Check that the Supabase Auth API is up.
+
+    :raises httpx.HTTPError: If Supabase Auth is unreachable or unhealthy
+    """
+    supabase_url = container['config'].SUPABASE_URL.rstrip('/')
+    async with httpx.AsyncClient(timeout=PROBE_TIMEOUT) as client:
+        response = await client.get(f'{supabase_url}/auth/v1/health',
+                                    headers={'apikey': container['config'].SUPABASE_KEY})
+        response.raise_for_status()
+
+
+async def check_openai() -> None:
+    """
+    Check that the OpenAI API accepts our credentials.
+
+    :raises openai.OpenAIError: If OpenAI is unreachable or rejects the key
+    """
+    openai_client = await container['openai_client'].get()
+    await openai_client.with_options(max_retries=0).models.list()
+
+
+async def check_mercadolivre() -> None:
+    """
+    Check that Mercado Livre is reachable (any non-5xx answer counts).
+
+    :raises httpx.HTTPError: If Mercado Livre is unreachable or failing
+    """
+    async with httpx.AsyncClient(headers=HEADERS, timeout=PROBE_TIMEOUT) as client:
+        response = await client.head(container['config'].MERCADOLIVRE_URL)
+        if response.status_code >= 500:
+            response.raise_for_status()
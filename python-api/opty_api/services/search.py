@@ -0,0 +1,345 @@
+"""
+Busca de produtos: normalização da query (OpenAI) e scraping do Mercado Livre.
+"""
+
+# --- IMPORTS ---
+from opty_api.app import container
+from opty_api.schemas.mercadolivre import MercadoLivreProduct
+from opty_api.schemas.user import User
+from opty_api.services.mercadolivre import parse_mercadolivre
+from opty_api.services.mercadolivre import scrape_mercadolivre
+from opty_api.utils.deadline import deadline_var
+from opty_api.utils.deadline import run_with_deadline
+from opty_api.utils.deadline import set_deadline
+from opty_api.utils.deadline import stage_timeout
+from opty_api.utils.logger import logger
+from opty_api.utils.prompts import get_query_prompt
+from opty_api.utils.ranking import Bm25Index
+from opty_api.utils.ranking import query_weights
+from opty_api.utils.scheduler import tenant_var
+from opty_api.utils.stats import describe
+from opty_api.utils.tracing import tracer
+
+import asyncio
+import re
+import unicodedata
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+
+# --- CONSTANTS ---
+NORMALIZATION_MODEL = 'gpt-4.1-mini-2025-04-14'
+MAX_EMPTY_PAGES = 50
+
+# Palavras que a normalização sempre remove (saudações, pedidos e adjetivos genéricos)
+FILLER_WORDS = frozenset({
+    'olá', 'ola', 'oi', 'bom', 'boa', 'dia', 'tarde', 'noite', 'gostaria', 'queria', 'quero', 'preciso',
+    'procuro', 'procurando', 'buscando', 'comprar', 'favor', 'barato', 'barata', 'baratos', 'baratas',
+    'legal', 'legais', 'desconto', 'promoção', 'promocao', 'algo', 'alguma', 'algum', 'coisa', 'produto',
+})
+
+# Palavras que não começam nem terminam uma query normalizada
+EDGE_WORDS = frozenset({'de', 'do', 'da', 'um', 'uma', 'o', 'a', 'e', 'com', 'por', 'para', 'pra', 'me', 'eu'})
+
+
+# --- CODE ---
+def query_key(query: str) -> str:
+    """
+    Chave de deduplicação de uma busca: mesma query a menos de caixa e espaços.
+
+    :param query: Termo de busca do usuário
+    :return: Chave da busca
+    """
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
+
+
+def clean_query(query: str) -> str:
+    """
+    Limpeza local do termo de busca (palpite barato da normalização da OpenAI).
+    Queries já limpas ("iPhone 15 Pro Max") saem iguais.
+
+    :param query: Termo de busca do usuário
+    :return: Termo de busca sem saudações, pedidos e adjetivos genéricos
+    """
+    words = [word for word in re.findall(r'[\w+.\-/]+', query) if word.casefold() not in FILLER_WORDS]
+
+    # Strip dangling articles and prepositions
+    while words and words[0].casefold() in EDGE_WORDS:
+        words.pop(0)
+    while words and words[-1].casefold() in EDGE_WORDS:
+        words.pop()
+    return ' '.join(words)
+
+
+def set_tenant(user: Optional[User], client_ip: Optional[str]) -> None:
+    """
+    Define em nome de quem as requisições ao Mercado Livre são feitas (fila justa).
+    Usuários autenticados são identificados pelo ID, anônimos pelo IP.
+
+    :param user: Usuário autenticado, ou None
+    :param client_ip: IP do cliente
+    """
+    config = container['config']
+
+    # Anonymous client: keyed by IP
+    if user is None:
+        tenant_var.set((f'ip:{client_ip or "unknown"}', config.SCRAPE_ANONYMOUS_WEIGHT))
+        return
+
+    # Authenticated user: supervisors get a larger share
+    weight = config.SCRAPE_SUPERVISOR_WEIGHT if user['role'] == 'supervisor' else config.SCRAPE_USER_WEIGHT
+    tenant_var.set((f'user:{user["supabase_id"]}', weight))
+
+
+async def normalize_query(query: str) -> str:
+    """
+    Reescreve o termo de busca do usuário com a OpenAI.
+
+    :param query: Termo de busca do usuário
+    :return: Termo de busca normalizado
+    """
+
+    # Get OpenAI client (waits for it to warm up after startup)
+    openai_client = await container['openai_client'].get()
+
+    # Normalize the query using OpenAI
+    with tracer.span('search.normalize', query=query):
+        completion = await openai_client.chat.completions.create(
+            model=NORMALIZATION_MODEL,
+            temperature=0.2,
+            messages=get_query_prompt(query)
+        )
+
+    # Log the normalized query
+    final_query = completion.choices[0].message.content
+    logger.debug(f'Final normalized query: {final_query}')
+    return final_query
+
+
+async def normalize_or_fallback(query: str, fallback: str) -> str:
+    """
+    Normaliza o termo de busca, ou usa o termo de fallback se a OpenAI não responder a tempo.
+
+    :param query: Termo de busca do usuário
+    :param fallback: Termo de busca usado se o prazo da normalização esgotar
+    :return: Termo de busca normalizado (ou o fallback)
+    """
+    timeout = stage_timeout(container['config'].SEARCH_NORMALIZE_TIMEOUT)
+    try:
+        # Same query normalized recently (e.g. asking for the next page): reuse it
+        normalized = container['search_queries'].get(query_key(query), lambda: normalize_query(query))
+        return await asyncio.wait_for(normalized, timeout=timeout)
+
+    # Normalization too slow: search the raw query instead
+    except asyncio.TimeoutError:
+        logger.warning(f'Query normalization timed out after {timeout:.3f}s, searching the raw query')
+        return fallback
+
+
+async def search_products(query: str, page: int = 1, rank: bool = False) -> List[MercadoLivreProduct]:
+    """
+    Normaliza o termo de busca e busca os produtos no Mercado Livre.
+    Com a especulação ligada, a busca da query limpa localmente começa junto com a
+    normalização e é aproveitada se a query normalizada for a mesma.
+    A normalização tem o tempo que resta até o prazo da requisição (deadline_var); o
+    scraping é compartilhado e roda sem esse prazo, mas a requisição só espera por ele
+    até o próprio prazo.
+    Depois da busca, a página seguinte é buscada em background (prefetch).
+
+    :param query: Termo de busca do usuário
+    :param page: Página de resultados (a partir de 1)
+    :param rank: Reordena os produtos pela relevância do título para a query original e a normalizada
+    :return: Lista de produtos encontrados
+    :raises HTTPException: Se o scraping falhar
+    :raises DeadlineExceededError: Se o prazo esgotar antes do fim do scraping
+    """
+    cleaned = clean_query(query)
+    guess = cleaned if container['config'].SEARCH_SPECULATION else None
+    normalized = normalize_or_fallback(query, fallback=cleaned or query)
+    final_query, products = await container['search_speculator'].run(
+        guess,
+        normalized,
+        lambda search_query: scrape_shared(search_query, page),
+        key=lambda search_query: (query_key(search_query), page)
+    )
+
+    # Count pages served from a prefetch and prefetch the next one
+    container['search_prefetcher'].served((query_key(final_query), page))
+    prefetch_next_page(final_query, page, products)
+
+    # Re-rank by relevance (Mercado Livre order has sponsored items first)
+    if rank:
+        products = rank_products(products, query, final_query)
+    return products
+
+
+def rank_products(products: List[MercadoLivreProduct], *queries: str) -> List[MercadoLivreProduct]:
+    """
+    Reordena os produtos pela relevância (BM25) dos títulos para as queries.
+    O índice dos títulos é montado uma vez por lista de resultados em cache.
+
+    :param products: Produtos (lista servida pelo cache de resultados, não é alterada)
+    :param queries: Termos de busca (ex.: o original do usuário e o normalizado)
+    :return: Nova lista de produtos, do mais relevante ao menos relevante
+    """
+    with tracer.span('search.rank', products=len(products)):
+        index = derived(products, 'bm25', lambda items: Bm25Index([p.title for p in items]))
+        return [products[i] for i in index.rank(query_weights(queries))]
+
+
+def prefetch_next_page(query: str, page: int, products: List[MercadoLivreProduct]) -> None:
+    """
+    Busca a próxima página em background, se for provável que o usuário a peça.
+
+    :param query: Termo de busca normalizado
+    :param page: Página servida
+    :param products: Produtos da página servida
+    """
+    config = container['config']
+
+    # Prefetch disabled, too deep or last page (few results)
+    if not config.SEARCH_PREFETCH or page >= config.SEARCH_PREFETCH_MAX_PAGE:
+        return
+    if len(products) < config.SEARCH_PREFETCH_MIN_RESULTS:
+        return
+
+    container['search_prefetcher'].prefetch((query_key(query), page + 1),
+                                            lambda: scrape_prefetch(query, page + 1))
+
+
+async def scrape_prefetch(query: str, page: int) -> List[MercadoLivreProduct]:
+    """
+    Busca uma página em background, com baixa prioridade e sem o prazo da requisição que a disparou.
+
+    :param query: Termo de busca normalizado
+    :param page: Página de resultados
+    :return: Lista de produtos encontrados
+    """
+    tenant_var.set(('prefetch', container['config'].SEARCH_PREFETCH_WEIGHT))
+    return await scrape_shared(query, page)
+
+
+async def scrape_shared(query: str, page: int) -> List[MercadoLivreProduct]:
+    """
+    Busca uma página para o cache de resultados, sem o prazo da requisição que a disparou:
+    outras requisições podem esperar pela mesma busca, cada uma até o próprio prazo.
+
+    :param query: Termo de busca normalizado
+    :param page: Página de resultados
+    :return: Lista de produtos encontrados
+    """
+    deadline_var.set(None)
+    return await scrape_mercadolivre(query, page)
+
+
+def price_value(price: str) -> Optional[float]:
+    """
+    Converte um preço formatado ("R$ 1299,90") em número.
+
+    :param price: Preço formatado
+    :return: Preço, ou None se não for numérico
+    """
+    try:
+        return float(price.removeprefix('R$').strip().replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def price_stats(products: List[MercadoLivreProduct]) -> Dict[str, Any]:
+    """
+    Estatísticas dos preços de uma lista de produtos, calculadas uma vez por lista em cache.
+
+    :param products: Produtos (lista servida pelo cache de resultados)
+    :return: Contagem, mínimo, máximo, média, mediana, percentis, histograma e índices dos preços atípicos
+    """
+    return derived(products, 'price_stats', describe_prices)
+
+
+def describe_prices(products: List[MercadoLivreProduct]) -> Dict[str, Any]:
+    """
+    Calcula as estatísticas dos preços numéricos, marcando os atípicos pelo índice do produto.
+
+    :param products: Produtos
+    :return: Estatísticas dos preços
+    """
+    indexed = [(i, value) for i, value in enumerate(map(price_value, (p.price for p in products))) if value is not None]
+    stats = describe([value for _, value in indexed])
+    stats['outliers'] = [i for (i, _), outlier in zip(indexed, stats['outliers']) if outlier]
+    return stats
+
+
+def derived(products: List[MercadoLivreProduct], name: str, compute: Callable[[List[MercadoLivreProduct]], Any]) -> Any:
+    """
+    Valor derivado de uma lista de resultados (estatísticas, índice de ranking...), calculado uma vez por lista.
+
+    :param products: Produtos (lista servida pelo cache de resultados)
+    :param name: Nome do valor derivado
+    :param compute: Função que calcula o valor
+    :return: Valor derivado
+    """
+
+    # Same result set: reuse the value (the entry holds the list, so its id is not reused)
+    key = (name, id(products))
+    cached = container['search_derived'].get(key)
+    if cached is not None and cached[0] is products:
+        return cached[1]
+
+    value = compute(products)
+    container['search_derived'].set(key, (products, value))
+    return value
+
+
+async def reparse_archive(max_age: Optional[float], dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Re-extrai os produtos das páginas arquivadas com o parser atual e reconstrói o cache de resultados
+    (ex.: depois de corrigir seletores quebrados por mudanças no HTML do Mercado Livre).
+
+    :param max_age: Só páginas arquivadas há no máximo esse tempo, em segundos (padrão: TTL do cache)
+    :param dry_run: Só conta os produtos, sem alterar o cache
+    :return: Páginas e produtos extraídos, páginas sem produtos e falhas
+    """
+    archive = container['html_archive']
+    max_age = max_age or container['config'].SEARCH_CACHE_TTL
+    report: Dict[str, Any] = {'pages': 0, 'products': 0, 'failures': 0, 'empty_pages': []}
+
+    # Parse archived pages off the event loop
+    for snapshot in await asyncio.to_thread(list, archive.snapshots(max_age)):
+        try:
+            content = await asyncio.to_thread(archive.load, snapshot)
+            products = await asyncio.to_thread(parse_mercadolivre, content)
+        except Exception as e:  # pylint: disable=W0718
+            logger.warning(f'Failed to re-parse archived page {snapshot.path}: {e}')
+            report['failures'] += 1
+            continue
+
+        # Page without products: selectors probably still broken
+        report['pages'] += 1
+        report['products'] += len(products)
+        if not products and len(report['empty_pages']) < MAX_EMPTY_PAGES:
+            report['empty_pages'].append({'query': snapshot.query, 'page': snapshot.page})
+
+        # Rebuild cached results
+        if not dry_run:
+            container['search_results'].set((query_key(snapshot.query), snapshot.page), products)
+
+    logger.info(f'Re-parsed {report["pages"]} archived pages: {report["products"]} products')
+    return report
+
+
+async def run_search_job(search: Tuple[str, int]) -> List[Dict[str, Any]]:
+    """
+    Executa uma busca em background (handler da fila de jobs de busca).
+
+    :param search: Termo de busca do usuário e página de resultados
+    :return: Produtos encontrados, serializados
+    :raises DeadlineExceededError: Se a busca passar do prazo dos jobs
+    """
+    set_deadline(container['config'].SEARCH_JOB_DEADLINE)
+    return [product.model_dump() for product in await run_with_deadline(search_products(*search))]
@@ -0,0 +1,229 @@
+"""
+Compressed on-disk archive of fetched pages.
+"""
+
+# --- IMPORTS ---
+from collections import deque
+from opty_api.utils.logger import logger
+from pathlib import Path
+
+import asyncio
+import hashlib
+import importlib
+import os
+import threading
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+
+# --- CONSTANTS ---
+SUFFIX = '.html.zst'
+QUERY_FILE = 'query'
+
+
+# --- CODE ---
+class Snapshot(NamedTuple):
+    """
+    Archived page.
+    """
+    query: str
+    page: int
+    timestamp: float
+    path: Path
+
+
+class HtmlArchive:
+    """
+    Size-bounded archive of fetched result pages, zstd-compressed.
+
+    Pages are stored as <root>/<query digest>/<unix ms>-<page>.html.zst, next to a
+    `query` file holding the query, so they can be found by query and time. Writes
+    happen in a worker thread; once the archive outgrows `max_bytes` the oldest pages
+    are deleted. Each process only accounts for the pages it knows of (found on open
+    or written by itself), so several workers sharing a directory may briefly
+    exceed the limit.
+    """
+
+    def __init__(self, root: str, max_bytes: int, level: int = 10) -> None:
+        """
+        Initialize the archive.
+
+        :param root: Archive directory
+        :param max_bytes: Maximum archive size, in bytes
+        :param level: zstd compression level
+        :raises ImportError: If zstandard is not installed
+        """
+        self.zstd = importlib.import_module('zstandard')
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.level = level
+
+        self.__lock = threading.Lock()
+        self.__files: Deque[Tuple[Path, int]] = deque()
+        self.__tasks: Set[asyncio.Task] = set()
+        self.size = 0
+
+        self.stored = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.evicted = 0
+        self.failures = 0
+
+
+    async def open(self) -> None:
+        """
+        Create the archive directory and account for the pages already in it.
+        """
+        await asyncio.to_thread(self.scan)
+        logger.info(f'HTML archive at {self.root}: {len(self.__files)} pages, {self.size / 2**20:.1f} MiB')
+
+
+    def scan(self) -> None:
+        """
+        Index archived pages, oldest first (runs in a worker thread).
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        files = sorted((path.name, path, path.stat().st_size) for path in self.root.glob(f'*/*{SUFFIX}'))
+        with self.__lock:
+            self.__files = deque((path, size) for _, path, size in files)
+            self.size = sum(size for _, _, size in files)
+        self.evict()
+
+
+    def store(self, query: str, page: int, content: bytes) -> None:
+        """
+        Archive a page in the background.
+
+        :param query: Normalized query
+        :param page: Results page
+        :param content: Page HTML
+        """
+        task = asyncio.ensure_future(asyncio.to_thread(self.write, query, page, content, time.time()))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__written)
+
+
+    def write(self, query: str, page: int, content: bytes, timestamp: float) -> Path:
+        """
+        Compress and write a page, then evict old pages (runs in a worker thread).
+
+        :param query: Normalized query
+        :param page: Results page
+        :param content: Page HTML
+        :param timestamp: Fetch time (unix)
+        :returns: Archived page path
+        """
+        directory = self.root / hashlib.sha1(query.encode()).hexdigest()[:20]
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # remember which query the directory holds
+        query_file = directory / QUERY_FILE
+        if not query_file.exists():
+            query_file.write_text(query, encoding='utf-8')
+
+        # write compressed page atomically
+        data = self.zstd.ZstdCompressor(level=self.level).compress(content)
+        path = directory / f'{int(timestamp * 1000)}-{page}{SUFFIX}'
+        temp = path.with_name(f'.{path.name}.tmp')
+        temp.write_bytes(data)
+        os.replace(temp, path)
+
+        with self.__lock:
+            self.__files.append((path, len(data)))
+            self.size += len(data)
+            self.stored += 1
+            self.raw_bytes += len(content)
+            self.compressed_bytes += len(data)
+        self.evict()
+        return path
+
+
+    def evict(self) -> None:
+        """
+        Delete the oldest pages while the archive is over its size limit.
+        """
+        while True:
+            with self.__lock:
+                if self.size <= self.max_bytes or not self.__files:
+                    return
+                path, size = self.__files.popleft()
+                self.size -= size
+                self.evicted += 1
+
+            # page may already be gone (deleted by another worker)
+            path.unlink(missing_ok=True)
+
+
+    def snapshots(self, max_age: Optional[float] = None) -> Iterator[Snapshot]:
+        """
+        List the latest archived page of each query and page number.
+
+        :param max_age: Only pages archived at most this many seconds ago
+        :returns: Latest snapshots
+        """
+        oldest = time.time() - max_age if max_age is not None else 0.0
+        for directory in self.root.iterdir():
+            query_file = directory / QUERY_FILE
+            if not query_file.is_file():
+                continue
+
+            # latest snapshot per page number
+            latest: Dict[int, Tuple[float, Path]] = {}
+            for path in directory.glob(f'*{SUFFIX}'):
+                millis, page = path.name[:-len(SUFFIX)].split('-')
+                timestamp = int(millis) / 1000
+                if timestamp >= oldest and timestamp > latest.get(int(page), (0.0, path))[0]:
+                    latest[int(page)] = (timestamp, path)
+
+            query = query_file.read_text(encoding='utf-8')
+            for page, (timestamp, path) in latest.items():
+                yield Snapshot(query, page, timestamp, path)
+
+
+    def load(self, snapshot: Snapshot) -> bytes:
+        """
+        Read an archived page.
+
+        :param snapshot: Archived page
+        :returns: Page HTML
+        """
+        return self.zstd.ZstdDecompressor().decompress(snapshot.path.read_bytes())
+
+
+    def __written(self, task: asyncio.Task) -> None:
+        """
+        Forget a finished write, logging failures.
+
+        :param task: Finished write
+        """
+        self.__tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+            logger.warning(f'Failed to archive page: {task.exception()}')
+
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get archive counters.
+
+        :returns: Pages and bytes on disk, pages stored and evicted, compression ratio and failures
+        """
+        return {
+            'pages': len(self.__files),
+            'size_bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'stored': self.stored,
+            'compression_ratio': round(self.raw_bytes / self.compressed_bytes, 2) if self.compressed_bytes else 0.0,
+            'evicted': self.evicted,
+            'failures': self.failures,
+        }
@@ -4,22 +4,78 @@ Auth utility functions.
 
 # --- IMPORTS ---
 from opty_api.app import container
+from opty_api.err.invalid_token_error import InvalidTokenError
 from opty_api.err.supabase_error import SupabaseError
+from opty_api.utils.cache import TTLCache
+from opty_api.utils.logger import logger
+from opty_api.utils.tracing import traced
+from supabase_auth.errors import AuthApiError
+
+import asyncio
 
 
 # --- TYPES ---
-from supabase_auth.types import UserResponse
+from typing import Any
+from typing import Dict
 from typing import Optional
+from typing import Set
+
+
+# --- CONSTANTS ---
+REVOKED_STATUSES = (401, 403, 404)
+
+
+# --- GLOBAL ---
+# Results of the Auth API revocation check, by session
+revocations: TTLCache[bool] = TTLCache(maxsize=10000, ttl=container['config'].AUTH_REVOCATION_TTL)
+
+# Pending background revocation checks
+pending_checks: Set[asyncio.Task] = set()
 
 
 # --- CODE ---
-async def get_user_from_token(access_token: str) -> Optional[UserResponse]:
+@traced('auth.verify_token')
+async def get_user_from_token(access_token: str) -> Optional[Dict[str, Any]]:
     """
-    Get user data from access token.
+    Get user claims from access token.
+
+    The token is verified locally (signature, expiry and audience). The Auth API is
+    only called when no local key can verify the token, or for the optional
+    revocation check.
 
     :param access_token: JWT access token.
 
-    :return: User data dictionary or None if not found.
+    :return: Token claims (`sub` is the Supabase user ID) or None if the token is invalid.
+
+    :raises SupabaseError: If there is an error communicating with Supabase.
+    """
+
+    # Verify token locally
+    try:
+        claims = await container['token_verifier'].verify(access_token)
+    except InvalidTokenError as e:
+        logger.debug(e.args[1])
+        return None
+
+    # No local key for this token: validate it with Supabase
+    if claims is None:
+        return await get_claims_from_supabase(access_token)
+
+    # Session revoked: reject token
+    if await is_revoked(access_token, claims):
+        return None
+
+    # Return claims
+    return claims
+
+
+async def get_claims_from_supabase(access_token: str) -> Optional[Dict[str, Any]]:
+    """
+    Validate access token with the Supabase Auth API.
+
+    :param access_token: JWT access token.
+
+    :return: User claims or None if the token is not accepted.
 
     :raises SupabaseError: If there is an error communicating with Supabase.
     """
@@ -29,12 +85,80 @@ async def get_user_from_token(access_token: str) -> Optional[UserResponse]:
         supabase_user = await container['supabase_client'].auth.get_user(access_token)
 
         # Supabase user not found: return None
-        if not supabase_user.user:
+        if not supabase_user or not supabase_user.user:
             return None
 
-        # Return user profile
-        return supabase_user
+        # Return user claims
+        return {
+            'sub': supabase_user.user.id,
+            'email': supabase_user.user.email,
+            'aud': supabase_user.user.aud,
+        }
+
+    # Token rejected by supabase: return None
+    except AuthApiError as e:
+        if e.status in REVOKED_STATUSES:
+            return None
+        raise SupabaseError(f'Error getting user from token: {str(e)}') from e
 
     # Error in supabase: raise custom error
     except Exception as e:
         raise SupabaseError(f'Error getting user from token: {str(e)}') from e
+
+
+async def is_revoked(access_token: str, claims: Dict[str, Any]) -> bool:
+    """
+    Check whether the session of a locally verified token was revoked.
+
+    Depending on AUTH_REVOCATION_CHECK the check is skipped ('off'), run in the
+    background while the request proceeds ('async') or awaited ('sync'). Results are
+    cached for AUTH_REVOCATION_TTL seconds.
+
+    :param access_token: JWT access token.
+    :param claims: Verified token claims.
+
+    :return: True if the session is known to be revoked.
+    """
+    mode = container['config'].AUTH_REVOCATION_CHECK
+
+    # Revocation check disabled
+    if mode == 'off':
+        return False
+
+    # Cached result
+    key = claims.get('session_id') or access_token
+    revoked = revocations.get(key)
+    if revoked is not None:
+        return revoked
+
+    # Check in the background: accept token meanwhile
+    if mode == 'async':
+        task = asyncio.create_task(check_revocation(key, access_token))
+        pending_checks.add(task)
+        task.add_done_callback(pending_checks.discard)
+        return False
+
+    # Check before accepting token
+    return await check_revocation(key, access_token)
+
+
+async def check_revocation(key: str, access_token: str) -> bool:
+    """
+    Ask the Auth API whether a token is still accepted and cache the result.
+
+    :param key: Revocation cache key.
+    :param access_token: JWT access token.
+
+    :return: True if the token was rejected.
+    """
+    try:
+        revoked = await get_claims_from_supabase(access_token) is None
+
+    # Auth API unavailable: trust local verification
+    except SupabaseError as e:
+        logger.warning(e.args[1])
+        return False
+
+    # Cache result
+    revocations.set(key, revoked)
+    return revoked
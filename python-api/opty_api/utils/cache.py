@@ -0,0 +1,279 @@
+"""
+In-process caches.
+"""
+
+# --- IMPORTS ---
+from collections import OrderedDict
+from collections.abc import Hashable
+
+import asyncio
+import functools
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+
+V = TypeVar('V')
+
+
+# --- CODE ---
+class TTLCache(Generic[V]):
+    """
+    Bounded LRU cache whose entries expire after a fixed time to live.
+
+    Not thread-safe: meant to be used from the event loop thread.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """
+        Initialize the cache.
+
+        :param maxsize: Maximum number of entries (least recently used entries are evicted first)
+        :param ttl: Time to live of each entry, in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__data: 'OrderedDict[Hashable, Tuple[float, V]]' = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """
+        Get a cached value.
+
+        :param key: Entry key
+        :param default: Value returned on a miss
+        :returns: Cached value, or default if missing or expired
+        """
+        entry = self.__data.get(key)
+
+        # missing entry
+        if entry is None:
+            self.misses += 1
+            return default
+
+        # expired entry
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.__data[key]
+            self.misses += 1
+            return default
+
+        # mark entry as recently used
+        self.__data.move_to_end(key)
+        self.hits += 1
+        return value
+
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        :param key: Entry key
+        :param value: Value to cache
+        :param ttl: Entry time to live (defaults to the cache TTL)
+        """
+        self.__data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self.__data.move_to_end(key)
+
+        # evict least recently used entries
+        while len(self.__data) > self.maxsize:
+            self.__data.popitem(last=False)
+            self.evictions += 1
+
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Invalidate an entry.
+
+        :param key: Entry key
+        """
+        if self.__data.pop(key, None) is not None:
+            self.invalidations += 1
+
+
+    def clear(self) -> None:
+        """
+        Drop every entry.
+        """
+        self.__data.clear()
+
+
+    def __len__(self) -> int:
+        """
+        Number of stored entries (including expired ones not yet purged).
+        """
+        return len(self.__data)
+
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        :returns: Size, hits, misses, hit rate, evictions and invalidations
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.__data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+class TaskCache(Generic[V]):
+    """
+    Cache of coroutine results, shared by callers while in flight and kept for a time to live once done.
+
+    Failed or cancelled tasks are dropped, so the next caller runs the coroutine again.
+    Not thread-safe: meant to be used from the event loop thread.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """
+        Initialize the cache.
+
+        :param maxsize: Maximum number of tasks kept (least recently used tasks are forgotten first)
+        :param ttl: Time to live of each result, in seconds
+        """
+        self.tasks: TTLCache[asyncio.Future] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.__waiters: Dict[asyncio.Future, int] = {}
+
+        self.started = 0
+        self.joined = 0
+        self.cancelled = 0
+
+
+    def start(self, key: Hashable, factory: Callable[[], Awaitable[V]]) -> 'asyncio.Future[V]':
+        """
+        Get the in-flight or done task for a key, or start it.
+
+        :param key: Entry key
+        :param factory: Coroutine function computing the result
+        :returns: Task computing the result
+        """
+
+        # same work in flight or done: share it
+        task = self.tasks.get(key)
+        if task is not None:
+            self.joined += 1
+            return task
+
+        # start work (in-flight tasks must outlive the TTL: re-stored when they finish)
+        task = asyncio.ensure_future(factory())
+        self.tasks.set(key, task, ttl=float('inf'))
+        task.add_done_callback(functools.partial(self.__finished, key))
+        self.started += 1
+        return task
+
+
+    async def get(self, key: Hashable, factory: Callable[[], Awaitable[V]]) -> V:
+        """
+        Get a result, joining the in-flight task for the key or starting it.
+
+        The task is shielded: a caller giving up only cancels it if nobody else waits for it.
+
+        :param key: Entry key
+        :param factory: Coroutine function computing the result
+        :returns: Result
+        """
+        task = self.start(key, factory)
+        self.__waiters[task] = self.__waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+
+        # last caller gave up (cancelled or deadline passed): stop work
+        except asyncio.CancelledError:
+            if self.__waiters[task] == 1 and not task.done():
+                if self.tasks.get(key) is task:
+                    self.tasks.pop(key)
+                task.cancel()
+                self.cancelled += 1
+            raise
+
+        finally:
+            self.__waiters[task] -= 1
+            if not self.__waiters[task]:
+                del self.__waiters[task]
+
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Store a result computed elsewhere.
+
+        :param key: Entry key
+        :param value: Result
+        :param ttl: Result time to live (defaults to the cache TTL)
+        """
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self.tasks.set(key, future, ttl=ttl)
+
+
+    def discard(self, key: Hashable) -> bool:
+        """
+        Cancel the in-flight task for a key, unless somebody waits for it.
+
+        :param key: Entry key
+        :returns: Whether a task was cancelled
+        """
+        task = self.tasks.get(key)
+        if task is None or task.done() or task in self.__waiters:
+            return False
+        self.tasks.pop(key)
+        task.cancel()
+        self.cancelled += 1
+        return True
+
+
+    def __finished(self, key: Hashable, task: asyncio.Future) -> None:
+        """
+        Keep a finished task for its TTL, or drop it if it failed.
+
+        :param key: Entry key
+        :param task: Finished task
+        """
+
+        # task replaced or evicted meanwhile
+        if self.tasks.get(key) is not task:
+            return
+
+        # failed or cancelled: next caller retries
+        if task.cancelled() or task.exception() is not None:
+            self.tasks.pop(key)
+            return
+
+        self.tasks.set(key, task)
+
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        :returns: Size, started, joined (shared) and cancelled tasks, and share rate
+        """
+        calls = self.started + self.joined
+        return {
+            'size': len(self.tasks),
+            'maxsize': self.tasks.maxsize,
+            'started': self.started,
+            'joined': self.joined,
+            'share_rate': round(self.joined / calls, 4) if calls else 0.0,
+            'cancelled': self.cancelled,
+        }
@@ -0,0 +1,116 @@
+"""
+Request deadlines.
+"""
+
+# --- IMPORTS ---
+from contextvars import ContextVar
+from opty_api.err.client_disconnected_error import ClientDisconnectedError
+from opty_api.err.deadline_exceeded_error import DeadlineExceededError
+from starlette.requests import Request
+
+import asyncio
+import time
+
+
+# --- TYPES ---
+from typing import Awaitable
+from typing import Optional
+from typing import TypeVar
+
+
+T = TypeVar('T')
+
+
+# --- GLOBAL ---
+# Deadline (monotonic time) of the work in progress
+deadline_var: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+
+
+# --- CODE ---
+def set_deadline(timeout: float) -> None:
+    """
+    Set the deadline of the current request (or job).
+
+    :param timeout: Time budget, in seconds
+    """
+    deadline_var.set(time.monotonic() + timeout)
+
+
+def remaining() -> Optional[float]:
+    """
+    Get the time left before the deadline.
+
+    :returns: Seconds left (0 once passed), or None without a deadline
+    """
+    deadline = deadline_var.get()
+    return max(deadline - time.monotonic(), 0.0) if deadline is not None else None
+
+
+def stage_timeout(cap: Optional[float] = None) -> Optional[float]:
+    """
+    Get the timeout of a stage: the time left, bounded by the stage's own limit.
+
+    :param cap: Stage time limit, in seconds
+    :returns: Stage timeout in seconds, or None if unbounded
+    """
+    left = remaining()
+    if left is None or cap is None:
+        return cap if left is None else left
+    return min(left, cap)
+
+
+def check_deadline() -> None:
+    """
+    Stop work whose deadline has passed.
+
+    :raises DeadlineExceededError: If the deadline has passed
+    """
+    if remaining() == 0.0:
+        raise DeadlineExceededError('Deadline passed before the work was done.')
+
+
+async def run_with_deadline(work: Awaitable[T], request: Optional[Request] = None) -> T:
+    """
+    Run work until it is done, its deadline passes or the client disconnects.
+    Outstanding work is cancelled in both latter cases.
+
+    :param work: Work to run (in the current context, deadline included)
+    :param request: HTTP request whose client is watched, if any
+    :returns: Work result
+    :raises DeadlineExceededError: If the deadline passed first
+    :raises ClientDisconnectedError: If the client disconnected first
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(wait_disconnect(request)) if request is not None else None
+
+    try:
+        done, _ = await asyncio.wait({task, watcher} - {None},
+                                     timeout=remaining(),
+                                     return_when=asyncio.FIRST_COMPLETED)
+
+        # work done (or failed)
+        if task in done:
+            return task.result()
+
+        # deadline passed or client gone: cancel work and wait for it to clean up
+        task.cancel()
+        await asyncio.wait({task})
+        if watcher in done:
+            raise ClientDisconnectedError('Client disconnected before the response was ready.')
+        raise DeadlineExceededError('Work not done within its deadline.')
+
+    # stop watching the client
+    finally:
+        task.cancel()
+        if watcher is not None:
+            watcher.cancel()
+
+
+async def wait_disconnect(request: Request) -> None:
+    """
+    Wait for the client of a request to disconnect.
+
+    :param request: HTTP request (its body must already be read)
+    """
+    while (await request.receive())['type'] != 'http.disconnect':
+        pass
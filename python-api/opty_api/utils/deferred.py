@@ -0,0 +1,81 @@
+"""
+Values initialized in the background after startup.
+"""
+
+# --- IMPORTS ---
+from opty_api.utils.logger import logger
+
+import asyncio
+import time
+
+
+# --- TYPES ---
+from typing import Callable
+from typing import Generic
+from typing import Optional
+from typing import TypeVar
+
+
+T = TypeVar('T')
+
+
+# --- CODE ---
+class Deferred(Generic[T]):
+    """
+    Value whose (slow, blocking) construction runs in a worker thread.
+
+    The service can start serving while the value warms up; the first users that
+    need it wait for it. A failed construction is retried by the next user.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]) -> None:
+        """
+        Initialize the deferred value.
+
+        :param name: Name used in logs
+        :param factory: Blocking function building the value (heavy imports belong here)
+        """
+        self.name = name
+        self.factory = factory
+        self.task: Optional[asyncio.Task] = None
+
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the value was built.
+        """
+        return self.task is not None and self.task.done() and not self.task.cancelled() \
+            and self.task.exception() is None
+
+
+    def start(self) -> None:
+        """
+        Start building the value in the background (no-op if started or built).
+        """
+        failed = self.task is not None and self.task.done() and not self.ready
+        if self.task is None or failed:
+            self.task = asyncio.create_task(self.__build())
+
+
+    async def get(self) -> T:
+        """
+        Get the value, waiting for it to be built if needed.
+
+        :returns: Value
+        :raises Exception: Whatever the factory raised
+        """
+        self.start()
+        return await asyncio.shield(self.task)
+
+
+    async def __build(self) -> T:
+        """
+        Build the value in a worker thread.
+
+        :returns: Value
+        """
+        start = time.perf_counter()
+        value = await asyncio.to_thread(self.factory)
+        logger.info(f'{self.name} ready in {(time.perf_counter() - start) * 1000:.0f} ms', component=self.name)
+        return value
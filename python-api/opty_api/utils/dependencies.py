@@ -13,10 +13,17 @@ from opty_api.schemas.user import User
 from opty_api.utils.auth import get_user_from_token
 
 
+# --- TYPES ---
+from typing import Optional
+
+
 # --- GLOBAL ---
 # HTTP Bearer security scheme
 security = HTTPBearer()
 
+# HTTP Bearer security scheme for endpoints also open to anonymous clients
+optional_security = HTTPBearer(auto_error=False)
+
 
 # --- CODE ---
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
@@ -33,19 +40,19 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     # Extract token from credentials
     token = credentials.credentials
 
-    # Validate token with Supabase and get user
-    supabase_user = await get_user_from_token(token)
+    # Validate token and get its claims
+    claims = await get_user_from_token(token)
 
     # Invalid token: raise 401 exception
-    if not supabase_user:
+    if not claims:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Invalid authentication credentials',
             headers={'WWW-Authenticate': 'Bearer'},
         )
 
-    # Get user profile from MongoDB
-    user = await container['user_repository'].get_by_supabase_id(supabase_user.user.id)
+    # Get user profile (cached, falls back to MongoDB)
+    user = await container['user_repository'].get_cached_by_supabase_id(claims['sub'])
 
     # User profile not found: raise 404 exception
     if not user:
@@ -78,6 +85,26 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[User]:
+    """
+    Dependency to get the current user on endpoints also open to anonymous clients.
+
+    :param credentials: HTTP authorization credentials, if any.
+    :return: Current active user profile, or None for anonymous clients.
+
+    :raises HTTPException: If credentials are given but invalid, or the user is inactive.
+    """
+
+    # No credentials: anonymous client
+    if credentials is None:
+        return None
+
+    # Credentials given: they must be valid
+    return await get_current_active_user(await get_current_user(credentials))
+
+
 def require_role(required_role: str):
     """
     Dependency factory to require specific user role.
@@ -0,0 +1,150 @@
+"""
+Hedged requests.
+"""
+
+# --- IMPORTS ---
+from collections import deque
+
+import asyncio
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Optional
+from typing import Set
+from typing import TypeVar
+
+
+T = TypeVar('T')
+
+
+# --- CONSTANTS ---
+LATENCY_SAMPLES = 1000
+MIN_SAMPLES = 20
+
+
+# --- CODE ---
+class Hedger:
+    """
+    Send a second identical request when the first one is slower than usual.
+
+    The hedge goes out once the first request has been pending longer than the tracked
+    latency percentile; the first successful answer wins and the other request is
+    cancelled. Hedges are limited to `budget` times the number of requests, so the
+    extra upstream load stays small. The delay and latency samples only cover the
+    requests themselves: callers acquire their outbound slot before calling run().
+    """
+
+    def __init__(self,
+                 budget: float = 0.05,
+                 percentile: float = 0.95,
+                 min_delay_ms: float = 200.0,
+                 samples: int = LATENCY_SAMPLES) -> None:
+        """
+        Initialize the hedger.
+
+        :param budget: Maximum hedges per request (e.g. 0.05 for 5% extra requests, 0 disables hedging)
+        :param percentile: Latency percentile after which a request is hedged
+        :param min_delay_ms: Lower bound of the hedging delay, in ms
+        :param samples: Number of recent latencies kept
+        """
+        self.budget = budget
+        self.percentile = percentile
+        self.min_delay_ms = min_delay_ms
+        self.__latencies: Deque[float] = deque(maxlen=samples)
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+        self.skipped_busy = 0
+
+
+    def delay(self) -> Optional[float]:
+        """
+        Get the current hedging delay.
+
+        :returns: Delay in seconds, or None while there are too few latency samples
+        """
+        if len(self.__latencies) < MIN_SAMPLES:
+            return None
+        latencies = sorted(self.__latencies)
+        threshold = latencies[min(len(latencies) - 1, int(self.percentile * len(latencies)))]
+        return max(threshold, self.min_delay_ms) / 1000
+
+
+    async def run(self,
+                  request: Callable[[], Awaitable[T]],
+                  hedge: Optional[Callable[[], Awaitable[T]]] = None,
+                  admit: Optional[Callable[[], bool]] = None) -> T:
+        """
+        Run a request, hedging it if it is slow.
+
+        :param request: Coroutine function sending the first attempt
+        :param hedge: Coroutine function sending the hedge (defaults to request)
+        :param admit: Whether a hedge can be sent now (e.g. a spare outbound slot), checked when it is due
+        :returns: Result of the first successful attempt
+        :raises Exception: The error of the first attempt, if every attempt failed
+        """
+        self.requests += 1
+        delay = self.delay() if self.budget > 0 else None
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(request())
+        attempts: Set[asyncio.Future] = {primary}
+
+        try:
+            # fast answer (or hedging disabled / warming up): no hedge
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+
+                # hedge if the budget and the caller allow it
+                if self.hedged >= self.budget * self.requests:
+                    self.budget_exhausted += 1
+                elif admit is not None and not admit():
+                    self.skipped_busy += 1
+                else:
+                    self.hedged += 1
+                    attempts.add(asyncio.ensure_future((hedge or request)()))
+
+            # first successful answer wins
+            while True:
+                done, _ = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((attempt for attempt in done if attempt.exception() is None), None)
+                if winner is not None:
+                    self.hedge_wins += winner is not primary
+                    self.__latencies.append((time.perf_counter() - start) * 1000)
+                    return winner.result()
+
+                # every attempt failed: raise the first error
+                attempts -= done
+                if not attempts:
+                    primary.result()
+
+        # cancel the losing attempt
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hedging counters.
+
+        :returns: Requests, hedges, hedge wins, skipped hedges and current delay (ms)
+        """
+        delay = self.delay()
+        return {
+            'budget': self.budget,
+            'requests': self.requests,
+            'hedged': self.hedged,
+            'hedge_rate': round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            'hedge_wins': self.hedge_wins,
+            'budget_exhausted': self.budget_exhausted,
+            'skipped_busy': self.skipped_busy,
+            'delay_ms': round(delay * 1000, 3) if delay is not None else None,
+        }
@@ -0,0 +1,342 @@
+"""
+Background jobs, with their state shared by every worker process.
+"""
+
+# --- IMPORTS ---
+from datetime import datetime
+from datetime import timezone
+from opty_api.err.mongodb_unavailable_error import MongoUnavailableError
+from opty_api.err.opty_api_error import OptyApiError
+from opty_api.err.queue_full_error import QueueFullError
+from opty_api.mongo.repositories.jobs import JobRepository
+from opty_api.utils.logger import logger
+from uuid import uuid4
+
+import asyncio
+import contextvars
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+
+Handler = Callable[[Any], Awaitable[Any]]
+
+
+# --- CONSTANTS ---
+FINISHED = ('done', 'failed')
+
+
+# --- CODE ---
+def isoformat(value: Optional[datetime]) -> Optional[str]:
+    """
+    Format a timestamp read from MongoDB (naive UTC) or set locally (aware).
+
+    :param value: Timestamp
+    :returns: ISO 8601 timestamp with its UTC offset, or None
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def serialize(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Serialize a job document.
+
+    :param document: Job document
+    :returns: Job ID, status, timestamps, result and error
+    """
+    return {
+        'id': document['_id'],
+        'status': document['status'],
+        'created_at': isoformat(document['created_at']),
+        'started_at': isoformat(document.get('started_at')),
+        'finished_at': isoformat(document.get('finished_at')),
+        'result': document.get('result'),
+        'error': document.get('error'),
+    }
+
+
+class Job:
+    """
+    Unit of work run by the worker process that queued it.
+
+    Status: queued -> running -> done | failed
+    """
+
+    def __init__(self, key: str, payload: Any) -> None:
+        """
+        Initialize the job.
+
+        :param key: Deduplication key
+        :param payload: Handler argument
+        """
+        self.id = uuid4().hex
+        self.key = key
+        self.payload = payload
+        self.created_at = datetime.now(timezone.utc)
+        self.finished = asyncio.Event()
+        self.context = contextvars.copy_context()
+
+
+    def to_document(self) -> Dict[str, Any]:
+        """
+        Get the document of the queued job.
+
+        :returns: Job document
+        """
+        return {
+            '_id': self.id,
+            'key': self.key,
+            'status': 'queued',
+            'created_at': self.created_at,
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None,
+        }
+
+
+class JobQueue:
+    """
+    Bounded queue of jobs run by a fixed pool of asyncio workers.
+
+    Job state is kept in MongoDB, so any worker process can report a job and
+    submissions with the key of a queued, running or successful job share that job,
+    whichever process runs it. Jobs run in the process that queued them, in the
+    context they were submitted from (request ID, scheduling tenant...). Finished
+    jobs are kept for `ttl` seconds; unfinished jobs for `lease` seconds, so the jobs
+    of a process that crashed expire (stop() fails the jobs of a process shutting down).
+    """
+
+    def __init__(self,  # pylint: disable=R0913,R0917
+                 handler: Handler,
+                 repository: JobRepository,
+                 workers: int = 4,
+                 max_queued: int = 1000,
+                 ttl: float = 300.0,
+                 lease: float = 600.0,
+                 poll_interval: float = 0.5) -> None:
+        """
+        Initialize the queue.
+
+        :param handler: Coroutine function running a job payload and returning its result
+        :param repository: Job state repository
+        :param workers: Number of jobs run concurrently
+        :param max_queued: Number of jobs waiting for a worker before submissions are rejected
+        :param ttl: Time finished jobs are kept, in seconds
+        :param lease: Time unfinished jobs are kept, in seconds
+        :param poll_interval: Interval between state reads when waiting for a job run by another process
+        """
+        self.handler = handler
+        self.repository = repository
+        self.workers = workers
+        self.ttl = ttl
+        self.lease = lease
+        self.poll_interval = poll_interval
+
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self.local: Dict[str, Job] = {}
+        self.tasks: List[asyncio.Task] = []
+
+        self.running = 0
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+
+    def start(self) -> None:
+        """
+        Start the workers.
+        """
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+
+    async def stop(self) -> None:
+        """
+        Stop the workers and fail the jobs they did not run, so their keys are released
+        rather than joined by other processes until their lease expires.
+        """
+
+        # cancel workers and wait for them to save the jobs they were running
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        # drop queued jobs (the only local jobs left once workers are done)
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+        jobs, self.local = list(self.local.values()), {}
+        if not jobs:
+            return
+
+        # fail them all at once
+        try:
+            await self.repository.fail_jobs([job.id for job in jobs], 'Job cancelled.', ttl=self.ttl)
+        except MongoUnavailableError as e:
+            logger.error(f'Failed to fail {len(jobs)} queued jobs: {e.args[1]}')
+        self.failed += len(jobs)
+        for job in jobs:
+            job.finished.set()
+
+
+    async def submit(self, key: str, payload: Any) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a job, or join the unfinished or successful job with the same key.
+
+        :param key: Deduplication key
+        :param payload: Handler argument
+        :returns: Job document and whether it was created
+        :raises QueueFullError: If too many jobs are waiting
+        :raises MongoUnavailableError: If the job state cannot be read or written
+        """
+        while True:
+
+            # same work already queued, running or done: share it
+            document = await self.repository.get_by_key(key)
+            if document is not None:
+                self.deduplicated += 1
+                return document, False
+
+            # too many jobs waiting for this process
+            if self.queue.full():
+                self.rejected += 1
+                raise QueueFullError(f'Job queue full ({self.queue.maxsize} jobs waiting).')
+
+            # take the key from failed or expired jobs and add the new job
+            job = Job(key, payload)
+            await self.repository.release_key(key)
+            if await self.repository.add_job(job.to_document(), ttl=self.lease):
+                break
+
+            # another process queued the same work meanwhile: join it
+
+        # queue job (the queue may have filled up while the job was added)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull as e:
+            self.rejected += 1
+            await self.repository.delete_job(job.id)
+            raise QueueFullError(f'Job queue full ({self.queue.maxsize} jobs waiting).') from e
+
+        self.local[job.id] = job
+        self.submitted += 1
+        return job.to_document(), True
+
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job.
+
+        :param job_id: Job ID
+        :returns: Job document, or None if unknown or expired
+        :raises MongoUnavailableError: If the job state cannot be read
+        """
+        return await self.repository.get_by_id(job_id)
+
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for a job to finish.
+
+        :param job_id: Job ID
+        :param timeout: Maximum time to wait, in seconds
+        :returns: Job document, finished or not, or None if unknown or expired
+        :raises MongoUnavailableError: If the job state cannot be read
+        """
+
+        # job run by this process: wait for it to finish
+        job = self.local.get(job_id)
+        if job is not None:
+            try:
+                await asyncio.wait_for(job.finished.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            return await self.get(job_id)
+
+        # job run by another process: poll its state
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            document = await self.get(job_id)
+            if document is None or document['status'] in FINISHED or loop.time() >= deadline:
+                return document
+            await asyncio.sleep(min(self.poll_interval, deadline - loop.time()))
+
+
+    async def work(self) -> None:
+        """
+        Run queued jobs, one at a time.
+        """
+        while True:
+            job = await self.queue.get()
+            self.running += 1
+            update: Dict[str, Any] = {}
+
+            try:
+                await self.repository.update_job(job.id,
+                                                 {'status': 'running', 'started_at': datetime.now(timezone.utc)},
+                                                 ttl=self.lease)
+                result = await job.context.run(asyncio.ensure_future, self.handler(job.payload))
+                update = {'status': 'done', 'result': result}
+                self.completed += 1
+
+            # job failed: keep error for the client
+            except Exception as e:  # pylint: disable=W0718
+                if isinstance(e, OptyApiError):
+                    error = e.message
+                else:
+                    error = getattr(e, 'detail', None) or str(e) or type(e).__name__
+                update = {'status': 'failed', 'error': error}
+                self.failed += 1
+                logger.warning(f'Job {job.id} failed: {error}', job_id=job.id)
+
+            # workers stopped: fail the job rather than leave it running until its lease expires
+            except asyncio.CancelledError:
+                update = {'status': 'failed', 'error': 'Job cancelled.'}
+                self.failed += 1
+                raise
+
+            # keep finished job for its TTL
+            finally:
+                self.running -= 1
+                update['finished_at'] = datetime.now(timezone.utc)
+                try:
+                    await self.repository.update_job(job.id, update, ttl=self.ttl)
+                except MongoUnavailableError as e:
+                    logger.error(f'Failed to save job {job.id}: {e.args[1]}', job_id=job.id)
+                del self.local[job.id]
+                job.finished.set()
+                self.queue.task_done()
+
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue counters of this process.
+
+        :returns: Queued and running jobs, and submission / outcome counters
+        """
+        return {
+            'workers': self.workers,
+            'queued': self.queue.qsize(),
+            'running': self.running,
+            'submitted': self.submitted,
+            'deduplicated': self.deduplicated,
+            'rejected': self.rejected,
+            'completed': self.completed,
+            'failed': self.failed,
+        }
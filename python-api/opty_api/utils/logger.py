@@ -0,0 +1,286 @@
+"""
+Non-blocking structured logger.
+
+Log calls only build a record and put it on a bounded queue. A background thread
+serializes the records as JSON lines and writes them to the output stream, so the
+event loop never waits on stdout.
+"""
+
+# --- IMPORTS ---
+from contextvars import ContextVar
+from datetime import datetime
+from datetime import timezone
+
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import TextIO
+
+
+# --- CONSTANTS ---
+LEVELS = {
+    'DEBUG': 10,
+    'INFO': 20,
+    'WARNING': 30,
+    'ERROR': 40,
+}
+STOP = object()
+
+
+# --- GLOBAL ---
+# Request ID of the request being handled in the current context
+request_id_var: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+
+# --- CODE ---
+class Logger:
+    """
+    Structured logger backed by a bounded queue and a writer thread.
+    """
+
+    def __init__(self,
+                 level: str = 'INFO',
+                 queue_size: int = 10000,
+                 debug_sample_rate: float = 1.0,
+                 stream: Optional[TextIO] = None) -> None:
+        """
+        Initialize the logger.
+
+        :param level: Minimum level to emit (DEBUG, INFO, WARNING or ERROR)
+        :param queue_size: Maximum number of records waiting to be written
+        :param debug_sample_rate: Fraction of DEBUG records to keep (0.0 - 1.0)
+        :param stream: Output stream (defaults to stdout)
+        """
+        self.__lock = threading.Lock()
+        self.__thread: Optional[threading.Thread] = None
+        self.__pid: Optional[int] = None
+        self.__stream = stream
+        self.__queue: queue.Queue = queue.Queue(maxsize=queue_size)
+
+        self.level = LEVELS[level.upper()]
+        self.debug_sample_rate = debug_sample_rate
+
+        self.emitted = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+
+    def configure(self,
+                  level: Optional[str] = None,
+                  queue_size: Optional[int] = None,
+                  debug_sample_rate: Optional[float] = None) -> None:
+        """
+        Update logger settings.
+
+        :param level: Minimum level to emit
+        :param queue_size: Maximum number of records waiting to be written
+        :param debug_sample_rate: Fraction of DEBUG records to keep
+        """
+
+        # update level
+        if level is not None:
+            self.level = LEVELS[level.upper()]
+
+        # update sampling rate
+        if debug_sample_rate is not None:
+            self.debug_sample_rate = debug_sample_rate
+
+        # resize the buffer (only allowed before the writer starts)
+        if queue_size is not None and self.__thread is None:
+            self.__queue = queue.Queue(maxsize=queue_size)
+
+
+    def start(self) -> None:
+        """
+        Start the writer thread (idempotent).
+        """
+        with self.__lock:
+
+            # writer already running in this process: nothing to do
+            if self.__thread is not None and self.__pid == os.getpid():
+                return
+
+            # threads do not survive fork: drop records inherited from the parent
+            if self.__pid is not None and self.__pid != os.getpid():
+                self.__queue = queue.Queue(maxsize=self.__queue.maxsize)
+
+            # start writer thread
+            self.__pid = os.getpid()
+            self.__thread = threading.Thread(target=self.__run, name='opty-logger', daemon=True)
+            self.__thread.start()
+
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Flush pending records and stop the writer thread.
+
+        :param timeout: Maximum time to wait for the flush, in seconds
+        """
+        with self.__lock:
+
+            # writer not running: nothing to do
+            thread = self.__thread
+            if thread is None or self.__pid != os.getpid():
+                return
+
+            # wake up writer with the stop marker (blocking is fine on shutdown)
+            self.__queue.put(STOP)
+            self.__thread = None
+
+        # wait for pending records to be written
+        thread.join(timeout)
+
+
+    def is_enabled_for(self, level: str) -> bool:
+        """
+        Check whether records of a level would be emitted.
+
+        :param level: Level name
+        :returns: True if the level is enabled
+        """
+        return LEVELS[level] >= self.level
+
+
+    def log(self, level: str, message: str, sample_rate: Optional[float] = None, **fields: Any) -> None:
+        """
+        Enqueue a log record without blocking.
+
+        :param level: Level name
+        :param message: Log message
+        :param sample_rate: Fraction of records to keep (defaults to the DEBUG sampling rate for DEBUG records)
+        :param fields: Extra structured fields
+        """
+
+        # level disabled: skip record
+        levelno = LEVELS[level]
+        if levelno < self.level:
+            return
+
+        # sample high-volume records
+        if sample_rate is None and levelno == LEVELS['DEBUG']:
+            sample_rate = self.debug_sample_rate
+        if sample_rate is not None and sample_rate < 1.0 and random.random() >= sample_rate:
+            self.sampled_out += 1
+            return
+
+        # lazily start writer (first use or after fork)
+        if self.__thread is None or self.__pid != os.getpid():
+            self.start()
+
+        # build record
+        record: Dict[str, Any] = {
+            'ts': time.time(),
+            'level': level,
+            'message': message,
+            'request_id': request_id_var.get(),
+        }
+        record.update(fields)
+
+        # enqueue record: drop it if the buffer is full
+        try:
+            self.__queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+    def debug(self, message: str, **fields: Any) -> None:
+        """
+        Log a DEBUG record.
+        """
+        self.log('DEBUG', message, **fields)
+
+
+    def info(self, message: str, **fields: Any) -> None:
+        """
+        Log an INFO record.
+        """
+        self.log('INFO', message, **fields)
+
+
+    def warning(self, message: str, **fields: Any) -> None:
+        """
+        Log a WARNING record.
+        """
+        self.log('WARNING', message, **fields)
+
+
+    def error(self, message: str, **fields: Any) -> None:
+        """
+        Log an ERROR record.
+        """
+        self.log('ERROR', message, **fields)
+
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get logger counters.
+
+        :returns: Emitted, dropped, sampled out and queued record counts
+        """
+        return {
+            'emitted': self.emitted,
+            'dropped': self.dropped,
+            'sampled_out': self.sampled_out,
+            'queued': self.__queue.qsize(),
+        }
+
+
+    def __run(self) -> None:
+        """
+        Writer thread loop.
+        """
+        while True:
+
+            # wait for next record
+            record = self.__queue.get()
+            if record is STOP:
+                self.__flush()
+                return
+
+            # serialize and write record
+            self.__write(record)
+
+            # flush once the buffer is drained
+            if self.__queue.empty():
+                self.__flush()
+
+
+    def __write(self, record: Dict[str, Any]) -> None:
+        """
+        Serialize and write a single record.
+
+        :param record: Log record
+        """
+        try:
+            record['ts'] = datetime.fromtimestamp(record['ts'], timezone.utc).isoformat()
+            stream = self.__stream or sys.stdout
+            stream.write(json.dumps(record, default=str, ensure_ascii=False) + '\n')
+            self.emitted += 1
+
+        # a broken record must not kill the writer
+        except Exception:  # pylint: disable=W0718
+            self.dropped += 1
+
+
+    def __flush(self) -> None:
+        """
+        Flush the output stream.
+        """
+        try:
+            (self.__stream or sys.stdout).flush()
+        except Exception:  # pylint: disable=W0718
+            pass
+
+
+# Process-wide logger (configured from the application config on import of opty_api.app)
+logger = Logger()
@@ -0,0 +1,103 @@
+"""
+Background prefetching.
+"""
+
+# --- IMPORTS ---
+from collections.abc import Hashable
+from opty_api.utils.cache import TaskCache
+from opty_api.utils.cache import TTLCache
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import TypeVar
+
+
+V = TypeVar('V')
+
+
+# --- CODE ---
+class Prefetcher(Generic[V]):
+    """
+    Warm a result cache in the background with results likely to be requested next.
+
+    Prefetches only start while `spare()` reports at least `min_spare` free upstream
+    slots, so they never compete with requests already waiting. A prefetched result
+    served before it expires counts as a hit.
+    """
+
+    def __init__(self,
+                 results: TaskCache[V],
+                 spare: Callable[[], int],
+                 min_spare: int = 1) -> None:
+        """
+        Initialize the prefetcher.
+
+        :param results: Cache of (in-flight) results, by key
+        :param spare: Function returning the number of free upstream slots
+        :param min_spare: Free upstream slots needed to prefetch
+        """
+        self.results = results
+        self.spare = spare
+        self.min_spare = min_spare
+        self.__pending: TTLCache[bool] = TTLCache(maxsize=results.tasks.maxsize, ttl=results.tasks.ttl)
+
+        self.prefetched = 0
+        self.hits = 0
+        self.skipped_busy = 0
+        self.skipped_cached = 0
+
+
+    def prefetch(self, key: Hashable, factory: Callable[[], Awaitable[V]]) -> bool:
+        """
+        Start computing a result in the background, if upstream has spare capacity.
+
+        :param key: Result key
+        :param factory: Coroutine function computing the result
+        :returns: Whether a prefetch started
+        """
+
+        # already cached or in flight
+        if self.results.tasks.get(key) is not None:
+            self.skipped_cached += 1
+            return False
+
+        # upstream busy: leave capacity to user requests
+        if self.spare() < self.min_spare:
+            self.skipped_busy += 1
+            return False
+
+        self.results.start(key, factory)
+        self.__pending.set(key, True)
+        self.prefetched += 1
+        return True
+
+
+    def served(self, key: Hashable) -> None:
+        """
+        Record that a result was served (a hit if it was prefetched).
+
+        :param key: Result key
+        """
+        if self.__pending.get(key):
+            self.__pending.pop(key)
+            self.hits += 1
+
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get prefetch counters.
+
+        :returns: Prefetches, hits, hit rate and skipped prefetches
+        """
+        return {
+            'prefetched': self.prefetched,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.prefetched, 4) if self.prefetched else 0.0,
+            'skipped_busy': self.skipped_busy,
+            'skipped_cached': self.skipped_cached,
+        }
@@ -0,0 +1,146 @@
+"""
+Lexical relevance ranking.
+"""
+
+# --- IMPORTS ---
+from collections import Counter
+
+import re
+import unicodedata
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Sequence
+
+
+# --- CONSTANTS ---
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Portuguese words that carry no product intent (accent-folded)
+STOPWORDS = frozenset({
+    'a', 'as', 'o', 'os', 'um', 'uma', 'uns', 'umas', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na', 'nos', 'nas',
+    'e', 'ou', 'com', 'por', 'pra', 'para', 'pro', 'ao', 'aos', 'que', 'se', 'me', 'eu', 'meu', 'minha', 'seu', 'sua',
+    'ola', 'oi', 'bom', 'boa', 'dia', 'tarde', 'noite', 'gostaria', 'queria', 'quero', 'preciso', 'procuro',
+    'algo', 'alguma', 'algum', 'coisa', 'produto', 'barato', 'barata', 'legal', 'favor', 'mais', 'muito',
+})
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+# --- CODE ---
+def tokenize(text: str) -> List[str]:
+    """
+    Split Portuguese text into index tokens: accent-folded, case-folded, without stopwords
+    and with plurals reduced to the singular ("fones" -> "fone").
+
+    :param text: Text
+    :returns: Tokens
+    """
+    folded = ''.join(c for c in unicodedata.normalize('NFKD', text.casefold()) if not unicodedata.combining(c))
+    tokens = []
+    for token in TOKEN_PATTERN.findall(folded):
+
+        # stopwords ending in "s" ("mais") are not plurals
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def query_weights(queries: Iterable[str]) -> Dict[str, float]:
+    """
+    Weight query tokens by the number of queries using them.
+
+    :param queries: Queries (e.g. the user's raw query and its normalized version)
+    :returns: Weight per token
+    """
+    weights: Counter = Counter()
+    for query in queries:
+        weights.update(set(tokenize(query)))
+    return dict(weights)
+
+
+class Bm25Index:
+    """
+    BM25 index of a small document set, as a sparse term-frequency matrix.
+
+    The vocabulary, document lengths and IDF are computed once; scoring a query only
+    slices the matrix columns of its tokens, so it costs a few vectorized operations.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = BM25_K1, b: float = BM25_B) -> None:
+        """
+        Index documents.
+
+        :param documents: Documents (e.g. product titles)
+        :param k1: Term frequency saturation
+        :param b: Document length normalization
+        """
+        # numpy and scipy are imported on first use (speeds up startup)
+        from scipy import sparse  # pylint: disable=C0415
+
+        import numpy as np  # pylint: disable=C0415
+
+        # term occurrences
+        self.vocabulary: Dict[str, int] = {}
+        rows: List[int] = []
+        columns: List[int] = []
+        for row, document in enumerate(documents):
+            for token in tokenize(document):
+                rows.append(row)
+                columns.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+
+        # term frequencies (duplicate occurrences are summed), by column for query slicing
+        self.size = len(documents)
+        frequencies = sparse.csr_matrix((np.ones(len(rows)), (rows, columns)),
+                                        shape=(self.size, len(self.vocabulary)))
+        frequencies.sum_duplicates()
+        self.frequencies = frequencies.tocsc()
+
+        # document length normalization and inverse document frequencies
+        lengths = np.asarray(frequencies.sum(axis=1)).ravel()
+        average = lengths.mean() if self.size and lengths.mean() else 1.0
+        self.k1 = k1
+        self.norms = k1 * (1 - b + b * lengths / average)
+        frequency = np.bincount(frequencies.indices, minlength=len(self.vocabulary))
+        self.idf = np.log1p((self.size - frequency + 0.5) / (frequency + 0.5))
+
+
+    def scores(self, weights: Dict[str, float]) -> Any:
+        """
+        Score every document against a query.
+
+        :param weights: Query token weights
+        :returns: BM25 score per document (numpy array)
+        """
+        import numpy as np  # pylint: disable=C0415
+
+        # query tokens known to the index
+        columns = [self.vocabulary[token] for token in weights if token in self.vocabulary]
+        if not columns:
+            return np.zeros(self.size)
+        boosts = self.idf[columns] * np.array([weights[token] for token in weights if token in self.vocabulary])
+
+        # saturated term frequencies of the query columns, summed per document
+        matches = self.frequencies[:, columns].tocoo()
+        saturated = matches.data * (self.k1 + 1) / (matches.data + self.norms[matches.row])
+        return np.bincount(matches.row, weights=saturated * boosts[matches.col], minlength=self.size)
+
+
+    def rank(self, weights: Dict[str, float]) -> List[int]:
+        """
+        Order documents by relevance to a query (ties keep their original order).
+
+        :param weights: Query token weights
+        :returns: Document indexes, most relevant first
+        """
+        import numpy as np  # pylint: disable=C0415
+        return np.argsort(-self.scores(weights), kind='stable').tolist()
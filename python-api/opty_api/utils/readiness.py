@@ -0,0 +1,196 @@
+"""
+Dependency readiness probes.
+"""
+
+# --- IMPORTS ---
+from datetime import datetime
+from datetime import timezone
+from opty_api.utils.logger import logger
+
+import asyncio
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+
+Check = Callable[[], Awaitable[Any]]
+
+
+# --- CONSTANTS ---
+SEVERITY = {'OK': 0, 'UNKNOWN': 1, 'WARNING': 2, 'FAILURE': 3}
+STALE_INTERVALS = 3
+
+
+# --- CODE ---
+class Probe:
+    """
+    Periodic check of a dependency, with its last result.
+    """
+
+    def __init__(self, name: str, check: Check, critical: bool = True) -> None:
+        """
+        Initialize the probe.
+
+        :param name: Dependency name
+        :param check: Coroutine function raising if the dependency is unavailable
+        :param critical: Whether the service cannot serve without the dependency
+        """
+        self.name = name
+        self.check = check
+        self.critical = critical
+        self.failures = 0
+        self.result: Dict[str, Any] = {'status': 'UNKNOWN', 'critical': critical}
+
+
+class ReadinessMonitor:
+    """
+    Run dependency probes in the background and keep their results in memory.
+
+    A failing probe is reported as WARNING until it fails `failure_threshold` times
+    in a row; then it is a FAILURE if the dependency is critical. Slow but
+    successful probes are reported as WARNING.
+    """
+
+    def __init__(self,
+                 interval: float = 10.0,
+                 timeout: float = 2.0,
+                 latency_warning_ms: float = 500.0,
+                 failure_threshold: int = 3) -> None:
+        """
+        Initialize the monitor.
+
+        :param interval: Time between probe rounds, in seconds
+        :param timeout: Time a probe may take before it fails, in seconds
+        :param latency_warning_ms: Latency above which a probe is reported as WARNING
+        :param failure_threshold: Consecutive failures before a critical probe is a FAILURE
+        """
+        self.interval = interval
+        self.timeout = timeout
+        self.latency_warning_ms = latency_warning_ms
+        self.failure_threshold = failure_threshold
+
+        self.probes: List[Probe] = []
+        self.task: Optional[asyncio.Task] = None
+        self.__snapshot: Dict[str, Any] = {'status': 'UNKNOWN', 'checked_at': None, 'dependencies': {}}
+        self.__checked_at = time.monotonic()
+
+
+    def register(self, name: str, check: Check, critical: bool = True) -> None:
+        """
+        Add a dependency probe.
+
+        :param name: Dependency name
+        :param check: Coroutine function raising if the dependency is unavailable
+        :param critical: Whether the service cannot serve without the dependency
+        """
+        self.probes.append(Probe(name, check, critical))
+
+
+    def start(self) -> None:
+        """
+        Start probing in the background.
+        """
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+
+    def stop(self) -> None:
+        """
+        Stop probing.
+        """
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+
+    async def run(self) -> None:
+        """
+        Probe every dependency on each interval.
+        """
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+
+    async def probe_all(self) -> Dict[str, Any]:
+        """
+        Run every probe concurrently and rebuild the snapshot.
+
+        :returns: Snapshot
+        """
+        await asyncio.gather(*(self.probe(probe) for probe in self.probes))
+
+        # overall status is the worst dependency status
+        dependencies = {probe.name: probe.result for probe in self.probes}
+        statuses = [result['status'] for result in dependencies.values()] or ['OK']
+        status = max(statuses, key=SEVERITY.__getitem__)
+
+        # log status changes
+        if status != self.__snapshot['status']:
+            logger.info(f'Readiness changed to {status}', status=status)
+
+        self.__checked_at = time.monotonic()
+        self.__snapshot = {
+            'status': status,
+            'checked_at': datetime.now(timezone.utc).isoformat(),
+            'dependencies': dependencies,
+        }
+        return self.__snapshot
+
+
+    async def probe(self, probe: Probe) -> None:
+        """
+        Run a probe and store its result.
+
+        :param probe: Probe to run
+        """
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(probe.check(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            error = f'timed out after {self.timeout}s'
+        except Exception as e:  # pylint: disable=W0718
+            error = str(e) or type(e).__name__
+        latency_ms = round((time.perf_counter() - start) * 1000, 3)
+
+        # successful probe: OK unless slow
+        if error is None:
+            probe.failures = 0
+            status = 'WARNING' if latency_ms > self.latency_warning_ms else 'OK'
+
+        # failed probe: FAILURE once the threshold is reached on a critical dependency
+        else:
+            probe.failures += 1
+            failing = probe.critical and probe.failures >= self.failure_threshold
+            status = 'FAILURE' if failing else 'WARNING'
+            logger.warning(f'Readiness probe "{probe.name}" failed: {error}',
+                           probe=probe.name, failures=probe.failures)
+
+        probe.result = {
+            'status': status,
+            'critical': probe.critical,
+            'latency_ms': latency_ms,
+            'consecutive_failures': probe.failures,
+            'error': error,
+        }
+
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the last probe results.
+
+        :returns: Overall status, time of the last round and result by dependency
+        """
+
+        # probes stopped running: results can no longer be trusted
+        stale = time.monotonic() - self.__checked_at > STALE_INTERVALS * self.interval + self.timeout
+        if stale and self.__snapshot['status'] == 'OK':
+            return {**self.__snapshot, 'status': 'WARNING', 'stale': True}
+        return self.__snapshot
@@ -0,0 +1,245 @@
+"""
+Fair-share scheduling of outbound requests.
+"""
+
+# --- IMPORTS ---
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from opty_api.err.queue_timeout_error import QueueTimeoutError
+from opty_api.utils.deadline import stage_timeout
+
+import asyncio
+import heapq
+import itertools
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import AsyncIterator
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+
+Tenant = Tuple[str, float]
+
+
+# --- CONSTANTS ---
+ANONYMOUS: Tenant = ('anonymous', 1.0)
+WAIT_SAMPLES = 1000
+TOP_TENANTS = 10
+
+
+# --- GLOBAL ---
+# Tenant (key, weight) on whose behalf outbound requests are made
+tenant_var: ContextVar[Tenant] = ContextVar('tenant', default=ANONYMOUS)
+
+
+# --- CODE ---
+class FairScheduler:
+    """
+    Outbound request scheduler sharing a global concurrency cap fairly between tenants.
+
+    Waiting requests are served by start-time fair queuing: each request is tagged with
+    max(virtual time, tenant's last finish tag) and the tenant's finish tag advances by
+    1 / weight, so a tenant with weight 4 gets 4 slots for each slot of a weight-1 tenant
+    while both are backlogged, and a tenant flooding the queue only delays itself.
+    """
+
+    def __init__(self, concurrency: int = 8, max_queue_time: float = 10.0) -> None:
+        """
+        Initialize the scheduler.
+
+        :param concurrency: Maximum number of requests in flight
+        :param max_queue_time: Time a request may wait for a slot, in seconds
+        """
+        self.concurrency = concurrency
+        self.max_queue_time = max_queue_time
+
+        self.active = 0
+        self.vtime = 0.0
+        self.finish_tags: Dict[str, float] = {}
+        self.depths: Dict[str, int] = {}
+        self.__heap: List[Tuple[float, int, asyncio.Future, str]] = []
+        self.__seq = itertools.count()
+        self.__waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+        self.dispatched = 0
+        self.timeouts = 0
+
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold a request slot on behalf of the current tenant (tenant_var).
+
+        :raises QueueTimeoutError: If no slot frees up within max_queue_time
+        """
+        await self.acquire(*tenant_var.get())
+        try:
+            yield
+        finally:
+            self.release()
+
+
+    @asynccontextmanager
+    async def spare_slot(self) -> AsyncIterator[None]:
+        """
+        Hold a free request slot without queuing nor charging any tenant (e.g. for hedges).
+
+        :raises QueueTimeoutError: If no slot is free or requests are waiting
+        """
+        if not self.try_acquire():
+            raise QueueTimeoutError('No spare outbound slot.')
+        try:
+            yield
+        finally:
+            self.release()
+
+
+    def try_acquire(self) -> bool:
+        """
+        Take a free request slot, without queuing.
+
+        :returns: True if a slot was taken, False if none is free or requests are waiting
+        """
+        if self.active >= self.concurrency or self.__heap:
+            return False
+        self.active += 1
+        self.dispatched += 1
+        return True
+
+
+    async def acquire(self, key: str, weight: float) -> None:
+        """
+        Wait for a request slot.
+
+        :param key: Tenant key
+        :param weight: Tenant weight
+        :raises QueueTimeoutError: If no slot frees up within max_queue_time (or before the request deadline)
+        """
+        start = time.perf_counter()
+
+        # free slot and nobody waiting: go ahead
+        if self.try_acquire():
+            self.__waits.append(0.0)
+            return
+
+        # tag request and queue it
+        tag = max(self.vtime, self.finish_tags.get(key, 0.0))
+        self.finish_tags[key] = tag + 1.0 / weight
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.__heap, (tag, next(self.__seq), future, key))
+        self.depths[key] = self.depths.get(key, 0) + 1
+
+        # wait for a slot (no longer than the request has left)
+        timeout = stage_timeout(self.max_queue_time)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+
+        # deadline exceeded: give up (the slot may have been granted meanwhile)
+        except asyncio.TimeoutError as e:
+            if future.done():
+                self.release()
+            else:
+                future.cancel()
+                self.dequeued(key)
+            self.timeouts += 1
+            raise QueueTimeoutError(f'No outbound slot for "{key}" within {timeout:.3f}s.') from e
+
+        # waiter cancelled: hand the slot over or drop the request
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+                self.dequeued(key)
+            raise
+
+        self.__waits.append((time.perf_counter() - start) * 1000)
+
+
+    def release(self) -> None:
+        """
+        Free a slot, handing it over to the next waiting request.
+        """
+        self.active -= 1
+        while self.__heap and self.active < self.concurrency:
+            tag, _, future, key = heapq.heappop(self.__heap)
+
+            # request gave up while waiting
+            if future.done():
+                continue
+
+            # grant slot
+            self.dequeued(key)
+            self.vtime = tag
+            self.active += 1
+            self.dispatched += 1
+            future.set_result(None)
+
+        # idle: forget finish tags (they only matter between backlogged tenants)
+        if not self.__heap and not self.active:
+            self.finish_tags.clear()
+
+
+    def spare(self) -> int:
+        """
+        Get the number of slots free for a new request.
+
+        :returns: Free slots (0 while requests are waiting)
+        """
+        return 0 if self.__heap else self.concurrency - self.active
+
+
+    def dequeued(self, key: str) -> None:
+        """
+        Update the queue depth of a tenant after one of its requests left the queue.
+
+        :param key: Tenant key
+        """
+        self.depths[key] -= 1
+        if not self.depths[key]:
+            del self.depths[key]
+
+
+    def deepest_queues(self, limit: int = TOP_TENANTS) -> Dict[str, int]:
+        """
+        Get the tenants with the most waiting requests (keys identify users and client IPs).
+
+        :param limit: Maximum number of tenants
+        :returns: Queue depth by tenant key, deepest first
+        """
+        return dict(sorted(self.depths.items(), key=lambda item: item[1], reverse=True)[:limit])
+
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler gauges and queue wait percentiles.
+
+        :returns: Slots in use, queue depth (total and deepest tenant queue), counters and wait times (ms)
+        """
+        waits = sorted(self.__waits)
+
+        # queue wait percentiles
+        def percentile(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else 0.0
+
+        return {
+            'concurrency': self.concurrency,
+            'active': self.active,
+            'queued': sum(self.depths.values()),
+            'tenants_waiting': len(self.depths),
+            'deepest_queue': max(self.depths.values(), default=0),
+            'dispatched': self.dispatched,
+            'timeouts': self.timeouts,
+            'wait_ms': {
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+                'max': round(waits[-1], 3) if waits else 0.0,
+            },
+        }
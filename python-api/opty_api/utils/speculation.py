@@ -0,0 +1,116 @@
+"""
+Speculative execution.
+"""
+
+# --- IMPORTS ---
+from collections.abc import Hashable
+from opty_api.utils.cache import TaskCache
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+
+V = TypeVar('V')
+
+
+# --- CODE ---
+class Speculator(Generic[V]):
+    """
+    Start work on a guessed input while the actual input is still being computed.
+
+    When the actual input has the same key as the guess, the in-flight speculative work
+    is used. Otherwise the speculative work is cancelled (or kept in the result cache
+    for later) and the work runs again on the actual input.
+    """
+
+    def __init__(self, results: TaskCache[V], keep_misses: bool = False) -> None:
+        """
+        Initialize the speculator.
+
+        :param results: Cache of (in-flight) results, by key
+        :param keep_misses: Whether wrong guesses run to completion and stay cached
+        """
+        self.results = results
+        self.keep_misses = keep_misses
+
+        self.speculated = 0
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+
+    async def run(self,
+                  guess: Optional[str],
+                  actual: Awaitable[str],
+                  work: Callable[[str], Awaitable[V]],
+                  key: Callable[[str], Hashable]) -> Tuple[str, V]:
+        """
+        Run work on the actual input, speculating on the guess meanwhile.
+
+        :param guess: Guessed input (None or empty to skip speculation)
+        :param actual: Awaitable returning the actual input
+        :param work: Coroutine function running the work on an input
+        :param key: Function mapping an input to its result key
+        :returns: Actual input and result of the work on it
+        """
+
+        # nothing to guess: run work once the actual input is known
+        if not guess:
+            self.skipped += 1
+            value = await actual
+            return value, await self.results.get(key(value), lambda: work(value))
+
+        # start work on the guess
+        guess_key = key(guess)
+        self.results.start(guess_key, lambda: work(guess))
+        self.speculated += 1
+
+        # compute actual input (wrong guess if it fails)
+        try:
+            value = await actual
+        except BaseException:
+            self.discard(guess_key)
+            raise
+
+        # right guess: use in-flight work
+        if key(value) == guess_key:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.discard(guess_key)
+
+        return value, await self.results.get(key(value), lambda: work(value))
+
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Cancel speculative work (unless wrong guesses are kept).
+
+        :param key: Result key of the guess
+        """
+        if not self.keep_misses:
+            self.results.discard(key)
+
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get speculation counters.
+
+        :returns: Speculations, hits, misses, hit rate and skipped speculations
+        """
+        return {
+            'keep_misses': self.keep_misses,
+            'speculated': self.speculated,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / self.speculated, 4) if self.speculated else 0.0,
+            'skipped': self.skipped,
+        }
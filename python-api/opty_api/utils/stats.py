@@ -0,0 +1,57 @@
+"""
+Descriptive statistics.
+"""
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import Sequence
+
+
+# --- CONSTANTS ---
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+HISTOGRAM_BINS = 10
+OUTLIER_IQR = 1.5
+
+
+# --- CODE ---
+def describe(values: Sequence[float], bins: int = HISTOGRAM_BINS, digits: int = 2) -> Dict[str, Any]:
+    """
+    Describe a sample with vectorized NumPy operations.
+
+    Outliers are values beyond OUTLIER_IQR interquartile ranges from the quartiles (Tukey's fences).
+
+    :param values: Sample
+    :param bins: Number of histogram bins
+    :param digits: Decimal digits kept
+    :returns: Count, min, max, mean, median, percentiles, histogram and outlier flags (one per value)
+    """
+    # numpy is imported on first use (speeds up startup)
+    import numpy as np  # pylint: disable=C0415
+
+    data = np.asarray(values, dtype=np.float64)
+
+    # empty sample
+    if not data.size:
+        return {'count': 0, 'min': None, 'max': None, 'mean': None, 'median': None,
+                'percentiles': {}, 'histogram': {'edges': [], 'counts': []}, 'outliers': []}
+
+    # percentiles and Tukey's fences
+    percentiles = np.percentile(data, PERCENTILES)
+    q1, q3 = percentiles[PERCENTILES.index(25)], percentiles[PERCENTILES.index(75)]
+    spread = OUTLIER_IQR * (q3 - q1)
+    outliers = (data < q1 - spread) | (data > q3 + spread)
+
+    # histogram
+    counts, edges = np.histogram(data, bins=bins)
+
+    return {
+        'count': int(data.size),
+        'min': round(float(data.min()), digits),
+        'max': round(float(data.max()), digits),
+        'mean': round(float(data.mean()), digits),
+        'median': round(float(np.median(data)), digits),
+        'percentiles': {f'p{p}': round(float(v), digits) for p, v in zip(PERCENTILES, percentiles)},
+        'histogram': {'edges': np.round(edges, digits).tolist(), 'counts': counts.tolist()},
+        'outliers': outliers.tolist(),
+    }
@@ -0,0 +1,142 @@
+"""
+Local verification of Supabase access tokens.
+"""
+
+# --- IMPORTS ---
+from jose import JWTError
+from jose import jwt
+from opty_api.err.invalid_token_error import InvalidTokenError
+from opty_api.utils.logger import logger
+
+import asyncio
+import httpx
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+
+# --- CONSTANTS ---
+HMAC_ALGORITHMS = ('HS256', 'HS384', 'HS512')
+ASYMMETRIC_ALGORITHMS = ('RS256', 'RS384', 'RS512', 'ES256', 'ES384', 'ES512')
+JWKS_REFRESH_INTERVAL = 30.0
+
+
+# --- CODE ---
+class TokenVerifier:
+    """
+    Verify Supabase access tokens without calling the Auth API.
+
+    HMAC tokens are checked against the project JWT secret; asymmetric tokens against
+    the project JWKS, which is cached and refetched when it expires or when a token
+    is signed with an unknown key ID (key rotation).
+    """
+
+    def __init__(self,
+                 jwks_url: str,
+                 audience: str,
+                 secret: Optional[str] = None,
+                 issuer: Optional[str] = None,
+                 jwks_ttl: float = 600.0) -> None:
+        """
+        Initialize the verifier.
+
+        :param jwks_url: URL of the project JSON Web Key Set
+        :param audience: Expected `aud` claim
+        :param secret: Project JWT secret (HMAC-signed tokens)
+        :param issuer: Expected `iss` claim (not checked if omitted)
+        :param jwks_ttl: Time the JWKS is cached for, in seconds
+        """
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.secret = secret
+        self.issuer = issuer
+        self.jwks_ttl = jwks_ttl
+
+        self.__keys: Dict[str, Dict[str, Any]] = {}
+        self.__fetched_at = 0.0
+        self.__lock = asyncio.Lock()
+
+
+    async def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Verify token signature, expiry and audience.
+
+        :param token: Encoded JWT
+        :returns: Token claims, or None if no local key can verify the token
+        :raises InvalidTokenError: If the token is malformed, expired or badly signed
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise InvalidTokenError(f'Malformed token: {str(e)}') from e
+
+        # get verification key
+        algorithm = header.get('alg')
+        if algorithm in HMAC_ALGORITHMS:
+            key: Any = self.secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            key = await self.get_key(header.get('kid'))
+        else:
+            raise InvalidTokenError(f'Unsupported token algorithm: {algorithm}')
+
+        # no local key: caller must fall back to the Auth API
+        if key is None:
+            return None
+
+        # verify token
+        try:
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                options={'verify_at_hash': False},
+            )
+        except JWTError as e:
+            raise InvalidTokenError(f'Invalid token: {str(e)}') from e
+
+
+    async def get_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Get a public key from the cached JWKS.
+
+        :param kid: Key ID from the token header
+        :returns: JWK, or None if the key is unknown
+        """
+        now = time.monotonic()
+        expired = now - self.__fetched_at > self.jwks_ttl
+        unknown = kid not in self.__keys and now - self.__fetched_at > JWKS_REFRESH_INTERVAL
+
+        # refresh on expiry or on an unknown key (rotation), rate limited
+        if expired or unknown:
+            async with self.__lock:
+                if self.__fetched_at <= now - min(self.jwks_ttl, JWKS_REFRESH_INTERVAL):
+                    await self.refresh()
+
+        # single-key sets may omit the key ID
+        if kid is None and len(self.__keys) == 1:
+            return next(iter(self.__keys.values()))
+        return self.__keys.get(kid)
+
+
+    async def refresh(self) -> None:
+        """
+        Fetch the JWKS.
+        """
+        self.__fetched_at = time.monotonic()
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(self.jwks_url)
+                response.raise_for_status()
+            keys: List[Dict[str, Any]] = response.json().get('keys', [])
+            self.__keys = {key.get('kid'): key for key in keys}
+
+        # keep previous keys if the JWKS is unavailable
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f'Could not fetch JWKS from {self.jwks_url}: {str(e)}')
@@ -0,0 +1,284 @@
+"""
+Lightweight request tracing.
+
+Spans are nested through a context var, so they follow the request across `await`
+boundaries and into tasks spawned from it. The sampling decision is taken once per
+trace, at the root span; finished traces are kept in a ring buffer and optionally
+appended to a JSON lines file.
+"""
+
+# --- IMPORTS ---
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from datetime import timezone
+from opty_api.utils.logger import Logger
+
+import functools
+import os
+import random
+import threading
+import time
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TypeVar
+
+
+T = TypeVar('T')
+
+
+# --- CODE ---
+class Span:
+    """
+    A timed operation within a trace.
+    """
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes', 'start', 'duration_ms', 'error')
+
+
+    def __init__(self, trace: Optional['Trace'], name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        """
+        Initialize and start a span.
+
+        :param trace: Trace the span belongs to (None for unsampled spans)
+        :param name: Span name
+        :param parent_id: Parent span ID (None for root spans)
+        :param attributes: Span attributes
+        """
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set a span attribute.
+
+        :param key: Attribute name
+        :param value: Attribute value
+        """
+        self.attributes[key] = value
+
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        """
+        Serialize span.
+
+        :param origin: Trace start (perf counter) used to compute the span offset
+        :returns: Span as a dictionary
+        """
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'offset_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': self.duration_ms,
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class Trace:
+    """
+    Spans recorded for a single root operation.
+    """
+    __slots__ = ('trace_id', 'started_at', 'spans')
+
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty trace.
+        """
+        self.trace_id = os.urandom(16).hex()
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+
+
+    def to_dict(self, root: Span) -> Dict[str, Any]:
+        """
+        Serialize trace.
+
+        :param root: Root span of the trace
+        :returns: Trace as a dictionary
+        """
+        return {
+            'trace_id': self.trace_id,
+            'name': root.name,
+            'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            'duration_ms': root.duration_ms,
+            'error': root.error,
+            'spans': [span.to_dict(root.start) for span in sorted(self.spans, key=lambda s: s.start)],
+        }
+
+
+# Span of the current context (UNSAMPLED while inside a trace that is not recorded)
+UNSAMPLED = Span(None, 'unsampled', None, {})
+current_span_var: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+class Tracer:
+    """
+    Span factory and in-process trace exporter.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, buffer_size: int = 200) -> None:
+        """
+        Initialize the tracer.
+
+        :param sample_rate: Fraction of root spans to record (0.0 - 1.0)
+        :param buffer_size: Number of finished traces kept in memory
+        """
+        self.sample_rate = sample_rate
+        self.__lock = threading.Lock()
+        self.__buffer: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.__file_exporter: Optional[Logger] = None
+
+
+    def configure(self,
+                  sample_rate: Optional[float] = None,
+                  buffer_size: Optional[int] = None,
+                  file_path: Optional[str] = None) -> None:
+        """
+        Update tracer settings.
+
+        :param sample_rate: Fraction of root spans to record
+        :param buffer_size: Number of finished traces kept in memory
+        :param file_path: JSON lines file finished traces are appended to
+        """
+
+        # update sampling rate
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+
+        # resize ring buffer
+        if buffer_size is not None:
+            with self.__lock:
+                self.__buffer = deque(self.__buffer, maxlen=buffer_size)
+
+        # write traces to file through a non-blocking writer
+        if file_path:
+            stream = open(file_path, 'a', encoding='utf-8')  # pylint: disable=R1732
+            self.__file_exporter = Logger(stream=stream)
+
+
+    @contextmanager
+    def span(self, name: str, force_sample: bool = False, **attributes: Any) -> Iterator[Span]:
+        """
+        Record a span around the wrapped block.
+
+        :param name: Span name
+        :param force_sample: Record the trace regardless of the sampling rate (root spans only)
+        :param attributes: Span attributes
+        :returns: Context manager yielding the span
+        """
+        parent = current_span_var.get()
+
+        # trace not recorded: nothing to do
+        if parent is UNSAMPLED:
+            yield UNSAMPLED
+            return
+
+        # root span: take the sampling decision for the whole trace
+        if parent is None and not force_sample and random.random() >= self.sample_rate:
+            token = current_span_var.set(UNSAMPLED)
+            try:
+                yield UNSAMPLED
+            finally:
+                current_span_var.reset(token)
+            return
+
+        # start span
+        trace = parent.trace if parent is not None else Trace()
+        span = Span(trace, name, parent.span_id if parent is not None else None, attributes)
+        token = current_span_var.set(span)
+
+        try:
+            yield span
+
+        # record error and propagate it
+        except BaseException as e:
+            span.error = f'{type(e).__name__}: {e}'
+            raise
+
+        # end span
+        finally:
+            span.duration_ms = round((time.perf_counter() - span.start) * 1000, 3)
+            current_span_var.reset(token)
+            trace.spans.append(span)
+
+            # root span finished: export trace
+            if parent is None:
+                self.__export(trace.to_dict(span))
+
+
+    def recent(self, limit: int = 50, min_duration_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Get the most recent finished traces.
+
+        :param limit: Maximum number of traces to return
+        :param min_duration_ms: Only return traces at least this slow
+        :returns: Traces, newest first
+        """
+        with self.__lock:
+            traces = list(self.__buffer)
+
+        # filter newest traces
+        result = []
+        for trace in reversed(traces):
+            if trace['duration_ms'] >= min_duration_ms:
+                result.append(trace)
+            if len(result) >= limit:
+                break
+
+        # return traces
+        return result
+
+
+    def __export(self, trace: Dict[str, Any]) -> None:
+        """
+        Export a finished trace.
+
+        :param trace: Serialized trace
+        """
+
+        # keep trace in memory
+        with self.__lock:
+            self.__buffer.append(trace)
+
+        # append trace to file
+        if self.__file_exporter is not None:
+            self.__file_exporter.info('trace', trace=trace)
+
+
+def traced(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Decorator recording a span around each call of a coroutine function.
+
+    :param name: Span name
+    :returns: Decorator
+    """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with tracer.span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Process-wide tracer (configured from the application config on import of opty_api.app)
+tracer = Tracer()
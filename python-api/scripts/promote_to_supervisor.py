@@ -1,10 +1,12 @@
 """
-Script to promote a user to supervisor role.
+Script to promote users to supervisor role.
 
 Usage:
-  python scripts/promote_to_supervisor.py promote <email>   # Promote user to supervisor
-  python scripts/promote_to_supervisor.py demote <email>    # Demote supervisor to user
-  python scripts/promote_to_supervisor.py list              # List all supervisors
+  python scripts/promote_to_supervisor.py promote <email>...              # Promote users to supervisor
+  python scripts/promote_to_supervisor.py demote <email>...               # Demote supervisors to user
+  python scripts/promote_to_supervisor.py promote --file emails.txt       # Read emails from a file ('-' for stdin)
+  python scripts/promote_to_supervisor.py promote --dry-run <email>...    # Only show what would change
+  python scripts/promote_to_supervisor.py list                            # List all supervisors
 """
 
 # --- IMPORTS ---
@@ -12,219 +14,185 @@ from dotenv import load_dotenv
 from opty_api.mongo.setup.connection import MongoDBSetup
 from opty_api.mongo.repositories.users import UserRepository
 
+import argparse
 import asyncio
 import sys
 import os
 
 
+# --- TYPES ---
+from typing import List
+from typing import Optional
+
+
+# --- CONSTANTS ---
+ROLES = {
+    'promote': 'supervisor',
+    'demote': 'user',
+}
+SYMBOLS = {
+    'updated': '✅',
+    'unchanged': 'ℹ️ ',
+    'not_found': '❌',
+}
+
+
 # --- GLOBALS ---
 load_dotenv()
 
-mongodb = MongoDBSetup(db_name=os.getenv('MONGODB_DB_NAME'), mongodb_url=os.getenv('MONGODB_URL'))
-user_repository = UserRepository(mongodb)
-
 # Add parent directory to path to import opty_api
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 
 # --- CODE ---
-async def promote_user(email: str) -> bool:
+def read_emails(emails: List[str], file: Optional[str]) -> List[str]:
     """
-    Promote a user to supervisor role by email.
+    Collect emails from the command line and from a file.
+
+    :param emails: Emails given as arguments
+    :param file: Path of a file with one email per line ('-' for stdin)
 
-    :param email: User's email address
+    :returns: Emails, without blanks, comments or duplicates, in input order
     """
-    try:
-        # Find user by email
-        user = await user_repository.get_by_email(email)
+    lines = list(emails)
 
-        # User not found: print and return False
-        if not user:
-            print(f'❌ User with email "{email}" not found.')
-            return False
+    # read emails from file or stdin
+    if file == '-':
+        lines.extend(sys.stdin)
+    elif file:
+        with open(file, encoding='utf-8') as f:
+            lines.extend(f)
 
-        # User already supervisor: print and return True
-        if user['role'] == 'supervisor':
-            print(f'ℹ️  User "{email}" is already a supervisor.')
-            return True
+    # drop blanks, comments and duplicates
+    stripped = (line.strip() for line in lines)
+    return list(dict.fromkeys(line for line in stripped if line and not line.startswith('#')))
 
-        # Update user role to supervisor
-        success = await user_repository.update_role(email, 'supervisor')
 
-        # Print success message
-        print(f'✅ Successfully promoted "{email}" to supervisor!')
-        print(f'   Name: {user.name}')
-        print(f'   Supabase ID: {user.supabase_id}')
+async def change_roles(user_repository: UserRepository, emails: List[str], role: str, dry_run: bool) -> bool:
+    """
+    Set the role of many users with a single bulk write.
 
-        # Return success status
-        return True
+    :param user_repository: User repository
+    :param emails: Users' email addresses
+    :param role: New role (user or supervisor)
+    :param dry_run: Only show what would change
 
-    # Error occurred: print and return False
-    except Exception as e:
-        print(f'❌ Error: {str(e)}')
-        return False
+    :returns: True if every user was found
+    """
 
-    # Close MongoDB connection
-    finally:
-        mongodb.close_db()
+    # Apply role changes
+    results = await user_repository.set_roles(emails, role, dry_run=dry_run)
+
+    # Print per-email results
+    for email, result in results.items():
+        print(f'{SYMBOLS[result]} {email}: {result.replace("_", " ")}')
+
+    # Print summary
+    updated = sum(result == 'updated' for result in results.values())
+    unchanged = sum(result == 'unchanged' for result in results.values())
+    not_found = sum(result == 'not_found' for result in results.values())
+    action = 'would be set' if dry_run else 'set'
+    print(f'\n📋 {updated} user(s) {action} to "{role}", {unchanged} unchanged, {not_found} not found.')
+
+    # Return success status
+    return not_found == 0
 
 
-async def demote_user(email: str) -> bool:
+async def list_supervisors(user_repository: UserRepository) -> None:
     """
-    Demote a supervisor back to regular user.
+    List all supervisors in the system, as they are read from MongoDB.
 
-    :param email: User's email address
+    :param user_repository: User repository
     """
-    try:
-        # Find user by email
-        user = await user_repository.get_by_email(email)
+    count = 0
+
+    # Print supervisors
+    async for supervisor in user_repository.stream(role='supervisor', is_active=True):
+        if not count:
+            print('\n📋 Supervisors:')
+            print('=' * 80)
+        count += 1
+        print(f'  • {supervisor.get("name")} ({supervisor["email"]})')
+        print(f'    Supabase ID: {supervisor["supabase_id"]}')
+        print(f'    Created: {supervisor.get("created_at")}')
+        print()
+
+    # No supervisors found: print message
+    if not count:
+        print('ℹ️  No supervisors found in the system.')
+    else:
+        print(f'{count} supervisor(s).')
 
-        # User not found: print and return False
-        if not user:
-            print(f'❌ User with email "{email}" not found.')
-            return False
 
-        # User already regular user: print and return True
-        if user.role == 'user':
-            print(f'ℹ️  User "{email}" is already a regular user.')
-            return True
+async def main(options: argparse.Namespace) -> bool:
+    """
+    Run a command over a single MongoDB connection.
 
-        # Update user role to user
-        await user_repository.update_role(email, 'user')
+    :param options: Parsed command line options
 
-        # Print success message
-        print(f'✅ Successfully demoted "{email}" to regular user!')
-        print(f'   Name: {user.name}')
-        print(f'   Supabase ID: {user.supabase_id}')
+    :returns: True on success
+    """
 
-        # Return success status
-        return True
+    # Connect to MongoDB
+    mongodb = MongoDBSetup(db_name=os.getenv('MONGODB_DB_NAME'), mongodb_url=os.getenv('MONGODB_URL'))
+    user_repository = UserRepository(mongodb)
 
-    # Error occurred: print and return False
-    except Exception as e:
-        print(f'❌ Error: {str(e)}')
-        return False
+    try:
+        # List all supervisors
+        if options.command == 'list':
+            await list_supervisors(user_repository)
+            return True
 
-    # Close MongoDB connection
-    finally:
-        mongodb.close_db()
+        # No emails given: print error
+        emails = read_emails(options.emails, options.file)
+        if not emails:
+            print('❌ Error: Email address required.')
+            return False
 
+        # Promote or demote users
+        return await change_roles(user_repository, emails, ROLES[options.command], options.dry_run)
 
-async def list_supervisors() -> None:
-    """
-    List all supervisors in the system.
-    """
-    try:
-        # Find all supervisors
-        supervisors = await user_repository.get_by_role('supervisor')
-
-        # No supervisors found: print message
-        if not supervisors:
-            print('ℹ️  No supervisors found in the system.')
-            return
-
-        # Print supervisors
-        print(f'\n📋 Supervisors ({len(supervisors)}):')
-        print('=' * 80)
-        for supervisor in supervisors:
-            status = '✅ Active' if supervisor.is_active else '❌ Inactive'
-            print(f'  • {supervisor.name} ({supervisor.email})')
-            print(f'    Status: {status}')
-            print(f'    Created: {supervisor.created_at}')
-            print()
-
-    # Error occurred: print message
-    except Exception as e:
+    # Error occurred: print and return False
+    except Exception as e:  # pylint: disable=W0718
         print(f'❌ Error: {str(e)}')
+        return False
 
     # Close MongoDB connection
     finally:
-        mongodb.close_db()
+        await mongodb.close_db()
 
 
-def print_usage() -> None:
+def parse_args() -> argparse.Namespace:
     """
-    Print script usage information.
+    Parse command line arguments.
+
+    :returns: Parsed options
     """
-    print("""
-🔐 Supervisor Management Script
+    parser = argparse.ArgumentParser(
+        description='🔐 Supervisor Management Script',
+        epilog='Environment Variables:\n'
+               '  MONGODB_URL      - MongoDB connection string\n'
+               '  MONGODB_DB_NAME  - Database name',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
 
-Usage:
-  python scripts/promote_to_supervisor.py promote <email>   # Promote user to supervisor
-  python scripts/promote_to_supervisor.py demote <email>    # Demote supervisor to user
-  python scripts/promote_to_supervisor.py list              # List all supervisors
+    # promote / demote commands
+    for command, role in ROLES.items():
+        subparser = commands.add_parser(command, help=f'Set users role to {role}')
+        subparser.add_argument('emails', nargs='*', help='User email addresses')
+        subparser.add_argument('--file', '-f', help="File with one email per line ('-' for stdin)")
+        subparser.add_argument('--dry-run', action='store_true', help='Only show what would change')
 
-Examples:
-  python scripts/promote_to_supervisor.py promote admin@example.com
-  python scripts/promote_to_supervisor.py demote admin@example.com
-  python scripts/promote_to_supervisor.py list
+    # list command
+    commands.add_parser('list', help='List all supervisors')
 
-Environment Variables:
-  MONGODB_URL      - MongoDB connection string
-  MONGODB_DB_NAME  - Database name
-""")
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
     """
     Main entry point for the script.
     """
-
-    # No arguments provided: print usage and exit
-    if len(sys.argv) < 2:
-        print_usage()
-        sys.exit(1)
-
-    # Get command from arguments
-    command = sys.argv[1].lower()
-
-    # Promote user to supervisor
-    if command == 'promote':
-
-        # Check if email argument is provided
-        if len(sys.argv) < 3:
-            print('❌ Error: Email address required.')
-            print('Usage: python scripts/promote_to_supervisor.py promote <email>')
-            sys.exit(1)
-
-        # Get email argument
-        email = sys.argv[2]
-
-        # Promote user to supervisor
-        success = asyncio.run(promote_user(email))
-
-        # Exit
-        sys.exit(0 if success else 1)
-
-    # Demote supervisor to user
-    elif command == 'demote':
-
-        # Check if email argument is provided
-        if len(sys.argv) < 3:
-            print('❌ Error: Email address required.')
-            print('Usage: python scripts/promote_to_supervisor.py demote <email>')
-            sys.exit(1)
-
-        # Get email argument
-        email = sys.argv[2]
-
-        # Demote supervisor to user
-        success = asyncio.run(demote_user(email))
-
-        # Exit
-        sys.exit(0 if success else 1)
-
-    # List all supervisors
-    elif command == 'list':
-
-        # List supervisors
-        asyncio.run(list_supervisors())
-
-        # Exit
-        sys.exit(0)
-
-    # Unknown command: print usage and exit
-    else:
-        print(f'❌ Unknown command: {command}')
-        print_usage()
-        sys.exit(1)
+    success = asyncio.run(main(parse_args()))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,177 @@
+"""
+Request deadline tests.
+"""
+
+# --- IMPORTS ---
+from opty_api.err.client_disconnected_error import ClientDisconnectedError
+from opty_api.err.deadline_exceeded_error import DeadlineExceededError
+from opty_api.utils.deadline import check_deadline
+from opty_api.utils.deadline import deadline_var
+from opty_api.utils.deadline import remaining
+from opty_api.utils.deadline import run_with_deadline
+from opty_api.utils.deadline import set_deadline
+from opty_api.utils.deadline import stage_timeout
+
+import asyncio
+import time
+import unittest
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import List
+
+
+# --- CODE ---
+class FakeRequest:
+    """
+    HTTP request whose client disconnects on demand.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the request.
+        """
+        self.messages: asyncio.Queue = asyncio.Queue()
+
+
+    async def receive(self) -> Dict[str, Any]:
+        """
+        Receive the next ASGI message.
+        """
+        return await self.messages.get()
+
+
+    def disconnect(self) -> None:
+        """
+        Disconnect the client.
+        """
+        self.messages.put_nowait({'type': 'http.disconnect'})
+
+
+class TestStageTimeout(unittest.TestCase):
+    """
+    Deadline bookkeeping tests.
+    """
+
+    def setUp(self) -> None:
+        """
+        Start without a deadline.
+        """
+        self.token = deadline_var.set(None)
+
+
+    def tearDown(self) -> None:
+        """
+        Restore the deadline.
+        """
+        deadline_var.reset(self.token)
+
+
+    def test_without_deadline(self) -> None:
+        """
+        Without a deadline, stages are only bounded by their own limit.
+        """
+        self.assertIsNone(remaining())
+        self.assertIsNone(stage_timeout())
+        self.assertEqual(stage_timeout(5.0), 5.0)
+        check_deadline()
+
+
+    def test_with_deadline(self) -> None:
+        """
+        With a deadline, stages get the time left, bounded by their own limit.
+        """
+        set_deadline(10.0)
+        self.assertEqual(stage_timeout(1.0), 1.0)
+        self.assertLessEqual(stage_timeout(60.0), 10.0)
+        self.assertGreater(stage_timeout(), 9.0)
+        check_deadline()
+
+
+    def test_passed_deadline(self) -> None:
+        """
+        Once the deadline passed, no time is left and work stops.
+        """
+        deadline_var.set(time.monotonic() - 1.0)
+        self.assertEqual(remaining(), 0.0)
+        self.assertEqual(stage_timeout(5.0), 0.0)
+        with self.assertRaises(DeadlineExceededError):
+            check_deadline()
+
+
+class TestRunWithDeadline(unittest.IsolatedAsyncioTestCase):
+    """
+    Deadline enforcement tests.
+    """
+
+    def setUp(self) -> None:
+        """
+        Record cancelled work.
+        """
+        self.cancelled: List[str] = []
+
+
+    async def work(self, name: str, delay: float) -> str:
+        """
+        Work taking some time, recording its cancellation.
+        """
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        return name
+
+
+    async def test_done_in_time(self) -> None:
+        """
+        Work done before its deadline returns its result.
+        """
+        set_deadline(1.0)
+        self.assertEqual(await run_with_deadline(self.work('fast', 0.0), FakeRequest()), 'fast')
+
+
+    async def test_without_deadline(self) -> None:
+        """
+        Work without a deadline runs to completion.
+        """
+        deadline_var.set(None)
+        self.assertEqual(await run_with_deadline(self.work('fast', 0.01)), 'fast')
+
+
+    async def test_work_error(self) -> None:
+        """
+        Work errors are raised as they are.
+        """
+
+        # failing work
+        async def fail() -> None:
+            raise RuntimeError('boom')
+
+        set_deadline(1.0)
+        with self.assertRaisesRegex(RuntimeError, 'boom'):
+            await run_with_deadline(fail())
+
+
+    async def test_deadline_passed(self) -> None:
+        """
+        Work still running at its deadline is cancelled.
+        """
+        set_deadline(0.01)
+        with self.assertRaises(DeadlineExceededError):
+            await run_with_deadline(self.work('slow', 1.0), FakeRequest())
+        self.assertEqual(self.cancelled, ['slow'])
+
+
+    async def test_client_disconnected(self) -> None:
+        """
+        Work is cancelled when the client disconnects.
+        """
+        set_deadline(1.0)
+        request = FakeRequest()
+        asyncio.get_running_loop().call_later(0.01, request.disconnect)
+        with self.assertRaises(ClientDisconnectedError):
+            await run_with_deadline(self.work('slow', 1.0), request)
+        self.assertEqual(self.cancelled, ['slow'])
@@ -0,0 +1,129 @@
+"""
+Hedged request tests.
+"""
+
+# --- IMPORTS ---
+from opty_api.utils.hedging import MIN_SAMPLES
+from opty_api.utils.hedging import Hedger
+
+import asyncio
+import unittest
+
+
+# --- CODE ---
+async def answer(value: str, delay: float = 0.0) -> str:
+    """
+    Answer after a delay.
+    """
+    await asyncio.sleep(delay)
+    return value
+
+
+async def fail(error: Exception, delay: float = 0.0) -> str:
+    """
+    Fail after a delay.
+    """
+    await asyncio.sleep(delay)
+    raise error
+
+
+class TestHedger(unittest.IsolatedAsyncioTestCase):
+    """
+    Hedger tests.
+    """
+
+    async def warm_up(self, hedger: Hedger) -> None:
+        """
+        Record enough fast requests for the hedging delay to be set (min_delay_ms).
+        """
+        for _ in range(MIN_SAMPLES):
+            await hedger.run(lambda: answer('fast'))
+        self.assertEqual(hedger.delay(), hedger.min_delay_ms / 1000)
+
+
+    async def test_no_hedge_while_warming_up(self) -> None:
+        """
+        Requests are not hedged until enough latencies are recorded.
+        """
+        hedger = Hedger(budget=1.0, min_delay_ms=1.0)
+        self.assertIsNone(hedger.delay())
+        self.assertEqual(await hedger.run(lambda: answer('slow', 0.02), lambda: answer('hedge')), 'slow')
+        self.assertEqual(hedger.hedged, 0)
+
+
+    async def test_hedge_wins(self) -> None:
+        """
+        A slow request is hedged and the first answer wins.
+        """
+        hedger = Hedger(budget=1.0, min_delay_ms=10.0)
+        await self.warm_up(hedger)
+        self.assertEqual(await hedger.run(lambda: answer('slow', 1.0), lambda: answer('hedge')), 'hedge')
+        self.assertEqual(hedger.hedged, 1)
+        self.assertEqual(hedger.hedge_wins, 1)
+
+
+    async def test_primary_fails_hedge_wins(self) -> None:
+        """
+        The hedge answers when the first request fails after it went out.
+        """
+        hedger = Hedger(budget=1.0, min_delay_ms=10.0)
+        await self.warm_up(hedger)
+        result = await hedger.run(lambda: fail(ValueError('primary'), 0.05), lambda: answer('hedge', 0.1))
+        self.assertEqual(result, 'hedge')
+        self.assertEqual(hedger.hedge_wins, 1)
+
+
+    async def test_every_attempt_fails(self) -> None:
+        """
+        The error of the first request is raised when every attempt failed.
+        """
+        hedger = Hedger(budget=1.0, min_delay_ms=10.0)
+        await self.warm_up(hedger)
+        with self.assertRaisesRegex(ValueError, 'primary'):
+            await hedger.run(lambda: fail(ValueError('primary'), 0.05), lambda: fail(KeyError('hedge')))
+        self.assertEqual(hedger.hedged, 1)
+
+
+    async def test_budget(self) -> None:
+        """
+        Hedges are capped at budget times the number of requests.
+        """
+        hedger = Hedger(budget=0.01, min_delay_ms=10.0)
+        await self.warm_up(hedger)
+        for _ in range(2):
+            await hedger.run(lambda: answer('slow', 0.03))
+        self.assertEqual(hedger.hedged, 1)
+        self.assertEqual(hedger.budget_exhausted, 1)
+
+
+    async def test_not_admitted(self) -> None:
+        """
+        No hedge goes out when the caller does not admit it.
+        """
+        hedger = Hedger(budget=1.0, min_delay_ms=10.0)
+        await self.warm_up(hedger)
+        result = await hedger.run(lambda: answer('slow', 0.03), lambda: answer('hedge'), admit=lambda: False)
+        self.assertEqual(result, 'slow')
+        self.assertEqual(hedger.hedged, 0)
+        self.assertEqual(hedger.stats()['skipped_busy'], 1)
+
+
+    async def test_loser_cancelled(self) -> None:
+        """
+        The losing attempt is cancelled.
+        """
+        hedger = Hedger(budget=1.0, min_delay_ms=10.0)
+        await self.warm_up(hedger)
+        cancelled = asyncio.Event()
+
+        # slow request noticing its cancellation
+        async def slow() -> str:
+            try:
+                return await answer('slow', 1.0)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        self.assertEqual(await hedger.run(slow, lambda: answer('hedge')), 'hedge')
+        await asyncio.sleep(0)
+        self.assertTrue(cancelled.is_set())
@@ -0,0 +1,219 @@
+"""
+Background job queue tests.
+"""
+
+# --- IMPORTS ---
+from opty_api.err.queue_full_error import QueueFullError
+from opty_api.utils.jobs import JobQueue
+
+import asyncio
+import unittest
+
+
+# --- TYPES ---
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+
+# --- CODE ---
+class FakeJobRepository:
+    """
+    In-memory job repository (expiration is not simulated).
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the repository.
+        """
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+
+    async def add_job(self, job: Dict[str, Any], ttl: float) -> bool:  # pylint: disable=W0613
+        """
+        Add a job unless another job holds its key.
+        """
+        await asyncio.sleep(0)
+        if any(other.get('key') == job['key'] for other in self.jobs.values()):
+            return False
+        self.jobs[job['_id']] = dict(job)
+        return True
+
+
+    async def get_by_key(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the shareable job of a key.
+        """
+        await asyncio.sleep(0)
+        return next((dict(job) for job in self.jobs.values()
+                     if job.get('key') == key and job['status'] != 'failed'), None)
+
+
+    async def release_key(self, key: str) -> None:
+        """
+        Release a key held by failed jobs.
+        """
+        await asyncio.sleep(0)
+        for job in self.jobs.values():
+            if job.get('key') == key and job['status'] == 'failed':
+                del job['key']
+
+
+    async def get_by_id(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Find job by ID.
+        """
+        await asyncio.sleep(0)
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+    async def update_job(self, job_id: str, update_data: Dict[str, Any], ttl: float) -> None:  # pylint: disable=W0613
+        """
+        Update job.
+        """
+        await asyncio.sleep(0)
+        self.jobs[job_id].update(update_data)
+
+
+    async def fail_jobs(self, job_ids: List[str], error: str, ttl: float) -> None:  # pylint: disable=W0613
+        """
+        Mark unfinished jobs as failed.
+        """
+        await asyncio.sleep(0)
+        for job_id in job_ids:
+            if self.jobs[job_id]['status'] not in ('done', 'failed'):
+                self.jobs[job_id].update({'status': 'failed', 'error': error})
+
+
+    async def delete_job(self, job_id: str) -> None:
+        """
+        Delete job.
+        """
+        await asyncio.sleep(0)
+        self.jobs.pop(job_id, None)
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    """
+    Job queue tests.
+    """
+
+    def setUp(self) -> None:
+        """
+        Create a queue whose handler records its payloads.
+        """
+        self.payloads: List[Any] = []
+        self.release = asyncio.Event()
+        self.repository = FakeJobRepository()
+        self.queue = JobQueue(self.handler, self.repository, workers=1, max_queued=2)
+
+
+    async def asyncTearDown(self) -> None:
+        """
+        Stop the workers.
+        """
+        await self.queue.stop()
+
+
+    async def handler(self, payload: Any) -> Any:
+        """
+        Run a job payload, once released.
+        """
+        self.payloads.append(payload)
+        await self.release.wait()
+        if payload == 'boom':
+            raise RuntimeError('boom')
+        return [payload]
+
+
+    async def test_deduplicates_submissions(self) -> None:
+        """
+        Submissions with the key of an unfinished job share that job.
+        """
+        self.queue.start()
+        first, created = await self.queue.submit('1:fone', 'fone')
+        second, joined = await self.queue.submit('1:fone', 'fone')
+        self.assertTrue(created)
+        self.assertFalse(joined)
+        self.assertEqual(first['_id'], second['_id'])
+
+        # job runs once
+        self.release.set()
+        done = await self.queue.wait(first['_id'], timeout=1.0)
+        self.assertEqual(done['status'], 'done')
+        self.assertEqual(done['result'], ['fone'])
+        self.assertEqual(self.payloads, ['fone'])
+        self.assertEqual(self.queue.stats()['deduplicated'], 1)
+
+
+    async def test_failed_job_releases_key(self) -> None:
+        """
+        A failed job keeps its error and the next submission creates a new job.
+        """
+        self.queue.start()
+        self.release.set()
+        failed, _ = await self.queue.submit('1:boom', 'boom')
+        failed = await self.queue.wait(failed['_id'], timeout=1.0)
+        self.assertEqual(failed['status'], 'failed')
+        self.assertEqual(failed['error'], 'boom')
+
+        retry, created = await self.queue.submit('1:boom', 'boom')
+        self.assertTrue(created)
+        self.assertNotEqual(retry['_id'], failed['_id'])
+
+
+    async def test_wait_timeout(self) -> None:
+        """
+        Waiting returns the unfinished job once the timeout passes.
+        """
+        self.queue.start()
+        job, _ = await self.queue.submit('1:fone', 'fone')
+        job = await self.queue.wait(job['_id'], timeout=0.05)
+        self.assertIn(job['status'], ('queued', 'running'))
+
+
+    async def test_full_queue_rejects(self) -> None:
+        """
+        Submissions are rejected once max_queued jobs are waiting.
+        """
+        await self.queue.submit('1:a', 'a')
+        await self.queue.submit('1:b', 'b')
+        with self.assertRaises(QueueFullError):
+            await self.queue.submit('1:c', 'c')
+        self.assertEqual(len(self.repository.jobs), 2)
+        self.assertEqual(self.queue.stats()['rejected'], 1)
+
+
+    async def test_full_queue_rolls_back(self) -> None:
+        """
+        A job added while the queue filled up is deleted again.
+        """
+        await self.queue.submit('1:a', 'a')
+        results = await asyncio.gather(self.queue.submit('1:b', 'b'),
+                                       self.queue.submit('1:c', 'c'),
+                                       return_exceptions=True)
+        self.assertEqual(sum(isinstance(result, QueueFullError) for result in results), 1)
+        self.assertEqual(len(self.repository.jobs), 2)
+        self.assertEqual(self.queue.stats()['queued'], 2)
+
+
+    async def test_stop_fails_unfinished_jobs(self) -> None:
+        """
+        Stopping fails the running and queued jobs, so their keys are released.
+        """
+        self.queue.start()
+        running, _ = await self.queue.submit('1:a', 'a')
+        queued, _ = await self.queue.submit('1:b', 'b')
+        while not self.payloads:
+            await asyncio.sleep(0)
+
+        await self.queue.stop()
+        for job in (running, queued):
+            self.assertEqual(self.repository.jobs[job['_id']]['status'], 'failed')
+            self.assertEqual(self.repository.jobs[job['_id']]['error'], 'Job cancelled.')
+        self.assertEqual(self.queue.stats()['failed'], 2)
+
+        _, created = await self.queue.submit('1:b', 'b')
+        self.assertTrue(created)
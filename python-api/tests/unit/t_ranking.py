@@ -0,0 +1,101 @@
+"""
+Lexical relevance ranking tests.
+"""
+
+# --- IMPORTS ---
+from opty_api.utils.ranking import Bm25Index
+from opty_api.utils.ranking import query_weights
+from opty_api.utils.ranking import tokenize
+
+import unittest
+
+
+# --- CODE ---
+class TestTokenize(unittest.TestCase):
+    """
+    Tokenizer tests.
+    """
+
+    def test_folds_accents_and_case(self) -> None:
+        """
+        Tokens are accent-folded and case-folded.
+        """
+        self.assertEqual(tokenize('Câmera AÇÃO'), ['camera', 'acao'])
+
+
+    def test_reduces_plurals(self) -> None:
+        """
+        Plurals are reduced to the singular, except short words and words ending in "ss".
+        """
+        self.assertEqual(tokenize('fones mouses gás express'), ['fone', 'mouse', 'gas', 'express'])
+
+
+    def test_drops_stopwords_ending_in_s(self) -> None:
+        """
+        Stopwords ending in "s" are dropped rather than stripped into other tokens.
+        """
+        self.assertEqual(tokenize('mais fones'), ['fone'])
+
+
+    def test_drops_plural_stopwords(self) -> None:
+        """
+        Plurals of stopwords are dropped too.
+        """
+        self.assertEqual(tokenize('coisas baratas'), [])
+
+
+    def test_query_weights(self) -> None:
+        """
+        Tokens are weighted by the number of queries using them.
+        """
+        weights = query_weights(['fone bluetooth', 'fones sem fio'])
+        self.assertEqual(weights, {'fone': 2, 'bluetooth': 1, 'sem': 1, 'fio': 1})
+
+
+class TestBm25Index(unittest.TestCase):
+    """
+    BM25 index tests.
+    """
+
+    def test_empty_corpus(self) -> None:
+        """
+        An empty index scores and ranks nothing.
+        """
+        index = Bm25Index([])
+        self.assertEqual(len(index.scores({'fone': 1})), 0)
+        self.assertEqual(index.rank({'fone': 1}), [])
+
+
+    def test_unknown_tokens(self) -> None:
+        """
+        Query tokens missing from the index score every document 0 and keep the original order.
+        """
+        index = Bm25Index(['Fone Bluetooth', 'Mouse Gamer', 'Teclado'])
+        self.assertEqual(index.scores({'monitor': 1}).tolist(), [0.0, 0.0, 0.0])
+        self.assertEqual(index.rank({'monitor': 1}), [0, 1, 2])
+
+
+    def test_ranks_matches_first(self) -> None:
+        """
+        Documents matching more (and rarer) query tokens come first.
+        """
+        index = Bm25Index(['Capa para celular', 'Fone Bluetooth sem fio', 'Fone com fio', 'Mouse sem fio'])
+        self.assertEqual(index.rank(query_weights(['fone bluetooth'])), [1, 2, 0, 3])
+
+
+    def test_stable_ties(self) -> None:
+        """
+        Documents with the same score keep their original order.
+        """
+        index = Bm25Index(['Mouse Gamer', 'Fone Preto', 'Teclado', 'Fone Branco', 'Fone Azul'])
+        self.assertEqual(index.rank({'fone': 1}), [1, 3, 4, 0, 2])
+
+
+    def test_repeated_tokens_saturate(self) -> None:
+        """
+        Repeating a token raises the score less than matching another query token.
+        """
+        index = Bm25Index(['fone fone fone', 'fone bluetooth', 'mouse'])
+        scores = index.scores({'fone': 1, 'bluetooth': 1})
+        self.assertGreater(scores[1], scores[0])
+        self.assertGreater(scores[0], scores[2])
@@ -0,0 +1,153 @@
+"""
+Fair outbound request scheduler tests.
+"""
+
+# --- IMPORTS ---
+from opty_api.err.queue_timeout_error import QueueTimeoutError
+from opty_api.utils.scheduler import FairScheduler
+from opty_api.utils.scheduler import tenant_var
+
+import asyncio
+import unittest
+
+
+# --- TYPES ---
+from typing import List
+
+
+# --- CODE ---
+class TestFairScheduler(unittest.IsolatedAsyncioTestCase):
+    """
+    Fair scheduler tests.
+    """
+
+    async def test_weighted_share(self) -> None:
+        """
+        Backlogged tenants get slots in proportion to their weights.
+        """
+        scheduler = FairScheduler(concurrency=1)
+        await scheduler.acquire('holder', 1.0)
+        order: List[str] = []
+
+        # request a slot, then free it right away
+        async def request(key: str, weight: float) -> None:
+            await scheduler.acquire(key, weight)
+            order.append(key)
+            scheduler.release()
+
+        tasks = [asyncio.create_task(request('light', 1.0)) for _ in range(4)]
+        tasks += [asyncio.create_task(request('heavy', 4.0)) for _ in range(4)]
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.stats()['queued'], 8)
+
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ['light'] + ['heavy'] * 4 + ['light'] * 3)
+        self.assertEqual(scheduler.active, 0)
+
+
+    async def test_timeout(self) -> None:
+        """
+        A request waiting longer than max_queue_time fails and leaves the queue.
+        """
+        scheduler = FairScheduler(concurrency=1, max_queue_time=0.01)
+        await scheduler.acquire('holder', 1.0)
+        with self.assertRaises(QueueTimeoutError):
+            await scheduler.acquire('waiter', 1.0)
+
+        stats = scheduler.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['queued'], 0)
+        scheduler.release()
+        self.assertEqual(scheduler.active, 0)
+
+
+    async def test_cancelled_waiter(self) -> None:
+        """
+        A slot freed after its waiter gave up is not handed over to it.
+        """
+        scheduler = FairScheduler(concurrency=1)
+        await scheduler.acquire('holder', 1.0)
+        waiter = asyncio.create_task(scheduler.acquire('waiter', 1.0))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(scheduler.stats()['queued'], 0)
+        scheduler.release()
+        self.assertEqual(scheduler.active, 0)
+
+
+    async def test_cancelled_after_grant(self) -> None:
+        """
+        A slot granted to a waiter cancelled before it resumed is freed.
+        """
+        scheduler = FairScheduler(concurrency=1)
+        await scheduler.acquire('holder', 1.0)
+        waiter = asyncio.create_task(scheduler.acquire('waiter', 1.0))
+        await asyncio.sleep(0)
+
+        scheduler.release()
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(scheduler.active, 0)
+
+
+    async def test_spare(self) -> None:
+        """
+        Spare slots are the free ones, and none while requests are waiting.
+        """
+        scheduler = FairScheduler(concurrency=2)
+        self.assertEqual(scheduler.spare(), 2)
+        await scheduler.acquire('a', 1.0)
+        self.assertEqual(scheduler.spare(), 1)
+        self.assertTrue(scheduler.try_acquire())
+        self.assertEqual(scheduler.spare(), 0)
+
+        # waiting request: no spare slot even once one frees up
+        waiter = asyncio.create_task(scheduler.acquire('b', 1.0))
+        await asyncio.sleep(0)
+        self.assertFalse(scheduler.try_acquire())
+        scheduler.release()
+        await waiter
+        self.assertEqual(scheduler.spare(), 0)
+        scheduler.release()
+        scheduler.release()
+        self.assertEqual(scheduler.spare(), 2)
+
+
+    async def test_spare_slot(self) -> None:
+        """
+        Spare slots are only taken when free, without queuing.
+        """
+        scheduler = FairScheduler(concurrency=1)
+        async with scheduler.spare_slot():
+            self.assertEqual(scheduler.active, 1)
+            with self.assertRaises(QueueTimeoutError):
+                async with scheduler.spare_slot():
+                    pass
+        self.assertEqual(scheduler.active, 0)
+
+
+    async def test_slot(self) -> None:
+        """
+        Slots are queued on behalf of the current tenant and freed on error.
+        """
+        scheduler = FairScheduler(concurrency=1)
+        await scheduler.acquire('holder', 1.0)
+        tenant_var.set(('user:a', 1.0))
+
+        # hold a slot, failing once granted
+        async def request() -> None:
+            async with scheduler.slot():
+                raise RuntimeError('boom')
+
+        task = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.deepest_queues(), {'user:a': 1})
+        scheduler.release()
+        with self.assertRaises(RuntimeError):
+            await task
+        self.assertEqual(scheduler.active, 0)
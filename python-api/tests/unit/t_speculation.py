@@ -0,0 +1,199 @@
+"""
+Shared task cache and speculative execution tests.
+"""
+
+# --- IMPORTS ---
+from opty_api.utils.cache import TaskCache
+from opty_api.utils.speculation import Speculator
+
+import asyncio
+import unittest
+
+
+# --- TYPES ---
+from typing import List
+
+
+# --- CODE ---
+class Work:
+    """
+    Recorded work, released on demand.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the work.
+        """
+        self.inputs: List[str] = []
+        self.cancelled: List[str] = []
+        self.release = asyncio.Event()
+
+
+    async def run(self, value: str) -> str:
+        """
+        Run on an input once released.
+        """
+        self.inputs.append(value)
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled.append(value)
+            raise
+        if value == 'boom':
+            raise RuntimeError('boom')
+        return value.upper()
+
+
+class TestTaskCache(unittest.IsolatedAsyncioTestCase):
+    """
+    Task cache tests.
+    """
+
+    def setUp(self) -> None:
+        """
+        Create the cache and the work.
+        """
+        self.cache: TaskCache[str] = TaskCache(maxsize=10, ttl=60.0)
+        self.work = Work()
+
+
+    async def test_shares_in_flight_task(self) -> None:
+        """
+        Callers of the same key share one task, and its result is kept.
+        """
+        waiters = [asyncio.create_task(self.cache.get('fone', lambda: self.work.run('fone'))) for _ in range(2)]
+        await asyncio.sleep(0)
+        self.work.release.set()
+        self.assertEqual(await asyncio.gather(*waiters), ['FONE', 'FONE'])
+        self.assertEqual(await self.cache.get('fone', lambda: self.work.run('fone')), 'FONE')
+        self.assertEqual(self.work.inputs, ['fone'])
+        self.assertEqual(self.cache.stats()['joined'], 2)
+
+
+    async def test_failed_task_dropped(self) -> None:
+        """
+        A failed task is dropped, so the next caller runs the work again.
+        """
+        self.work.release.set()
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                await self.cache.get('boom', lambda: self.work.run('boom'))
+        self.assertEqual(self.work.inputs, ['boom', 'boom'])
+
+
+    async def test_last_waiter_cancels(self) -> None:
+        """
+        The work is cancelled once its last caller gives up, not before.
+        """
+        first = asyncio.create_task(self.cache.get('fone', lambda: self.work.run('fone')))
+        second = asyncio.create_task(self.cache.get('fone', lambda: self.work.run('fone')))
+        await asyncio.sleep(0)
+
+        # one caller left: work goes on
+        first.cancel()
+        await asyncio.sleep(0)
+        self.assertEqual(self.work.cancelled, [])
+
+        # last caller left: work cancelled and forgotten
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0)
+        self.assertEqual(self.work.cancelled, ['fone'])
+        self.assertEqual(self.cache.stats()['cancelled'], 1)
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+
+    async def test_discard(self) -> None:
+        """
+        In-flight work is only discarded while nobody waits for it.
+        """
+        self.cache.start('fone', lambda: self.work.run('fone'))
+        waiter = asyncio.create_task(self.cache.get('mouse', lambda: self.work.run('mouse')))
+        await asyncio.sleep(0)
+        self.assertTrue(self.cache.discard('fone'))
+        self.assertFalse(self.cache.discard('mouse'))
+        self.assertFalse(self.cache.discard('unknown'))
+
+        self.work.release.set()
+        self.assertEqual(await waiter, 'MOUSE')
+        self.assertEqual(self.work.cancelled, ['fone'])
+
+
+class TestSpeculator(unittest.IsolatedAsyncioTestCase):
+    """
+    Speculator tests.
+    """
+
+    def setUp(self) -> None:
+        """
+        Create the speculator and the work.
+        """
+        self.work = Work()
+        self.speculator: Speculator[str] = Speculator(TaskCache(maxsize=10, ttl=60.0))
+
+
+    async def actual(self, value: str) -> str:
+        """
+        Compute the actual input once the guess work started, then release the work.
+        """
+        await asyncio.sleep(0)
+        if value == 'boom':
+            raise RuntimeError('normalization failed')
+        self.work.release.set()
+        return value
+
+
+    async def speculate(self, guess: str, actual: str) -> tuple:
+        """
+        Run the work on the actual input, speculating on the guess.
+        """
+        return await self.speculator.run(guess, self.actual(actual), self.work.run, key=str.casefold)
+
+
+    async def test_hit(self) -> None:
+        """
+        A right guess (same key) uses the in-flight work.
+        """
+        self.assertEqual(await self.speculate('Fone', 'fone'), ('fone', 'FONE'))
+        self.assertEqual(self.work.inputs, ['Fone'])
+        self.assertEqual(self.speculator.stats()['hits'], 1)
+
+
+    async def test_miss(self) -> None:
+        """
+        A wrong guess is cancelled and the work runs on the actual input.
+        """
+        self.assertEqual(await self.speculate('quero fone', 'fone'), ('fone', 'FONE'))
+        await asyncio.sleep(0)
+        self.assertEqual(self.work.inputs, ['quero fone', 'fone'])
+        self.assertEqual(self.work.cancelled, ['quero fone'])
+        self.assertEqual(self.speculator.stats()['misses'], 1)
+
+
+    async def test_keep_misses(self) -> None:
+        """
+        Wrong guesses run to completion and stay cached when kept.
+        """
+        self.speculator.keep_misses = True
+        await self.speculate('quero fone', 'fone')
+        self.assertEqual(await self.speculator.results.get('quero fone', lambda: self.work.run('other')), 'QUERO FONE')
+        self.assertEqual(self.work.cancelled, [])
+
+
+    async def test_skipped(self) -> None:
+        """
+        Without a guess, the work only runs on the actual input.
+        """
+        self.assertEqual(await self.speculate('', 'fone'), ('fone', 'FONE'))
+        self.assertEqual(self.work.inputs, ['fone'])
+        self.assertEqual(self.speculator.stats()['skipped'], 1)
+
+
+    async def test_actual_fails(self) -> None:
+        """
+        The guess work is cancelled when the actual input cannot be computed.
+        """
+        with self.assertRaisesRegex(RuntimeError, 'normalization failed'):
+            await self.speculate('fone', 'boom')
+        await asyncio.sleep(0)
+        self.assertEqual(self.work.cancelled, ['fone'])